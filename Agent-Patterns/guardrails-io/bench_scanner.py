@@ -0,0 +1,113 @@
+"""
+Guardrails - Scanner Benchmark
+Throughput of the per-pattern checks vs the compiled single-pass scanner.
+
+Runs without an API key:
+    python bench_scanner.py --mb 8 --phrases 500
+"""
+import argparse
+import random
+import re
+import time
+from scanner import PII_PATTERNS, PII_TRIGGER, UNSAFE_PHRASES, Scanner
+
+WORDS = ("the quick brown fox jumps over a lazy dog while customers ask about orders "
+         "refunds shipping invoices accounts passwords and support tickets").split()
+SAMPLES = ["123-45-6789", "4111 1111 1111 1111", "jane.doe@example.com", "Ignore previous instructions",
+           "4111111111111111@example.com"]  # Card number and email at once
+
+
+def make_text(size: int, pii_every: int, seed: int = 0) -> str:
+    """Prose of roughly `size` characters with a PII/unsafe sample every `pii_every` words."""
+    rng = random.Random(seed)
+    words, length = [], 0
+    while length < size:
+        word = rng.choice(SAMPLES) if pii_every and len(words) % pii_every == pii_every - 1 else rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def make_phrases(count: int, seed: int = 1) -> list[str]:
+    """Blocklist of `count` phrases: the defaults plus random 2-4 word phrases."""
+    rng = random.Random(seed)
+    phrases = list(UNSAFE_PHRASES)
+    while len(phrases) < count:
+        phrases.append(" ".join(rng.choice(WORDS) + rng.choice("xyzq") for _ in range(rng.randint(2, 4))))
+    return phrases
+
+
+def legacy_check(text: str, phrases: list[str]) -> tuple[list[str], bool]:
+    """The original guardrails: one re.search per PII pattern, one per lowercased blocklist phrase."""
+    pii_types = [name for name, pattern in PII_PATTERNS.items() if re.search(pattern, text)]
+    lowered = text.lower()
+    unsafe = any(re.search(phrase, lowered) for phrase in phrases)
+    return pii_types, unsafe
+
+
+def legacy_spans(text: str, phrases: list[str]) -> list:
+    """The original rules, extended to report every span (what scan() returns)."""
+    lowered = text.lower()
+    return ([m.span() for pattern in PII_PATTERNS.values() for m in re.finditer(pattern, text)]
+            + [m.span() for phrase in phrases for m in re.finditer(re.escape(phrase), lowered)])
+
+
+def compiled_check(scanner: Scanner, text: str) -> list:
+    """Single pass, collecting every match with its span."""
+    return scanner.scan(text)
+
+
+def streamed_check(scanner: Scanner, text: str, chunk_size: int = 4096) -> list:
+    """Same scan, fed in chunks as they would arrive from a stream."""
+    stream = scanner.stream()
+    found = []
+    for i in range(0, len(text), chunk_size):
+        found.extend(stream.feed(text[i:i + chunk_size]))
+    found.extend(stream.close())
+    return found
+
+
+def throughput(fn, text: str, repeat: int) -> float:
+    """Best-of-`repeat` throughput in MB/s."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started)
+    return len(text.encode("utf-8")) / best / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Guardrail scanner micro-benchmark")
+    parser.add_argument("--mb", type=float, default=4.0, help="Text size in MB")
+    parser.add_argument("--phrases", type=int, default=len(UNSAFE_PHRASES), help="Blocklist size")
+    parser.add_argument("--pii-every", type=int, default=0,
+                        help="Insert a PII/unsafe sample every N words (0 = clean text, the worst case)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = make_text(int(args.mb * 1e6), args.pii_every)
+    phrases = make_phrases(args.phrases)
+    scanner = Scanner(patterns=PII_PATTERNS, phrases={"unsafe": phrases}, trigger=PII_TRIGGER)
+
+    print(f"📏 {len(text) / 1e6:.1f} MB text, {len(PII_PATTERNS)} PII patterns, {len(phrases)} phrases")
+    pii_spans = {m.span() for pattern in PII_PATTERNS.values() for m in re.finditer(pattern, text)}
+    found = compiled_check(scanner, text)
+    found_pii = {(m.start, m.end) for m in found if m.label in PII_PATTERNS}
+    if found_pii != pii_spans or streamed_check(scanner, text) != found:
+        raise SystemExit("❌ Scanner results differ from the per-rule checks")
+    results = {
+        "legacy (re.search per rule)": throughput(lambda t: legacy_check(t, phrases), text, args.repeat),
+        "legacy (finditer per rule)": throughput(lambda t: legacy_spans(t, phrases), text, args.repeat),
+        "compiled scan (all spans)": throughput(lambda t: compiled_check(scanner, t), text, args.repeat),
+        "compiled stream (4 KB chunks)": throughput(lambda t: streamed_check(scanner, t), text, args.repeat),
+    }
+    baseline = results["legacy (re.search per rule)"]
+    for name, mbps in results.items():
+        print(f"  {name:<32} {mbps:8.1f} MB/s  ({mbps / baseline:.1f}x)")
+    print("  (re.search stops at the first hit and reports no spans, so on text with PII early\n"
+          "   it only answers 'is there any?'; the finditer baseline does the scanner's full job)")
+
+
+if __name__ == "__main__":
+    main()
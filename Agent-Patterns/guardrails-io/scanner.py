@@ -0,0 +1,282 @@
+"""
+Guardrails - Scanner
+Compiled PII and blocklist scanning with match spans.
+
+Each regex rule is matched on its own, so matches of different rules may
+overlap and every rule is reported, as with separate per-rule checks (a
+card number that is also the local part of an email address is both).
+Python's regex engine is slow when it has to try a pattern at every
+position, so rules can declare a trigger: a character class every match
+contains (a digit or "@" for the PII rules). A fast scan finds trigger runs
+and the rules only run in the windows around them - on clean text that is
+no windows at all.
+
+Literal blocklist phrases are matched on lowercased text. Small lists use
+the string search built into str.find; larger lists are folded into a
+prefix trie ("system prompt" / "system message" -> "system (?:prompt|message)")
+that the regex engine walks once per position, Aho-Corasick style, instead
+of once per phrase.
+
+StreamScanner runs the same matchers over text arriving in chunks and keeps
+a small window between chunks, so matches that cross chunk boundaries are
+found exactly once, with offsets into the whole stream.
+"""
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+PII_PATTERNS = {
+    "SSN": r"\b\d{3}-\d{2}-\d{4}\b",
+    "credit_card": r"\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b",
+    "email": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b",
+}
+PII_TRIGGER = r"[\d@]"  # Every PII match above contains one of these
+
+UNSAFE_PHRASES = [
+    "ignore previous instructions",
+    "system prompt",
+    "jailbreak",
+]
+
+DEFAULT_MAX_MATCH = 256  # Longest match the windows must cover (emails max out at 254)
+SMALL_BLOCKLIST = 16  # Up to this many phrases, per-phrase str.find beats the trie
+
+
+@dataclass(frozen=True)
+class Match:
+    """One rule match; start/end are offsets into the scanned text (or stream)."""
+    label: str
+    start: int
+    end: int
+    text: str
+
+
+def trie_regex(phrases: Iterable[str]) -> str:
+    """Regex for a set of literal phrases, factored by common prefixes (longest match wins)."""
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}  # End of phrase
+
+    def build(node: dict) -> str:
+        if list(node) == [""]:
+            return ""
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # A phrase ends here, but prefer continuing into a longer one
+            body = f"(?:{body})?" if len(branches) == 1 else body + "?"
+        return body
+
+    return build(trie)
+
+
+# ============================================
+# Matchers
+# ============================================
+
+class _TriggerWindows:
+    """Windows of a text that may contain matches, shared by all regex rules of a scanner."""
+
+    def __init__(self, trigger: str, max_match: int):
+        self.trigger = re.compile(trigger)
+        self.last_trigger = re.compile(f"(?s:.*)(?:{trigger})")
+        self.max_match = max_match
+        # Last (text, pos, windows): every rule scans the same text, but it is searched once
+        self._last: tuple = (None, -1, [])
+
+    def _regions(self, text: str, pos: int) -> Iterator[tuple[int, int]]:
+        """
+        Windows around trigger characters that may contain matches.
+
+        A match contains a trigger character and is at most max_match long,
+        so it lies within max_match of one; one more character keeps a
+        trailing \\b looking at real text. Triggers closer than the merge
+        distance share a window, and the greedy `last_trigger` search jumps
+        straight to the last one in range instead of visiting each.
+        """
+        reach = self.max_match
+        merge = 2 * reach + 2  # Windows of triggers closer than this overlap
+        hit = self.trigger.search(text, pos)
+        while hit:
+            start, covered = max(pos, hit.start() - reach), hit.end()
+            while last := self.last_trigger.match(text, covered, covered + merge):
+                covered = last.end()
+            yield start, min(len(text), covered + reach + 1)
+            hit = self.trigger.search(text, covered + merge)
+
+    def regions(self, text: str, pos: int) -> list[tuple[int, int]]:
+        last_text, last_pos, windows = self._last
+        if last_text is not text or last_pos != pos:
+            windows = list(self._regions(text, pos))
+            self._last = (text, pos, windows)
+        return windows
+
+
+class _PatternRule:
+    """One regex rule, optionally gated by trigger windows."""
+
+    def __init__(self, label: str, pattern: str, windows: _TriggerWindows | None):
+        self.label = label
+        self.regex = re.compile(pattern)
+        self.windows = windows
+
+    def finditer(self, text: str, pos: int = 0) -> Iterator[Match]:
+        regions = self.windows.regions(text, pos) if self.windows else [(pos, len(text))]
+        for start, end in regions:
+            for m in self.regex.finditer(text, start, end):
+                yield Match(self.label, m.start(), m.end(), m.group())
+
+
+class _PhraseSet:
+    """Literal phrases, leftmost-longest and non-overlapping."""
+
+    def __init__(self, phrases: dict[str, Iterable[str]], ignore_case: bool):
+        self.ignore_case = ignore_case
+        self.label_of: dict[str, str] = {}  # Phrase -> label (first label wins)
+        for label, words in phrases.items():
+            for word in words:
+                if word:
+                    self.label_of.setdefault(word.lower() if ignore_case else word, label)
+        pattern = trie_regex(self.label_of) if self.label_of else r"(?!x)x"
+        self.regex = re.compile(pattern)
+        self.regex_folded = re.compile(pattern, re.IGNORECASE)
+        self.literal = len(self.label_of) <= SMALL_BLOCKLIST
+
+    def _find_literals(self, haystack: str, pos: int) -> Iterator[tuple[int, int]]:
+        hits = []
+        for word in self.label_of:
+            i = haystack.find(word, pos)
+            while i >= 0:
+                hits.append((i, -len(word)))
+                i = haystack.find(word, i + 1)
+        hits.sort()
+        end = pos
+        for i, negative_length in hits:
+            if i >= end:
+                end = i - negative_length
+                yield i, end
+
+    def finditer(self, text: str, pos: int = 0) -> Iterator[Match]:
+        if not self.label_of:
+            return
+        haystack = text.lower() if self.ignore_case else text
+        if len(haystack) != len(text):
+            # Lowercasing changed the length (rare Unicode); match case-insensitively in place
+            for m in self.regex_folded.finditer(text, pos):
+                label = self.label_of.get(m.group().lower(), next(iter(self.label_of.values())))
+                yield Match(label, m.start(), m.end(), m.group())
+            return
+        spans = (self._find_literals(haystack, pos) if self.literal
+                 else (m.span() for m in self.regex.finditer(haystack, pos)))
+        for start, end in spans:
+            yield Match(self.label_of[haystack[start:end]], start, end, text[start:end])
+
+
+# ============================================
+# Scanners
+# ============================================
+
+class Scanner:
+    """Compiled scanner over regex rules and literal blocklists."""
+
+    def __init__(self, patterns: dict[str, str] = None, phrases: dict[str, Iterable[str]] = None,
+                 trigger: str = None, max_match: int = None, ignore_case_phrases: bool = True):
+        """
+        Args:
+            patterns: Label -> regex
+            phrases: Label -> literal phrases (a blocklist)
+            trigger: Character class every regex match contains; enables the trigger prefilter
+            max_match: Longest possible match (bounds the trigger windows and stream overlap);
+                defaults to DEFAULT_MAX_MATCH with regex rules, else the longest phrase
+            ignore_case_phrases: Match phrases case-insensitively
+        """
+        self.matchers = []
+        if phrases:
+            self.matchers.append(_PhraseSet(phrases, ignore_case_phrases))
+        longest_phrase = max(map(len, self.matchers[0].label_of), default=0) if phrases else 0
+        self.max_match = max_match or (DEFAULT_MAX_MATCH if patterns else max(longest_phrase, 1))
+        windows = _TriggerWindows(trigger, self.max_match) if trigger and patterns else None
+        self.matchers[:0] = [_PatternRule(label, pattern, windows) for label, pattern in (patterns or {}).items()]
+
+    def scan(self, text: str) -> list[Match]:
+        """
+        All matches with their spans, ordered by position.
+
+        Matches of one rule (or of the phrase blocklist) never overlap each
+        other; matches of different rules may.
+        """
+        matches = [match for matcher in self.matchers for match in matcher.finditer(text)]
+        if len(self.matchers) > 1:
+            matches.sort(key=lambda m: (m.start, -m.end))
+        return matches
+
+    def search(self, text: str) -> Match | None:
+        """First match only (cheapest check for a tripwire)."""
+        firsts = [m for m in (next(matcher.finditer(text), None) for matcher in self.matchers) if m]
+        return min(firsts, key=lambda m: (m.start, -m.end)) if firsts else None
+
+    def labels_in(self, text: str) -> list[str]:
+        """Distinct labels found, in order of first appearance."""
+        return list(dict.fromkeys(match.label for match in self.scan(text)))
+
+    def stream(self) -> "StreamScanner":
+        """New incremental scanner sharing this scanner's compiled rules."""
+        return StreamScanner(self)
+
+
+class StreamScanner:
+    """
+    Incremental scanner for text arriving in chunks.
+
+    A match starting at position s only depends on text up to s + max_match
+    (plus one character for a trailing word boundary). Matches are reported
+    once that much text has arrived, and everything before the scan position
+    is dropped, so memory stays O(max_match + chunk size).
+    """
+
+    def __init__(self, scanner: Scanner):
+        self.scanner = scanner
+        self.window = scanner.max_match + 1
+        self._buffer = ""
+        self._offset = 0  # Stream offset of _buffer[0]
+        self._pos = [0] * len(scanner.matchers)  # Next buffer position to scan from, per matcher
+
+    def _drain(self, limit: int) -> list[Match]:
+        """Report matches starting at or before buffer position `limit`."""
+        found = []
+        for i, matcher in enumerate(self.scanner.matchers):
+            for m in matcher.finditer(self._buffer, self._pos[i]):
+                if m.start > limit:
+                    break
+                found.append(Match(m.label, self._offset + m.start, self._offset + m.end, m.text))
+                self._pos[i] = m.end
+            self._pos[i] = max(self._pos[i], limit + 1)
+        found.sort(key=lambda m: (m.start, -m.end))
+
+        # Keep one character before the scan position as context for \b lookbehind
+        keep_from = max(0, min(min(self._pos, default=0), len(self._buffer)) - 1)
+        if keep_from:
+            self._buffer = self._buffer[keep_from:]
+            self._offset += keep_from
+            self._pos = [pos - keep_from for pos in self._pos]
+        return found
+
+    def feed(self, chunk: str) -> list[Match]:
+        """Add a chunk; returns the matches that are now certain."""
+        self._buffer += chunk
+        limit = len(self._buffer) - self.window
+        return self._drain(limit) if limit >= min(self._pos, default=0) else []
+
+    def close(self) -> list[Match]:
+        """End of stream: report the remaining matches."""
+        found = self._drain(len(self._buffer))
+        self._buffer, self._pos = "", [0] * len(self._pos)
+        return found
+
+    @property
+    def position(self) -> int:
+        """Stream offset of the text seen so far."""
+        return self._offset + len(self._buffer)
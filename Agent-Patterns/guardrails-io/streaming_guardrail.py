@@ -0,0 +1,134 @@
+"""
+Guardrails - Streaming Output Guardrail
+Check output text deltas as they arrive and stop the stream on a tripwire.
+
+An OutputGuardrail only sees the final output, so an unsafe response is
+generated (and paid for) in full before it is blocked. This guardrail scans
+each text delta as it streams in, keeping a window of the last `max_match`
+characters so matches that span deltas are caught, and cancels the run as
+soon as one is found.
+
+Text is released to the caller only once no future match can include it,
+i.e. with a lag of `max_match` characters - the length of the longest
+blocked phrase (28 characters for the default blocklist).
+"""
+import time
+from openai.types.responses import ResponseTextDeltaEvent
+from agents import Agent, Runner
+from scanner import UNSAFE_PHRASES, Match, Scanner
+
+
+class StreamGuardrailTriggered(Exception):
+    """Raised when streamed output trips the guardrail; the run has been cancelled."""
+
+    def __init__(self, match: Match, released: int, chars_seen: int, seconds: float):
+        super().__init__(f"Output blocked after {chars_seen} chars: {match.label} '{match.text}' at {match.start}")
+        self.match = match
+        self.released = released  # Characters already handed out (known safe)
+        self.chars_seen = chars_seen
+        self.seconds = seconds  # Time from the first delta to the block
+
+
+class StreamingOutputGuardrail:
+    """Incremental tripwire over streamed output text."""
+
+    def __init__(self, scanner: Scanner = None):
+        """
+        Args:
+            scanner: Rules to enforce (default: the UNSAFE_PHRASES blocklist)
+        """
+        self.scanner = scanner or Scanner(phrases={"unsafe": UNSAFE_PHRASES})
+        self.window = self.scanner.max_match
+        self.reset()
+
+    def reset(self):
+        self._tail = ""  # Last window + 1 characters (one extra for \b lookbehind)
+        self._tail_start = 0  # Stream offset of _tail[0]
+        self._released = 0  # Stream offset up to which text was handed out
+        self._started = None
+        self.chars_seen = 0
+        self.tripped: Match | None = None
+
+    def _check(self, buffer: str, final: bool):
+        # A match touching the end of the buffer may still change with the next delta
+        # (e.g. "1234-5678-9012-3456" followed by "7"), so it waits for one more character
+        limit = len(buffer) if final else len(buffer) - 1
+        for match in self.scanner.scan(buffer):
+            if match.end <= limit:
+                self.tripped = Match(match.label, self._tail_start + match.start,
+                                     self._tail_start + match.end, match.text)
+                raise StreamGuardrailTriggered(self.tripped, self._released, self.chars_seen,
+                                               time.perf_counter() - self._started)
+
+    def feed(self, delta: str) -> str:
+        """
+        Check a delta.
+
+        Returns:
+            Text that is now known to be safe (may be empty)
+
+        Raises:
+            StreamGuardrailTriggered: The output so far contains a blocked match
+        """
+        if self._started is None:
+            self._started = time.perf_counter()
+        self.chars_seen += len(delta)
+        buffer = self._tail + delta
+        self._check(buffer, final=False)
+
+        # Any later match has to include the held-back last character, so it starts
+        # at most `window` characters before the end: everything earlier is safe
+        safe_until = max(self._released, self.chars_seen - self.window)
+        released = buffer[self._released - self._tail_start:safe_until - self._tail_start]
+        self._released = safe_until
+
+        keep_from = max(0, len(buffer) - self.window - 1)
+        self._tail = buffer[keep_from:]
+        self._tail_start += keep_from
+        return released
+
+    def close(self) -> str:
+        """End of output: final check, then release the rest."""
+        self._check(self._tail, final=True)
+        released = self._tail[self._released - self._tail_start:]
+        self._released = self.chars_seen
+        return released
+
+
+async def run_streamed_guarded(agent: Agent, user_input: str, guardrail: StreamingOutputGuardrail = None,
+                               on_text=None) -> str:
+    """
+    Run an agent with streaming, checking its output text as it is generated.
+
+    Args:
+        agent: Agent to run
+        user_input: User message
+        guardrail: Streaming guardrail (default: the UNSAFE_PHRASES blocklist)
+        on_text: Called with each piece of released (checked) text, e.g. to print it
+
+    Returns:
+        The full output text
+
+    Raises:
+        StreamGuardrailTriggered: The run was cancelled because the output tripped the guardrail
+    """
+    guardrail = guardrail or StreamingOutputGuardrail()
+    guardrail.reset()
+    result = Runner.run_streamed(agent, user_input)
+    parts = []
+
+    def release(text: str):
+        if text:
+            parts.append(text)
+            if on_text:
+                on_text(text)
+
+    try:
+        async for event in result.stream_events():
+            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                release(guardrail.feed(event.data.delta))
+        release(guardrail.close())
+    except StreamGuardrailTriggered:
+        result.cancel()  # Stop generating (and paying for) the rest of the response
+        raise
+    return "".join(parts)
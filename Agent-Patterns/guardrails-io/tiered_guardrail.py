@@ -0,0 +1,291 @@
+"""
+Guardrails - Tiered Guardrail
+Cheap local checks first; a moderation model only for inputs they cannot decide.
+
+Tiers, in order:
+1. local  - compiled PII/blocklist scan (microseconds). A hit blocks; text
+            with no suspicious phrases at all is allowed.
+2. cache  - verdicts from earlier escalations, keyed by a hash of the
+            normalized text, so repeated inputs skip the model.
+3. model  - the moderation API (or any async check) for what is left.
+
+An escalated check runs concurrently with the agent instead of in front of
+it. The answer is only released once the check passes; a block cancels the
+agent run, and an agent failure cancels the check.
+"""
+import asyncio
+import hashlib
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field, replace
+from statistics import quantiles
+from typing import Awaitable, Callable, Optional
+from openai import AsyncOpenAI
+from agents import Agent, Runner
+from scanner import PII_PATTERNS, PII_TRIGGER, UNSAFE_PHRASES, Scanner
+
+# Not blocked outright, but worth a second opinion
+SUSPICIOUS_PHRASES = [
+    "ignore", "disregard", "instructions", "system message", "pretend", "roleplay", "role-play",
+    "developer mode", "do anything now", "bypass", "override", "unfiltered", "uncensored",
+    "reveal", "password", "exploit", "malware", "weapon", "explosive", "self-harm", "suicide",
+]
+
+TIERS = ("local", "cache", "model")
+
+
+@dataclass(frozen=True)
+class Verdict:
+    """Outcome of a guardrail check."""
+    allowed: bool
+    tier: str  # Tier that decided: local, cache or model
+    reason: str = ""
+
+
+class GuardrailBlocked(Exception):
+    """Raised by TieredGuardrail.run() when the input is blocked."""
+
+    def __init__(self, verdict: Verdict):
+        super().__init__(f"Blocked by {verdict.tier} check: {verdict.reason}")
+        self.verdict = verdict
+
+
+# ============================================
+# Metrics
+# ============================================
+
+@dataclass
+class TierStats:
+    """Latency of one tier (recent samples kept for percentiles)."""
+    calls: int = 0
+    seconds: float = 0.0
+    recent: deque = field(default_factory=lambda: deque(maxlen=1024))
+
+    def record(self, seconds: float):
+        self.calls += 1
+        self.seconds += seconds
+        self.recent.append(seconds)
+
+    def percentile(self, p: int) -> float:
+        if len(self.recent) < 2:
+            return self.recent[0] if self.recent else 0.0
+        return quantiles(self.recent, n=100)[p - 1]
+
+
+@dataclass
+class GuardrailMetrics:
+    """Counters and per-tier latency for a TieredGuardrail."""
+    checks: int = 0
+    escalations: int = 0
+    cache_hits: int = 0
+    blocked: int = 0
+    check_errors: int = 0
+    agent_runs_cancelled: int = 0
+    checks_cancelled: int = 0
+    tiers: dict[str, TierStats] = field(default_factory=lambda: {tier: TierStats() for tier in TIERS})
+
+    @property
+    def escalation_rate(self) -> float:
+        return self.escalations / self.checks if self.checks else 0.0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        looked_up = self.tiers["cache"].calls
+        return self.cache_hits / looked_up if looked_up else 0.0
+
+    def snapshot(self) -> dict:
+        """Flat dict of all metrics, for logging or a metrics exporter."""
+        data = {
+            "checks": self.checks, "escalations": self.escalations, "escalation_rate": self.escalation_rate,
+            "cache_hits": self.cache_hits, "cache_hit_rate": self.cache_hit_rate, "blocked": self.blocked,
+            "check_errors": self.check_errors, "agent_runs_cancelled": self.agent_runs_cancelled,
+            "checks_cancelled": self.checks_cancelled,
+        }
+        for name, stats in self.tiers.items():
+            data[f"{name}.calls"] = stats.calls
+            data[f"{name}.mean_ms"] = stats.seconds / stats.calls * 1000 if stats.calls else 0.0
+            data[f"{name}.p50_ms"] = stats.percentile(50) * 1000
+            data[f"{name}.p95_ms"] = stats.percentile(95) * 1000
+        return data
+
+    def __str__(self) -> str:
+        tiers = ", ".join(
+            f"{name} {stats.calls}x p50 {stats.percentile(50) * 1000:.2f}ms"
+            for name, stats in self.tiers.items()
+        )
+        return (f"{self.checks} checks, {self.escalation_rate:.0%} escalated, "
+                f"{self.cache_hit_rate:.0%} cache hits, {self.blocked} blocked ({tiers})")
+
+
+# ============================================
+# Verdict cache
+# ============================================
+
+def normalize(text: str) -> str:
+    """Canonical form for cache keys: Unicode-normalized, case-folded, whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(normalize(text).encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    """In-memory LRU of verdicts with a time-to-live."""
+
+    def __init__(self, max_entries: int = 10_000, ttl: float = 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[Verdict, float]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Verdict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        verdict, expires_at = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return verdict
+
+    def set(self, key: str, verdict: Verdict):
+        self._entries[key] = (verdict, time.time() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# ============================================
+# Model tier
+# ============================================
+
+async def moderation_check(text: str, client: AsyncOpenAI = None) -> Verdict:
+    """Escalation check using the moderation API."""
+    client = client or AsyncOpenAI()
+    response = await client.moderations.create(model="omni-moderation-latest", input=text)
+    result = response.results[0]
+    if result.flagged:
+        flagged = [name for name, hit in result.categories.model_dump(by_alias=True).items() if hit]
+        return Verdict(False, "model", "flagged: " + ", ".join(flagged))
+    return Verdict(True, "model")
+
+
+# ============================================
+# Tiered guardrail
+# ============================================
+
+class TieredGuardrail:
+    """Input guardrail that only pays for a model check when local checks are unsure."""
+
+    def __init__(self, blocklist: Scanner = None, suspicious: Scanner = None,
+                 escalate: Callable[[str], Awaitable[Verdict]] = None, cache: VerdictCache = None,
+                 fail_closed: bool = True):
+        """
+        Args:
+            blocklist: Rules that block outright (default: PII patterns + UNSAFE_PHRASES)
+            suspicious: Rules that send the input to the model tier (default: SUSPICIOUS_PHRASES)
+            escalate: Async check for uncertain inputs (default: moderation_check)
+            cache: Verdict cache for escalated inputs
+            fail_closed: Block when the escalation check itself fails
+        """
+        self.blocklist = blocklist or Scanner(PII_PATTERNS, {"unsafe": UNSAFE_PHRASES}, trigger=PII_TRIGGER)
+        self.suspicious = suspicious or Scanner(phrases={"suspicious": SUSPICIOUS_PHRASES})
+        self.escalate = escalate or moderation_check
+        self.cache = cache or VerdictCache()
+        self.fail_closed = fail_closed
+        self.metrics = GuardrailMetrics()
+
+    def _timed(self, tier: str, started: float):
+        self.metrics.tiers[tier].record(time.perf_counter() - started)
+
+    def _decided(self, verdict: Verdict) -> Verdict:
+        if not verdict.allowed:
+            self.metrics.blocked += 1
+        return verdict
+
+    def fast_check(self, text: str) -> tuple[Optional[Verdict], str]:
+        """
+        Local and cache tiers.
+
+        Returns:
+            (verdict, or None if the input must be escalated; cache key)
+        """
+        self.metrics.checks += 1
+        started = time.perf_counter()
+        hit = self.blocklist.search(text)
+        suspicious = hit is None and self.suspicious.search(text) is not None
+        self._timed("local", started)
+        if hit:
+            return self._decided(Verdict(False, "local", f"{hit.label}: {hit.text}")), ""
+        if not suspicious:
+            return Verdict(True, "local"), ""
+
+        started = time.perf_counter()
+        key = text_key(text)
+        cached = self.cache.get(key)
+        self._timed("cache", started)
+        if cached:
+            self.metrics.cache_hits += 1
+            return self._decided(replace(cached, tier="cache")), key
+        return None, key
+
+    async def escalate_check(self, text: str, key: str) -> Verdict:
+        """Model tier; successful verdicts are cached."""
+        self.metrics.escalations += 1
+        started = time.perf_counter()
+        try:
+            verdict = await self.escalate(text)
+        except asyncio.CancelledError:
+            self.metrics.checks_cancelled += 1
+            raise
+        except Exception as e:
+            self.metrics.check_errors += 1
+            return self._decided(Verdict(not self.fail_closed, "model", f"check failed: {e}"))
+        finally:
+            self._timed("model", started)
+        self.cache.set(key, verdict)
+        return self._decided(verdict)
+
+    async def check(self, text: str) -> Verdict:
+        """Run the tiers in order and return the first verdict."""
+        verdict, key = self.fast_check(text)
+        return verdict or await self.escalate_check(text, key)
+
+    async def run(self, agent: Agent, user_input: str) -> str:
+        """
+        Run an agent behind the guardrail.
+
+        Escalated checks run concurrently with the agent; the output is only
+        returned once the check has passed.
+
+        Raises:
+            GuardrailBlocked: The input was blocked (the agent run is cancelled)
+        """
+        verdict, key = self.fast_check(user_input)
+        if verdict:
+            if not verdict.allowed:
+                raise GuardrailBlocked(verdict)
+            return (await Runner.run(agent, user_input)).final_output
+
+        check = asyncio.create_task(self.escalate_check(user_input, key))
+        agent_run = asyncio.create_task(Runner.run(agent, user_input))
+        await asyncio.wait({check, agent_run}, return_when=asyncio.FIRST_COMPLETED)
+
+        if agent_run.done() and agent_run.exception() is not None and not check.done():
+            check.cancel()  # No answer to release, so the verdict is not needed
+            await asyncio.gather(check, return_exceptions=True)
+            raise agent_run.exception()
+
+        verdict = await check
+        if not verdict.allowed:
+            if not agent_run.done():
+                agent_run.cancel()
+                self.metrics.agent_runs_cancelled += 1
+            await asyncio.gather(agent_run, return_exceptions=True)
+            raise GuardrailBlocked(verdict)
+        return (await agent_run).final_output
@@ -0,0 +1,127 @@
+"""
+Routing Agent - Pre-Router Evaluation
+Offline accuracy and latency of the local intent classifier.
+
+Reports accuracy, how many requests each confidence threshold would route
+locally (skipping the triage turn) and how accurate those are. With --llm
+the held-out set is also routed by the triage agent, to compare accuracy
+and latency against the LLM handoff (needs OPENAI_API_KEY).
+
+Usage:
+    python eval_router.py
+    python eval_router.py --threshold 0.8 --llm
+"""
+import argparse
+import asyncio
+import time
+from pathlib import Path
+from statistics import mean, quantiles
+from agents import RunHooks, Runner
+from intent_router import EXAMPLES_PATH, IntentClassifier, load_examples
+from main import INTENT_AGENTS, triage_agent
+
+EVAL_PATH = Path(__file__).parent / "intents_eval.jsonl"
+THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.9, 0.95]
+
+
+def percentile_ms(samples: list[float], p: int) -> float:
+    return quantiles(samples, n=100)[p - 1] * 1000 if len(samples) > 1 else samples[0] * 1000
+
+
+def evaluate_local(classifier: IntentClassifier, examples: list[tuple[str, str]]) -> list[dict]:
+    """Classify every example, timing each prediction."""
+    rows = []
+    for text, label in examples:
+        started = time.perf_counter()
+        predicted, confidence = classifier.predict(text)
+        rows.append({"text": text, "label": label, "predicted": predicted,
+                     "confidence": confidence, "seconds": time.perf_counter() - started})
+    return rows
+
+
+class HandoffTimer(RunHooks):
+    """Records when the triage agent hands off, i.e. the routing latency."""
+
+    def __init__(self):
+        self.handoff_at = None
+
+    async def on_handoff(self, context, from_agent, to_agent):
+        self.handoff_at = time.perf_counter()
+
+
+async def evaluate_llm(examples: list[tuple[str, str]]) -> list[dict]:
+    """Route every example through the triage agent's handoff."""
+    labels = {agent.name: label for label, agent in INTENT_AGENTS.items()}
+    rows = []
+    for text, label in examples:
+        timer = HandoffTimer()
+        started = time.perf_counter()
+        result = await Runner.run(triage_agent, text, hooks=timer)
+        routed_at = timer.handoff_at or time.perf_counter()
+        rows.append({"label": label, "predicted": labels.get(result.last_agent.name),
+                     "seconds": routed_at - started})
+    return rows
+
+
+def print_confusion(rows: list[dict], labels: list[str]):
+    width = max(map(len, labels)) + 2
+    print("\n🧮 Confusion (rows: expected, columns: predicted)")
+    print(" " * width + "".join(f"{label:>{width}}" for label in labels + ["none"]))
+    for expected in labels:
+        counts = [sum(1 for r in rows if r["label"] == expected and r["predicted"] == p) for p in labels + [None]]
+        print(f"{expected:<{width}}" + "".join(f"{count:>{width}}" for count in counts))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Evaluate the local intent pre-router")
+    parser.add_argument("--train", type=Path, default=EXAMPLES_PATH)
+    parser.add_argument("--eval", type=Path, default=EVAL_PATH)
+    parser.add_argument("--threshold", type=float, default=0.8, help="Threshold to report in detail")
+    parser.add_argument("--llm", action="store_true", help="Also evaluate the triage agent (API calls)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    classifier = IntentClassifier.from_jsonl(args.train)
+    train_ms = (time.perf_counter() - started) * 1000
+    examples = load_examples(args.eval)
+    rows = evaluate_local(classifier, examples)
+    latencies = [r["seconds"] for r in rows]
+
+    accuracy = mean(r["predicted"] == r["label"] for r in rows)
+    print(f"📚 Trained on {args.train.name} in {train_ms:.1f} ms; evaluating {len(rows)} examples")
+    print(f"🎯 Local accuracy (always trusting the classifier): {accuracy:.1%}")
+    print(f"⚡ Local latency: p50 {percentile_ms(latencies, 50) * 1000:.0f} µs, "
+          f"p95 {percentile_ms(latencies, 95) * 1000:.0f} µs")
+
+    print("\n📈 Threshold sweep")
+    print(f"{'threshold':>10} {'routed locally':>15} {'local accuracy':>15}")
+    for threshold in sorted(set(THRESHOLDS + [args.threshold])):
+        covered = [r for r in rows if r["confidence"] >= threshold]
+        local_accuracy = mean(r["predicted"] == r["label"] for r in covered) if covered else 0.0
+        print(f"{threshold:>10.2f} {len(covered) / len(rows):>15.0%} {local_accuracy:>15.1%}")
+
+    print_confusion(rows, classifier.labels)
+
+    wrong = [r for r in rows if r["confidence"] >= args.threshold and r["predicted"] != r["label"]]
+    if wrong:
+        print(f"\n❌ Confidently wrong at {args.threshold}:")
+        for r in wrong:
+            print(f"   {r['text']!r}: {r['predicted']} ({r['confidence']:.2f}), expected {r['label']}")
+
+    if args.llm:
+        llm_rows = await evaluate_llm(examples)
+        llm_latencies = [r["seconds"] for r in llm_rows]
+        llm_accuracy = mean(r["predicted"] == r["label"] for r in llm_rows)
+        # Pre-router: local decision when confident, otherwise the triage result
+        combined = [local if local["confidence"] >= args.threshold else llm
+                    for local, llm in zip(rows, llm_rows)]
+        print(f"\n🤖 Triage agent: accuracy {llm_accuracy:.1%}, time to handoff "
+              f"p50 {percentile_ms(llm_latencies, 50):.0f} ms, p95 {percentile_ms(llm_latencies, 95):.0f} ms")
+        print(f"🔀 Pre-router at {args.threshold}: accuracy "
+              f"{mean(r['predicted'] == r['label'] for r in combined):.1%}, "
+              f"mean routing latency {mean(r['seconds'] for r in combined) * 1000:.0f} ms "
+              f"(triage alone: {mean(llm_latencies) * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,166 @@
+"""
+Routing Agent - Local Intent Pre-Router
+Route confident requests straight to a specialist without the triage LLM turn.
+
+A small TF-IDF nearest-centroid classifier is trained from labelled examples
+(intents.jsonl) at startup in a few milliseconds and classifies a request in
+tens of microseconds. When its confidence clears a threshold the request goes
+directly to the specialist agent; otherwise it falls back to the triage agent
+and its LLM handoff, exactly as before.
+
+Any object with `predict(text) -> (label, confidence)` can replace the
+classifier. Use eval_router.py to measure accuracy and pick the threshold.
+"""
+import json
+import math
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional, Protocol
+from agents import Agent, Runner, RunResult
+
+EXAMPLES_PATH = Path(__file__).parent / "intents.jsonl"
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STEM_CHARS = 5  # Word prefixes stand in for stems: "crashing"/"crashes" -> "crash"
+
+
+def load_examples(path: Path = EXAMPLES_PATH) -> list[tuple[str, str]]:
+    """Read (text, label) pairs from a JSONL file."""
+    with open(path, encoding="utf-8") as f:
+        return [(row["text"], row["label"]) for row in map(json.loads, f) if row]
+
+
+def features(text: str) -> Counter:
+    """Bag of words, word prefixes and word bigrams."""
+    words = TOKEN_RE.findall(text.lower())
+    feats = Counter(words)
+    feats.update(f"{word[:STEM_CHARS]}~" for word in words if len(word) > STEM_CHARS)
+    feats.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return feats
+
+
+class TfidfVectorizer:
+    """Sparse, L2-normalized TF-IDF vectors (dict feature -> weight)."""
+
+    def __init__(self, texts: Iterable[str]):
+        docs = [features(text) for text in texts]
+        df = Counter(feat for doc in docs for feat in doc)
+        n = len(docs)
+        self.idf = {feat: math.log((1 + n) / (1 + count)) + 1 for feat, count in df.items()}
+
+    def transform(self, text: str) -> dict[str, float]:
+        """Vector for a text; features never seen in training are ignored."""
+        vec = {feat: (1 + math.log(tf)) * self.idf[feat] for feat, tf in features(text).items() if feat in self.idf}
+        norm = math.sqrt(sum(w * w for w in vec.values()))
+        return {feat: w / norm for feat, w in vec.items()} if norm else {}
+
+
+class Classifier(Protocol):
+    def predict(self, text: str) -> tuple[Optional[str], float]: ...
+
+
+class IntentClassifier:
+    """Nearest-centroid intent classifier over TF-IDF vectors."""
+
+    def __init__(self, examples: list[tuple[str, str]], temperature: float = 30.0):
+        """
+        Args:
+            examples: (text, label) training pairs
+            temperature: Sharpness of the softmax that turns similarities into confidences
+        """
+        self.vectorizer = TfidfVectorizer(text for text, _ in examples)
+        self.temperature = temperature
+        sums: dict[str, Counter] = {}
+        for text, label in examples:
+            sums.setdefault(label, Counter()).update(self.vectorizer.transform(text))
+        self.centroids = {}
+        for label, total in sums.items():
+            norm = math.sqrt(sum(w * w for w in total.values()))
+            self.centroids[label] = {feat: w / norm for feat, w in total.items()}
+        self.labels = list(self.centroids)
+
+    @classmethod
+    def from_jsonl(cls, path: Path = EXAMPLES_PATH, **kwargs) -> "IntentClassifier":
+        return cls(load_examples(path), **kwargs)
+
+    def scores(self, text: str) -> dict[str, float]:
+        """Label -> softmax confidence (sums to 1)."""
+        return self._softmax(self.vectorizer.transform(text))
+
+    def _softmax(self, vec: dict[str, float]) -> dict[str, float]:
+        sims = {label: sum(w * centroid.get(feat, 0.0) for feat, w in vec.items())
+                for label, centroid in self.centroids.items()}
+        top = max(sims.values())
+        exp = {label: math.exp((sim - top) * self.temperature) for label, sim in sims.items()}
+        total = sum(exp.values())
+        return {label: value / total for label, value in exp.items()}
+
+    def predict(self, text: str) -> tuple[Optional[str], float]:
+        """(most likely label, confidence); (None, 0.0) when no known feature occurs."""
+        vec = self.vectorizer.transform(text)
+        if not vec:
+            return None, 0.0
+        scores = self._softmax(vec)
+        label = max(scores, key=scores.get)
+        return label, scores[label]
+
+
+@dataclass
+class RouteDecision:
+    """Where a request goes and why."""
+    agent: Agent
+    label: Optional[str]
+    confidence: float
+    source: str  # "local" (direct to specialist) or "llm" (triage handoff)
+    seconds: float  # Time spent deciding locally
+
+
+@dataclass
+class RouterStats:
+    local: int = 0
+    llm: int = 0
+
+    @property
+    def local_rate(self) -> float:
+        total = self.local + self.llm
+        return self.local / total if total else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.local} routed locally, {self.llm} via triage ({self.local_rate:.0%} skipped the triage turn)"
+
+
+class PreRouter:
+    """Sends confident requests straight to a specialist, the rest to the triage agent."""
+
+    def __init__(self, agents: dict[str, Agent], fallback: Agent, classifier: Classifier = None,
+                 min_confidence: float = 0.8):
+        """
+        Args:
+            agents: Intent label -> specialist agent
+            fallback: Agent to use when the classifier is not confident (the triage agent)
+            classifier: Local classifier (default: IntentClassifier trained on intents.jsonl)
+            min_confidence: Confidence needed to skip the triage agent
+        """
+        self.agents = agents
+        self.fallback = fallback
+        self.classifier = classifier or IntentClassifier.from_jsonl()
+        self.min_confidence = min_confidence
+        self.stats = RouterStats()
+
+    def decide(self, text: str) -> RouteDecision:
+        started = time.perf_counter()
+        label, confidence = self.classifier.predict(text)
+        seconds = time.perf_counter() - started
+        if label in self.agents and confidence >= self.min_confidence:
+            self.stats.local += 1
+            return RouteDecision(self.agents[label], label, confidence, "local", seconds)
+        self.stats.llm += 1
+        return RouteDecision(self.fallback, label, confidence, "llm", seconds)
+
+    async def run(self, text: str) -> tuple[RunResult, RouteDecision]:
+        """Route and run the request."""
+        decision = self.decide(text)
+        return await Runner.run(decision.agent, text), decision
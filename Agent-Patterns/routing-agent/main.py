@@ -5,7 +5,13 @@ Route incoming requests to specialized agents based on intent.
 Uses the OpenAI Agents SDK handoff feature for seamless transfer.
 """
 import asyncio
+import sys
+from pathlib import Path
 from agents import Agent, Runner
+from intent_router import PreRouter
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "Agents-SDK-Python" / "common"))
+from routing_cache import RoutingCache
 
 
 # Define specialized agents
@@ -59,14 +65,45 @@ triage_agent = Agent(
     handoffs=[sales_agent, tech_support_agent, general_agent],
 )
 
+# Intent labels used by the local pre-router (see intents.jsonl)
+INTENT_AGENTS = {
+    "sales": sales_agent,
+    "tech_support": tech_support_agent,
+    "general": general_agent,
+}
+
+# Confident requests skip the triage turn; the rest go through triage_agent
+pre_router = PreRouter(INTENT_AGENTS, fallback=triage_agent)
+
+# Triage decisions are remembered, so repeated and near-duplicate requests skip triage too
+routing_cache = RoutingCache()
+SPECIALISTS = {agent.name: agent for agent in INTENT_AGENTS.values()}
 
-async def handle_request(user_message: str):
+
+async def handle_request(user_message: str, use_pre_router: bool = True):
     """Process a user request through the routing system."""
     print(f"\n{'='*50}")
     print(f"👤 User: {user_message}")
     print(f"{'='*50}")
     
-    result = await Runner.run(triage_agent, user_message)
+    hit = routing_cache.lookup(user_message)
+    if hit:
+        print(f"💾 Cached route ({hit.kind}, similarity {hit.similarity:.2f}, {hit.seconds * 1e6:.0f} µs) "
+              f"-> {hit.route}")
+        result = await Runner.run(SPECIALISTS[hit.route], user_message)
+    elif use_pre_router:
+        result, decision = await pre_router.run(user_message)
+        if decision.source == "local":
+            print(f"⚡ Routed locally to {decision.agent.name} "
+                  f"({decision.label}, {decision.confidence:.0%}, {decision.seconds * 1e6:.0f} µs)")
+        else:
+            print(f"🔀 Not confident ({decision.confidence:.0%}), routed via triage")
+    else:
+        result = await Runner.run(triage_agent, user_message)
+    
+    # Remember routes chosen by the triage model (local decisions are already cheap)
+    if not hit and result.last_agent.name in SPECIALISTS and (not use_pre_router or decision.source == "llm"):
+        routing_cache.store(user_message, result.last_agent.name)
     
     print(f"\n🤖 Final Agent: {result.last_agent.name}")
     print(f"📝 Response: {result.final_output}")
@@ -83,11 +120,16 @@ async def main():
         "What are your business hours?",
         "How much does the enterprise tier cost?",
         "I'm getting a 500 error from your API",
+        "What time do you open on weekends?",
+        "When do you open on weekends?",  # Near-duplicate: reuses the cached triage decision
     ]
     
     for request in test_requests:
         await handle_request(request)
         print("\n")
+    
+    print(f"📊 {pre_router.stats}")
+    print(f"💾 {routing_cache.stats}")
 
 
 if __name__ == "__main__":
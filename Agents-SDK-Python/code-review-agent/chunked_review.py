@@ -0,0 +1,497 @@
+"""
+Code Review Agent - Chunked Review
+Review large files and diffs in parallel chunks.
+
+Python source is split at top-level function/class boundaries (large
+classes are split again at their methods), other languages by lines, and
+unified diffs by hunk. Chunks are reviewed concurrently with structured
+output and the per-chunk issues are merged into one `## Code Review Summary`
+with line numbers from the original file.
+
+Usage:
+    python chunked_review.py path/to/module.py
+    git diff | python chunked_review.py --diff -
+"""
+import argparse
+import ast
+import asyncio
+import contextlib
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+from openai import AsyncOpenAI
+from review_types import REVIEW_PROMPTS, ReviewRequest, ReviewType
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "common"))
+from token_budget import count_tokens
+
+SEVERITY_ICONS = {"critical": "🔴 Critical", "warning": "🟡 Warning", "suggestion": "🟢 Suggestion"}
+
+REVIEW_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "integer", "description": "Quality score from 1 to 10"},
+        "issues": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "severity": {"type": "string", "enum": ["critical", "warning", "suggestion"]},
+                    "line": {"type": ["integer", "null"]},
+                    "description": {"type": "string"},
+                },
+                "required": ["severity", "line", "description"],
+                "additionalProperties": False,
+            },
+        },
+        "recommendations": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["score", "issues", "recommendations"],
+    "additionalProperties": False,
+}
+
+
+@dataclass
+class CodeChunk:
+    """Lines from one file, with their line numbers in that file."""
+    path: str
+    lines: list[str]
+    numbers: list[int]  # 1-based line number of each entry in lines
+    label: str = ""
+    removed: dict[int, list[str]] = field(default_factory=dict)  # Diff lines removed before lines[i]
+
+    @property
+    def start_line(self) -> int:
+        return self.numbers[0]
+
+    @property
+    def end_line(self) -> int:
+        return self.numbers[-1]
+
+    def numbered(self) -> str:
+        """Source with original line numbers, so reported lines map back to the file."""
+        out = []
+        for i, (number, line) in enumerate(zip(self.numbers, self.lines)):
+            if i and number != self.numbers[i - 1] + 1:
+                out.append("  ... |")
+            out += [f"      | {r}" for r in self.removed.get(i, [])]
+            out.append(f"{number:>5} | {line}")
+        out += [f"      | {r}" for r in self.removed.get(len(self.lines), [])]
+        return "\n".join(out)
+
+    def map_line(self, line: Optional[int]) -> Optional[int]:
+        """Map a line reported by the model back to a file line number."""
+        if line is None or line in self.numbers:
+            return line
+        # Model answered relative to the excerpt
+        return self.numbers[line - 1] if 1 <= line <= len(self.numbers) else None
+
+
+@dataclass
+class ReviewIssue:
+    severity: str
+    line: Optional[int]
+    description: str
+    path: str = ""
+
+
+@dataclass
+class ChunkReview:
+    chunk: CodeChunk
+    score: Optional[int] = None
+    issues: list[ReviewIssue] = field(default_factory=list)
+    recommendations: list[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+# ============================================
+# Splitting
+# ============================================
+
+def _line_tokens(lines: list[str], model: str) -> list[int]:
+    return [count_tokens(line, model) + 1 for line in lines]
+
+
+def _split_range(start: int, end: int, tokens: list[int], max_tokens: int) -> list[tuple[int, int]]:
+    """Split lines start..end (1-based) into consecutive ranges within max_tokens."""
+    ranges, range_start, used = [], start, 0
+    for number in range(start, end + 1):
+        cost = tokens[number - 1]
+        if used and used + cost > max_tokens:
+            ranges.append((range_start, number - 1))
+            range_start, used = number, 0
+        used += cost
+    ranges.append((range_start, end))
+    return ranges
+
+
+def _python_units(body: list[ast.stmt], start: int, end: int, tokens: list[int],
+                  max_tokens: int) -> list[tuple[int, int]]:
+    """Line ranges for a block of statements, each covering whole definitions."""
+    units, cursor = [], start
+    for i, node in enumerate(body):
+        unit_end = node.end_lineno if i < len(body) - 1 else end
+        unit_start = cursor
+        cursor = unit_end + 1
+        if sum(tokens[unit_start - 1:unit_end]) <= max_tokens:
+            units.append((unit_start, unit_end))
+        elif isinstance(node, ast.ClassDef) and len(node.body) > 1:
+            # Oversized class: split again at its methods (header goes with the first one)
+            units.extend(_python_units(node.body, unit_start, unit_end, tokens, max_tokens))
+        else:
+            units.extend(_split_range(unit_start, unit_end, tokens, max_tokens))
+    if cursor <= end:
+        units.append((cursor, end))
+    return units
+
+
+def _pack(units: list[tuple[int, int]], tokens: list[int], max_tokens: int) -> list[tuple[int, int]]:
+    """Merge adjacent small units into chunks of at most max_tokens."""
+    packed = []
+    for start, end in units:
+        cost = sum(tokens[start - 1:end])
+        if packed:
+            prev_start, prev_end, prev_cost = packed[-1]
+            if prev_cost + cost <= max_tokens:
+                packed[-1] = (prev_start, end, prev_cost + cost)
+                continue
+        packed.append((start, end, cost))
+    return [(start, end) for start, end, _ in packed]
+
+
+def _unit_ranges(source: str, lines: list[str], language: str, tokens: list[int],
+                 max_tokens: int) -> list[tuple[int, int]]:
+    if language == "python":
+        try:
+            tree = ast.parse(source)
+            if tree.body:
+                # Leading comments/imports before the first definition belong to it
+                return _python_units(tree.body, 1, len(lines), tokens, max_tokens)
+        except SyntaxError:
+            pass
+    return _split_range(1, len(lines), tokens, max_tokens)
+
+
+def _chunks(path: str, lines: list[str], ranges: list[tuple[int, int]]) -> list[CodeChunk]:
+    return [
+        CodeChunk(path, lines[start - 1:end], list(range(start, end + 1)), label=f"lines {start}-{end}")
+        for start, end in ranges
+    ]
+
+
+def split_units(source: str, path: str = "", language: str = "python",
+                max_tokens: int = 3000, model: str = "gpt-4o-mini") -> list[CodeChunk]:
+    """
+    Split a source file into definition units (top-level functions/classes,
+    methods of oversized classes), each within max_tokens. Unlike
+    split_source() small units are not merged, so a unit only changes when
+    its own code does.
+    """
+    lines = source.splitlines()
+    if not lines:
+        return []
+    return _chunks(path, lines, _unit_ranges(source, lines, language, _line_tokens(lines, model), max_tokens))
+
+
+def split_source(source: str, path: str = "", language: str = "python",
+                 max_tokens: int = 3000, model: str = "gpt-4o-mini") -> list[CodeChunk]:
+    """Split a source file into review chunks along definition boundaries."""
+    lines = source.splitlines()
+    if not lines:
+        return []
+    tokens = _line_tokens(lines, model)
+    units = _unit_ranges(source, lines, language, tokens, max_tokens)
+    return _chunks(path, lines, _pack(units, tokens, max_tokens))
+
+
+HUNK_HEADER = re.compile(r"^@@ -\d+(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def _parse_hunks(diff: str) -> list[CodeChunk]:
+    """
+    One chunk per diff hunk, numbered with new-file line numbers.
+
+    A hunk ends once the old and new line counts of its header are used
+    up, so file headers of a multi-file diff (diff --git, index, ---) are
+    never read as hunk lines, while a removed line that starts with "--"
+    still is.
+
+    >>> diff = "\\n".join([
+    ...     "diff --git a/one.py b/one.py", "index 1..2 100644", "--- a/one.py", "+++ b/one.py",
+    ...     "@@ -1,2 +1,2 @@", " keep", "-old", "+new",
+    ...     "diff --git a/two.py b/two.py", "index 3..4 100644", "--- a/two.py", "+++ b/two.py",
+    ...     "@@ -5 +5,2 @@", " five", "+six"])
+    >>> [(h.path, h.numbers, h.lines, h.removed) for h in _parse_hunks(diff)]
+    [('one.py', [1, 2], [' keep', '+new'], {1: ['-old']}), ('two.py', [5, 6], [' five', '+six'], {})]
+    """
+    hunks: list[CodeChunk] = []
+    path = ""
+    hunk: Optional[CodeChunk] = None
+    line_number = old_left = new_left = 0
+    removed: list[str] = []
+
+    for raw in diff.splitlines():
+        if hunk is not None and (old_left > 0 or new_left > 0):
+            if raw.startswith("\\"):
+                continue  # "\ No newline at end of file"
+            if raw.startswith("-"):
+                # Removed lines have no new-file number; show them before the next line
+                removed.append(raw)
+                hunk.removed[len(hunk.lines)] = removed
+                old_left -= 1
+                continue
+            if raw.startswith("+"):
+                hunk.lines.append(raw)
+                new_left -= 1
+            else:
+                hunk.lines.append(" " + raw[1:])
+                old_left -= 1
+                new_left -= 1
+            hunk.numbers.append(line_number)
+            line_number += 1
+            removed = []
+            continue
+        hunk = None  # File headers and anything else between hunks
+        if raw.startswith("+++ "):
+            path = raw[4:].strip()
+            path = path[2:] if path.startswith("b/") else path
+            continue
+        match = HUNK_HEADER.match(raw)
+        if match:
+            old_count, new_start, new_count = match.groups()
+            old_left = int(old_count) if old_count is not None else 1
+            new_left = int(new_count) if new_count is not None else 1
+            line_number = int(new_start)
+            hunk = CodeChunk(path, [], [], label=f"{path} @@{raw.split('@@')[1]}@@")
+            hunks.append(hunk)
+            removed = []
+    return [h for h in hunks if h.lines]
+
+
+def _hunk_tokens(hunk: CodeChunk, model: str) -> list[int]:
+    """Tokens per line of a hunk, including the removed lines shown before it."""
+    tokens = _line_tokens(hunk.lines, model)
+    for i, removed in hunk.removed.items():
+        cost = sum(_line_tokens(removed, model))
+        if i < len(tokens):
+            tokens[i] += cost
+        else:
+            tokens[-1] += cost  # Removed at the end of the hunk
+    return tokens
+
+
+def _split_hunk(hunk: CodeChunk, tokens: list[int], max_tokens: int) -> list[CodeChunk]:
+    """Split a hunk larger than max_tokens into consecutive parts."""
+    parts = []
+    for start, end in _split_range(1, len(hunk.lines), tokens, max_tokens):
+        part = CodeChunk(hunk.path, hunk.lines[start - 1:end], hunk.numbers[start - 1:end],
+                         removed={i - start + 1: r for i, r in hunk.removed.items() if start - 1 <= i < end})
+        if end == len(hunk.lines) and len(hunk.lines) in hunk.removed:
+            part.removed[len(part.lines)] = hunk.removed[len(hunk.lines)]
+        part.label = f"{hunk.path} lines {part.start_line}-{part.end_line}"
+        parts.append(part)
+    return parts
+
+
+def split_diff(diff: str, max_tokens: int = 3000, model: str = "gpt-4o-mini") -> list[CodeChunk]:
+    """
+    Split a unified diff into review chunks of whole hunks.
+
+    Lines carry new-file line numbers: added lines are prefixed with "+",
+    context lines with " ", and removed lines are shown unnumbered (and
+    count towards the budget). Small hunks of the same file are packed
+    together up to max_tokens; hunks larger than that are split by lines.
+    """
+    hunks: list[tuple[CodeChunk, int]] = []
+    for hunk in _parse_hunks(diff):
+        line_tokens = _hunk_tokens(hunk, model)
+        if sum(line_tokens) > max_tokens:
+            for part in _split_hunk(hunk, line_tokens, max_tokens):
+                hunks.append((part, sum(_hunk_tokens(part, model))))
+        else:
+            hunks.append((hunk, sum(line_tokens)))
+
+    chunks: list[CodeChunk] = []
+    used = 0
+    for hunk, tokens in hunks:
+        previous = chunks[-1] if chunks else None
+        if previous is not None and previous.path == hunk.path and used + tokens <= max_tokens:
+            offset = len(previous.lines)
+            previous.removed.update({offset + i: r for i, r in hunk.removed.items()})
+            previous.lines += hunk.lines
+            previous.numbers += hunk.numbers
+            previous.label = f"{hunk.path} lines {previous.start_line}-{hunk.end_line}"
+            used += tokens
+        else:
+            chunks.append(hunk)
+            used = tokens
+    return chunks
+
+
+# ============================================
+# Reviewing
+# ============================================
+
+class ChunkedReviewer:
+    """Reviews chunks concurrently and merges the results."""
+
+    def __init__(self, model: str = "gpt-4o-mini", async_client: AsyncOpenAI = None,
+                 max_chunk_tokens: int = 3000, max_concurrency: int = 8):
+        self.model = model
+        self.async_client = async_client or AsyncOpenAI()
+        self.max_chunk_tokens = max_chunk_tokens
+        self.max_concurrency = max_concurrency
+
+    def _chunk_prompt(self, chunk: CodeChunk, request: ReviewRequest, total_lines: int) -> str:
+        where = f"{chunk.path}, " if chunk.path else ""
+        return f"""You are an expert code reviewer. Review this excerpt of {request.language} code
+({where}lines {chunk.start_line}-{chunk.end_line} of {total_lines}).
+
+{REVIEW_PROMPTS[request.review_type]}
+
+{f"Context: {request.context}" if request.context else ""}
+
+Each line starts with its line number in the original file followed by "|".
+Report issues with those line numbers. Only report issues visible in this excerpt;
+code it references may be defined elsewhere in the file.
+
+CODE TO REVIEW:
+```{request.language}
+{chunk.numbered()}
+```
+
+Return a 1-10 score for this excerpt, the issues found and specific recommendations."""
+
+    async def review_chunk(self, chunk: CodeChunk, request: ReviewRequest, total_lines: int,
+                           semaphore: asyncio.Semaphore = None) -> ChunkReview:
+        """
+        Review a single chunk.
+
+        Args:
+            chunk: Lines to review, with their file line numbers
+            request: Language, review type and context (its code is not used)
+            total_lines: Length of the file the chunk comes from
+            semaphore: Limits concurrent requests when reviewing many chunks
+
+        Returns:
+            The chunk's review; on failure a ChunkReview with error set
+        """
+        async with semaphore or contextlib.nullcontext():
+            try:
+                response = await self.async_client.responses.create(
+                    model=self.model,
+                    input=self._chunk_prompt(chunk, request, total_lines),
+                    text={"format": {"type": "json_schema", "name": "code_review",
+                                     "schema": REVIEW_SCHEMA, "strict": True}},
+                )
+                data = json.loads(response.output_text)
+            except Exception as e:
+                print(f"  ⚠️  {chunk.label}: {type(e).__name__}: {e}")
+                return ChunkReview(chunk, error=f"{type(e).__name__}: {e}")
+
+        issues = [
+            ReviewIssue(issue["severity"], chunk.map_line(issue.get("line")), issue["description"], chunk.path)
+            for issue in data.get("issues", [])
+        ]
+        print(f"  ✅ {chunk.label}: {len(issues)} issues")
+        return ChunkReview(chunk, data.get("score"), issues, data.get("recommendations", []))
+
+    async def review_chunks(self, chunks: list[CodeChunk], request: ReviewRequest,
+                            total_lines: int) -> list[ChunkReview]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return list(await asyncio.gather(*(
+            self.review_chunk(chunk, request, total_lines, semaphore) for chunk in chunks
+        )))
+
+    async def review(self, request: ReviewRequest, path: str = "") -> str:
+        """Review a whole source file chunk by chunk."""
+        chunks = split_source(request.code, path, request.language, self.max_chunk_tokens, self.model)
+        print(f"🔍 Reviewing {len(request.code.splitlines())} lines in {len(chunks)} chunks...")
+        reviews = await self.review_chunks(chunks, request, len(request.code.splitlines()))
+        return merge_reviews(reviews)
+
+    async def review_diff(self, diff: str, language: str = "python",
+                          review_type: ReviewType = ReviewType.FULL, context: str = "") -> str:
+        """Review the changed hunks of a unified diff."""
+        chunks = split_diff(diff, self.max_chunk_tokens, self.model)
+        print(f"🔍 Reviewing {len(chunks)} diff chunks...")
+        request = ReviewRequest(code=diff, language=language, review_type=review_type,
+                                context=(context + "\nFocus on added lines (marked +).").strip())
+        reviews = await self.review_chunks(chunks, request, max((c.end_line for c in chunks), default=0))
+        return merge_reviews(reviews)
+
+
+def merge_reviews(reviews: list[ChunkReview], title: str = "Code Review Summary") -> str:
+    """Merge per-chunk reviews into one markdown report."""
+    scored = [r for r in reviews if r.score is not None]
+    weights = [len(r.chunk.lines) for r in scored]
+    score = round(sum(r.score * w for r, w in zip(scored, weights)) / sum(weights)) if scored else None
+
+    severity_order = list(SEVERITY_ICONS)
+    issues = sorted(
+        (issue for r in reviews for issue in r.issues),
+        key=lambda i: (severity_order.index(i.severity), i.path, i.line or 0),
+    )
+    seen, recommendations = set(), []
+    for r in reviews:
+        for rec in r.recommendations:
+            if rec.strip().lower() not in seen:
+                seen.add(rec.strip().lower())
+                recommendations.append(rec)
+
+    paths = {r.chunk.path for r in reviews}
+    lines = [f"## {title}", "", f"### Overall Score: {score if score is not None else '?'}/10"]
+    if len(reviews) > 1:
+        lines.append(f"Reviewed {len(reviews)} chunks ({sum(len(r.chunk.lines) for r in reviews)} lines) concurrently.")
+    lines += ["", "### Issues Found"]
+    for issue in issues:
+        location = []
+        if issue.path and len(paths) > 1:
+            location.append(issue.path)
+        if issue.line is not None:
+            location.append(f"line {issue.line}")
+        suffix = f" ({', '.join(location)})" if location else ""
+        lines.append(f"- {SEVERITY_ICONS[issue.severity]}: {issue.description}{suffix}")
+    if not issues:
+        lines.append("- No issues found")
+
+    failed = [r for r in reviews if r.error]
+    if failed:
+        lines += ["", "### Not Reviewed"]
+        lines += [f"- {' '.join(filter(None, (r.chunk.path, r.chunk.label)))}: {r.error}" for r in failed]
+
+    lines += ["", "### Recommendations"]
+    lines += [f"{i}. {rec}" for i, rec in enumerate(recommendations[:10], 1)]
+    return "\n".join(lines)
+
+
+async def main():
+    """Review a file (or a diff) in parallel chunks."""
+    parser = argparse.ArgumentParser(description="Chunked, parallel code review")
+    parser.add_argument("path", nargs="?", default=__file__, help="File to review ('-' for stdin)")
+    parser.add_argument("--diff", action="store_true", help="Input is a unified diff")
+    parser.add_argument("--language", default="python")
+    parser.add_argument("--type", default="full", choices=[t.value for t in ReviewType])
+    parser.add_argument("--chunk-tokens", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    source = sys.stdin.read() if args.path == "-" else open(args.path, encoding="utf-8").read()
+    reviewer = ChunkedReviewer(max_chunk_tokens=args.chunk_tokens, max_concurrency=args.concurrency)
+
+    started = time.perf_counter()
+    if args.diff:
+        report = await reviewer.review_diff(source, args.language, ReviewType(args.type))
+    else:
+        request = ReviewRequest(code=source, language=args.language, review_type=ReviewType(args.type))
+        report = await reviewer.review(request, path=args.path)
+    print(f"\n⏱️  {time.perf_counter() - started:.1f}s\n")
+    print(report)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,81 +4,38 @@ An AI agent that reviews code and provides constructive feedback.
 
 Analyzes code for bugs, style, performance, and security issues.
 """
+import asyncio
+import sys
+from pathlib import Path
 from openai import OpenAI
 from dotenv import load_dotenv
-from enum import Enum
-from dataclasses import dataclass
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "common"))
+from token_budget import TokenBudget, trim_lines
+from review_types import PROMPT_OVERHEAD_TOKENS, REVIEW_PROMPTS, SAMPLE_CODE, ReviewRequest, ReviewType
+from multi_focus import MultiFocusReviewer
 
 load_dotenv()
 
 client = OpenAI()
 
-
-class ReviewType(Enum):
-    FULL = "full"
-    SECURITY = "security"
-    PERFORMANCE = "performance"
-    STYLE = "style"
-    BUGS = "bugs"
-
-
-@dataclass
-class ReviewRequest:
-    """Code review request."""
-    code: str
-    language: str = "python"
-    review_type: ReviewType = ReviewType.FULL
-    context: str = ""  # Additional context about the code
-
-
-REVIEW_PROMPTS = {
-    ReviewType.FULL: """Perform a comprehensive code review covering:
-1. **Bugs & Logic Errors**: Identify potential bugs, edge cases, null/undefined issues
-2. **Security**: Check for vulnerabilities (injection, XSS, auth issues)
-3. **Performance**: Identify inefficiencies and optimization opportunities
-4. **Code Style**: Check naming conventions, formatting, readability
-5. **Best Practices**: Suggest patterns and improvements
-6. **Documentation**: Evaluate comments and documentation""",
-
-    ReviewType.SECURITY: """Focus specifically on security vulnerabilities:
-1. **Injection Attacks**: SQL, command, LDAP, XPath injection
-2. **Authentication/Authorization**: Weak auth, missing checks
-3. **Data Exposure**: Sensitive data logging, insecure storage
-4. **Input Validation**: Missing or weak validation
-5. **Cryptography**: Weak algorithms, hardcoded secrets
-6. **Dependencies**: Known vulnerable libraries""",
-
-    ReviewType.PERFORMANCE: """Focus specifically on performance:
-1. **Time Complexity**: O(n²) or worse algorithms
-2. **Memory Usage**: Memory leaks, excessive allocation
-3. **Database Queries**: N+1 problems, missing indexes
-4. **Caching**: Opportunities for caching
-5. **Concurrency**: Race conditions, deadlocks
-6. **I/O Operations**: Blocking operations, inefficient I/O""",
-
-    ReviewType.STYLE: """Focus specifically on code style:
-1. **Naming**: Clear, consistent naming conventions
-2. **Formatting**: Proper indentation, line length
-3. **Structure**: Function/class organization
-4. **Readability**: Complex expressions, magic numbers
-5. **Comments**: Appropriate, helpful comments
-6. **Consistency**: Consistent patterns throughout""",
-
-    ReviewType.BUGS: """Focus specifically on bug detection:
-1. **Logic Errors**: Incorrect conditions, off-by-one
-2. **Null/Undefined**: Null pointer issues
-3. **Type Errors**: Type mismatches
-4. **Edge Cases**: Empty arrays, boundary values
-5. **Error Handling**: Missing try/catch, swallowed exceptions
-6. **Race Conditions**: Concurrency bugs""",
-}
-
-
 class CodeReviewAgent:
     """Agent that reviews code and provides feedback."""
     
-    def __init__(self, model: str = "gpt-4o-mini"):
+    def __init__(self, model: str = "gpt-4o-mini", client: OpenAI = client,
+                 max_input_tokens: int = None):
         self.model = model
+        self.client = client  # Any client with responses.create(), e.g. CachedClient
+        self.budget = TokenBudget(model, max_input_tokens=max_input_tokens)
+    
+    def _fit_code(self, code: str) -> str:
+        """Trim code to whole lines that fit the input budget."""
+        limit = self.budget.limit - PROMPT_OVERHEAD_TOKENS
+        fitted, dropped = trim_lines(code, limit, self.model)
+        if dropped:
+            print(f"✂️  Code trimmed to {limit} tokens ({dropped} lines omitted)")
+            fitted += f"\n# ... ({dropped} more lines omitted to fit the context window)"
+        return fitted
     
     def review(self, request: ReviewRequest) -> str:
         """Review code and generate feedback."""
@@ -95,7 +52,7 @@ class CodeReviewAgent:
 
 CODE TO REVIEW:
 ```{request.language}
-{request.code}
+{self._fit_code(request.code)}
 ```
 
 Provide your review in this format:
@@ -118,7 +75,7 @@ Show fixed version of problematic sections with comments explaining changes.
 
 Be specific, constructive, and educational. Explain WHY each issue matters."""
 
-        response = client.responses.create(
+        response = self.client.responses.create(
             model=self.model,
             input=prompt,
         )
@@ -129,12 +86,12 @@ Be specific, constructive, and educational. Explain WHY each issue matters."""
         """Explain what code does."""
         print("📖 Generating code explanation...")
         
-        response = client.responses.create(
+        response = self.client.responses.create(
             model=self.model,
             input=f"""Explain this {language} code clearly:
 
 ```{language}
-{code}
+{self._fit_code(code)}
 ```
 
 Provide:
@@ -150,12 +107,12 @@ Provide:
         """Suggest test cases for code."""
         print("🧪 Generating test suggestions...")
         
-        response = client.responses.create(
+        response = self.client.responses.create(
             model=self.model,
             input=f"""Suggest test cases for this {language} code:
 
 ```{language}
-{code}
+{self._fit_code(code)}
 ```
 
 Provide:
@@ -168,35 +125,6 @@ Provide:
         return response.output_text
 
 
-# Sample code for demo
-SAMPLE_CODE = '''
-def get_user_data(user_id):
-    """Get user data from database."""
-    query = f"SELECT * FROM users WHERE id = {user_id}"
-    result = db.execute(query)
-    return result[0]
-
-def calculate_discount(price, discount):
-    return price - (price * discount / 100)
-
-def process_items(items):
-    processed = []
-    for i in range(len(items)):
-        item = items[i]
-        if item['status'] == 'active':
-            item['processed'] = True
-            processed.append(item)
-    return processed
-
-def send_notification(user, message):
-    try:
-        api.send(user.email, message)
-    except:
-        pass
-    return True
-'''
-
-
 def main():
     """Demo the code review agent."""
     agent = CodeReviewAgent()
@@ -208,24 +136,13 @@ def main():
     print(SAMPLE_CODE)
     print("="*50)
     
-    # Full review
-    print("\n\n--- FULL CODE REVIEW ---\n")
-    review = agent.review(ReviewRequest(
-        code=SAMPLE_CODE,
-        language="python",
-        review_type=ReviewType.FULL,
-        context="This is part of a web application backend"
-    ))
-    print(review)
-    
-    # Security-focused review
-    print("\n\n--- SECURITY REVIEW ---\n")
-    security_review = agent.review(ReviewRequest(
-        code=SAMPLE_CODE,
-        language="python",
-        review_type=ReviewType.SECURITY
-    ))
-    print(security_review)
+    # Full and security reviews in one pass: both share the cached code prefix
+    print("\n\n--- FULL + SECURITY REVIEW ---\n")
+    focuses = [ReviewType.FULL, ReviewType.SECURITY]
+    reviews = asyncio.run(MultiFocusReviewer(model=agent.model).review(
+        SAMPLE_CODE, focuses, "python", context="This is part of a web application backend"))
+    for review in reviews.values():
+        print(f"\n{review.to_markdown()}")
     
     # Test suggestions
     print("\n\n--- TEST SUGGESTIONS ---\n")
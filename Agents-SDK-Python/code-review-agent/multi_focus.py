@@ -0,0 +1,192 @@
+"""
+Code Review Agent - Multi-Focus Review
+Review the same code for several ReviewTypes in one pass.
+
+Every focus gets its own concurrent request, but all requests start with
+the same prefix (instructions + line-numbered code) and only differ in the
+focus instructions at the end. With a shared `prompt_cache_key` the API's
+prompt cache can reuse that prefix, so the code is only billed at the full
+input rate once. Each focus returns a structured result.
+
+Usage:
+    python multi_focus.py path/to/module.py --types full security bugs
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+from openai import AsyncOpenAI
+from review_types import PROMPT_OVERHEAD_TOKENS, REVIEW_PROMPTS, SAMPLE_CODE, ReviewType
+from chunked_review import REVIEW_SCHEMA, ChunkReview, CodeChunk, ReviewIssue, merge_reviews
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "common"))
+from token_budget import TokenBudget, trim_lines
+
+
+@dataclass
+class FocusReview:
+    """Structured review result for one ReviewType."""
+    review_type: ReviewType
+    chunk: CodeChunk  # The code as reviewed (after trimming to the budget)
+    score: Optional[int] = None
+    issues: list[ReviewIssue] = field(default_factory=list)
+    recommendations: list[str] = field(default_factory=list)
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    def to_markdown(self) -> str:
+        """Render in the same format as the chunked review reports."""
+        review = ChunkReview(self.chunk, self.score, self.issues, self.recommendations, self.error)
+        return merge_reviews([review], title=f"{self.review_type.value.title()} Review")
+
+
+class MultiFocusReviewer:
+    """Runs several review focuses concurrently over one shared, cacheable prefix."""
+
+    def __init__(self, model: str = "gpt-4o-mini", async_client: AsyncOpenAI = None,
+                 max_input_tokens: int = None, warm_first: bool = True):
+        """
+        Args:
+            model: Model used for every focus
+            async_client: Client for the requests (default: a new AsyncOpenAI)
+            max_input_tokens: Input budget; code beyond it is trimmed
+            warm_first: Finish the first focus before starting the others, so
+                they are guaranteed to hit the prompt cache. Lower cost for about
+                one extra request of latency; turn off when latency matters more
+        """
+        self.model = model
+        self.async_client = async_client or AsyncOpenAI()
+        self.budget = TokenBudget(model, max_input_tokens=max_input_tokens)
+        self.warm_first = warm_first
+
+    def _fit(self, code: str) -> tuple[CodeChunk, int]:
+        """(code that fits the budget as one chunk, lines dropped)."""
+        fitted, dropped = trim_lines(code, self.budget.limit - PROMPT_OVERHEAD_TOKENS, self.model)
+        lines = fitted.splitlines()
+        return CodeChunk("", lines, list(range(1, len(lines) + 1)), label=f"lines 1-{len(lines)}"), dropped
+
+    def shared_prefix(self, code: str, language: str = "python", context: str = "") -> str:
+        """Instructions and line-numbered code; identical for every focus."""
+        return self._prefix(*self._fit(code), language, context)
+
+    def _prefix(self, chunk: CodeChunk, dropped: int, language: str, context: str) -> str:
+        numbered = chunk.numbered()
+        if dropped:
+            numbered += f"\n# ... ({dropped} more lines omitted to fit the context window)"
+        return f"""You are an expert code reviewer. You will review this {language} code.
+{f"Context: {context}" if context else ""}
+Each line starts with its line number followed by "|". Report issues with those line numbers.
+
+CODE TO REVIEW:
+```{language}
+{numbered}
+```
+
+"""
+
+    def _focus_suffix(self, review_type: ReviewType) -> str:
+        return f"""REVIEW FOCUS ({review_type.value}):
+{REVIEW_PROMPTS[review_type]}
+
+Only report issues that belong to this focus. Return a 1-10 score, the issues found
+and specific recommendations. Be specific and explain why each issue matters."""
+
+    async def _review_focus(self, chunk: CodeChunk, prefix: str, review_type: ReviewType,
+                            cache_key: str) -> FocusReview:
+        started = time.perf_counter()
+        try:
+            response = await self.async_client.responses.create(
+                model=self.model,
+                input=prefix + self._focus_suffix(review_type),
+                text={"format": {"type": "json_schema", "name": "code_review",
+                                 "schema": REVIEW_SCHEMA, "strict": True}},
+                # Routes requests with the same prefix to the same prompt cache
+                extra_body={"prompt_cache_key": cache_key},
+            )
+            data = json.loads(response.output_text)
+        except Exception as e:
+            print(f"  ⚠️  {review_type.value}: {type(e).__name__}: {e}")
+            return FocusReview(review_type, chunk, error=f"{type(e).__name__}: {e}",
+                               seconds=time.perf_counter() - started)
+
+        usage = getattr(response, "usage", None)
+        details = getattr(usage, "input_tokens_details", None)
+        review = FocusReview(
+            review_type,
+            chunk,
+            score=data["score"],
+            issues=[ReviewIssue(i["severity"], i["line"], i["description"]) for i in data["issues"]],
+            recommendations=data["recommendations"],
+            input_tokens=getattr(usage, "input_tokens", 0) or 0,
+            cached_tokens=getattr(details, "cached_tokens", 0) or 0,
+            seconds=time.perf_counter() - started,
+        )
+        print(f"  ✅ {review_type.value}: {len(review.issues)} issues "
+              f"({review.cached_tokens}/{review.input_tokens} input tokens cached)")
+        return review
+
+    async def review(self, code: str, review_types: Iterable[ReviewType],
+                     language: str = "python", context: str = "") -> dict[ReviewType, FocusReview]:
+        """
+        Review code for every requested focus.
+
+        Args:
+            code: Source code to review
+            review_types: Focuses to run (duplicates are ignored)
+            language: Programming language of the code
+            context: Additional context about the code
+
+        Returns:
+            Results keyed by ReviewType, in the order requested
+        """
+        review_types = list(dict.fromkeys(review_types))
+        chunk, dropped = self._fit(code)
+        prefix = self._prefix(chunk, dropped, language, context)
+        cache_key = "code-review-" + hashlib.sha256(f"{self.model}\n{prefix}".encode()).hexdigest()[:16]
+        print(f"🔍 Reviewing {language} code for {', '.join(t.value for t in review_types)}...")
+
+        results: list[FocusReview] = []
+        remaining = review_types
+        if self.warm_first and len(review_types) > 1:
+            results.append(await self._review_focus(chunk, prefix, review_types[0], cache_key))
+            remaining = review_types[1:]
+        results += await asyncio.gather(*(self._review_focus(chunk, prefix, t, cache_key) for t in remaining))
+        return {r.review_type: r for r in results}
+
+
+async def main():
+    """Review a file for several focuses at once."""
+    parser = argparse.ArgumentParser(description="Multi-focus code review")
+    parser.add_argument("path", nargs="?", help="File to review (default: built-in sample)")
+    parser.add_argument("--language", default="python")
+    parser.add_argument("--types", nargs="+", default=["full", "security", "bugs"],
+                        choices=[t.value for t in ReviewType])
+    parser.add_argument("--no-warm-first", dest="warm_first", action="store_false",
+                        help="Start all focuses at once instead of priming the prompt cache with the first")
+    args = parser.parse_args()
+
+    code = open(args.path, encoding="utf-8").read() if args.path else SAMPLE_CODE
+    reviewer = MultiFocusReviewer(warm_first=args.warm_first)
+
+    started = time.perf_counter()
+    results = await reviewer.review(code, [ReviewType(t) for t in args.types], args.language,
+                                    context="This is part of a web application backend")
+    elapsed = time.perf_counter() - started
+
+    for result in results.values():
+        print(f"\n{result.to_markdown()}")
+
+    cached = sum(r.cached_tokens for r in results.values())
+    total = sum(r.input_tokens for r in results.values())
+    print(f"\n⏱️  {len(results)} focuses in {elapsed:.1f}s, {cached}/{total} input tokens served from cache")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,342 @@
+"""
+Code Review Agent - Incremental Repository Review
+Review whole repositories, re-reviewing only what changed since the last run.
+
+Files are split into function/class units (see chunked_review.py) and every
+unit is hashed on its own, before units are packed into requests, so an edit
+only invalidates the unit it touches. Review results are stored in a local
+SQLite index keyed by unit hash + ReviewType + model + context (+ the review
+prompt), so unchanged units are served from the index and only new or edited
+units are sent to the model, packed together up to the chunk budget. A
+second table maps whole-file hashes to their units, so unchanged files are
+not even re-split.
+
+Issue line numbers are stored relative to their unit and rebased on load,
+which keeps them correct when code above a unit moves.
+
+Usage:
+    python repo_review.py path/to/repo --type security
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+from review_types import REVIEW_PROMPTS, ReviewRequest, ReviewType
+from chunked_review import ChunkedReviewer, ChunkReview, CodeChunk, ReviewIssue, merge_reviews, split_units
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "common"))
+from token_budget import count_tokens
+
+LANGUAGES = {
+    ".py": "python", ".js": "javascript", ".jsx": "javascript", ".ts": "typescript",
+    ".tsx": "typescript", ".go": "go", ".rs": "rust", ".java": "java", ".kt": "kotlin",
+    ".rb": "ruby", ".php": "php", ".cs": "csharp", ".c": "c", ".h": "c", ".cpp": "cpp",
+    ".swift": "swift", ".sh": "bash", ".sql": "sql",
+}
+EXCLUDED_DIRS = {".git", ".hg", ".venv", "venv", "env", "node_modules", "__pycache__",
+                 "dist", "build", ".mypy_cache", ".pytest_cache", ".tox"}
+MAX_FILE_BYTES = 512 * 1024  # Larger files are usually generated or vendored
+
+
+def _sha256(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def iter_source_files(root: Path, max_bytes: int = MAX_FILE_BYTES) -> Iterator[tuple[Path, str]]:
+    """Yield (path, language) for reviewable files under root, in a stable order."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_DIRS and not d.startswith("."))
+        for name in sorted(filenames):
+            path = Path(dirpath) / name
+            language = LANGUAGES.get(path.suffix.lower())
+            if language and path.stat().st_size <= max_bytes:
+                yield path, language
+
+
+@dataclass
+class RepoReviewStats:
+    """What a repository review reused and what it sent to the model."""
+    files: int = 0
+    files_unchanged: int = 0
+    units: int = 0
+    units_cached: int = 0
+    units_reviewed: int = 0
+    units_failed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.units_cached / self.units if self.units else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.files} files ({self.files_unchanged} unchanged), {self.units} units: "
+                f"{self.units_cached} from index, {self.units_reviewed} reviewed, "
+                f"{self.units_failed} failed ({self.hit_rate:.0%} hit rate) in {self.seconds:.1f}s")
+
+
+class ReviewIndex:
+    """SQLite index of unit reviews and file-to-unit layouts."""
+
+    def __init__(self, path: str = ".review_index.db"):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS units ("
+            " key TEXT PRIMARY KEY, score INTEGER, issues TEXT NOT NULL,"
+            " recommendations TEXT NOT NULL, reviewed_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " key TEXT PRIMARY KEY, units TEXT NOT NULL, used_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get_units(self, keys: list[str]) -> dict[str, dict]:
+        """Look up stored reviews; returns only the keys that were found."""
+        found = {}
+        for i in range(0, len(keys), 500):  # Stay under SQLite's parameter limit
+            batch = keys[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT key, score, issues, recommendations FROM units"
+                f" WHERE key IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+            for key, score, issues, recommendations in rows:
+                found[key] = {"score": score, "issues": json.loads(issues),
+                              "recommendations": json.loads(recommendations)}
+        if found:
+            now = time.time()
+            self.conn.executemany("UPDATE units SET used_at = ? WHERE key = ?",
+                                  [(now, key) for key in found])
+        return found
+
+    def put_unit(self, key: str, score: Optional[int], issues: list[dict], recommendations: list[str]):
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO units (key, score, issues, recommendations, reviewed_at, used_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (key, score, json.dumps(issues), json.dumps(recommendations), now, now),
+        )
+
+    def get_layout(self, key: str) -> Optional[list[list]]:
+        row = self.conn.execute("SELECT units FROM files WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.conn.execute("UPDATE files SET used_at = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put_layout(self, key: str, layout: list[list]):
+        self.conn.execute("INSERT OR REPLACE INTO files (key, units, used_at) VALUES (?, ?, ?)",
+                          (key, json.dumps(layout), time.time()))
+
+    def prune(self, older_than_days: float = 30.0) -> int:
+        """Drop entries not used for a while; returns the number of units removed."""
+        cutoff = time.time() - older_than_days * 86400
+        removed = self.conn.execute("DELETE FROM units WHERE used_at < ?", (cutoff,)).rowcount
+        self.conn.execute("DELETE FROM files WHERE used_at < ?", (cutoff,))
+        self.conn.commit()
+        return removed
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class RepoReviewer:
+    """Reviews a repository tree, reusing stored reviews for unchanged units."""
+
+    def __init__(self, index: ReviewIndex = None, reviewer: ChunkedReviewer = None):
+        self.index = index or ReviewIndex()
+        self.reviewer = reviewer or ChunkedReviewer()
+
+    def _unit_key(self, chunk: CodeChunk, language: str, review_type: ReviewType, context: str) -> str:
+        return _sha256("unit", self.reviewer.model, review_type.value, REVIEW_PROMPTS[review_type],
+                       context, language, "\n".join(chunk.lines))
+
+    def _file_key(self, source: str, language: str, review_type: ReviewType, context: str) -> str:
+        return _sha256("file", self.reviewer.model, review_type.value, REVIEW_PROMPTS[review_type],
+                       context, language, str(self.reviewer.max_chunk_tokens), source)
+
+    def _units(self, path: str, source: str, language: str, review_type: ReviewType,
+               context: str, stats: RepoReviewStats) -> list[tuple[CodeChunk, str]]:
+        """(unit, unit key) pairs for a file, reusing the stored layout if the file is unchanged."""
+        file_key = self._file_key(source, language, review_type, context)
+        layout = self.index.get_layout(file_key)
+        lines = source.splitlines()
+        if layout is not None:
+            stats.files_unchanged += 1
+            return [
+                (CodeChunk(path, lines[start - 1:end], list(range(start, end + 1)),
+                           label=f"lines {start}-{end}"), key)
+                for start, end, key in layout
+            ]
+
+        chunks = split_units(source, path, language, self.reviewer.max_chunk_tokens, self.reviewer.model)
+        units = [(chunk, self._unit_key(chunk, language, review_type, context)) for chunk in chunks]
+        self.index.put_layout(file_key, [[c.start_line, c.end_line, key] for c, key in units])
+        return units
+
+    def _pack(self, units: list[CodeChunk]) -> list[list[CodeChunk]]:
+        """Group a file's units to review into requests of at most max_chunk_tokens."""
+        groups, used = [], 0
+        for unit in units:
+            tokens = count_tokens("\n".join(unit.lines), self.reviewer.model)
+            if groups and used + tokens <= self.reviewer.max_chunk_tokens:
+                groups[-1].append(unit)
+                used += tokens
+            else:
+                groups.append([unit])
+                used = tokens
+        return groups
+
+    @staticmethod
+    def _merge(units: list[CodeChunk]) -> CodeChunk:
+        """One chunk holding several units (gaps between them are shown as "...")."""
+        if len(units) == 1:
+            return units[0]
+        label = ", ".join(unit.label for unit in units)
+        return CodeChunk(units[0].path, [line for unit in units for line in unit.lines],
+                         [number for unit in units for number in unit.numbers], label=label)
+
+    @staticmethod
+    def _split(review: ChunkReview, units: list[CodeChunk]) -> list[ChunkReview]:
+        """Per-unit reviews from the review of merged units: each issue goes to the unit holding its line."""
+        if len(units) == 1:
+            return [review]
+        if review.error:
+            return [ChunkReview(unit, error=review.error) for unit in units]
+        parts = [ChunkReview(unit, review.score, [], review.recommendations) for unit in units]
+        for issue in review.issues:
+            owner = next((part for part in parts
+                          if issue.line is not None and part.chunk.start_line <= issue.line <= part.chunk.end_line),
+                         parts[0])
+            owner.issues.append(issue)
+        return parts
+
+    @staticmethod
+    def _from_index(chunk: CodeChunk, stored: dict) -> ChunkReview:
+        """Rebuild a ChunkReview, rebasing unit-relative lines onto the chunk's position."""
+        issues = [
+            ReviewIssue(i["severity"], None if i["line"] is None else chunk.start_line + i["line"] - 1,
+                        i["description"], chunk.path)
+            for i in stored["issues"]
+        ]
+        return ChunkReview(chunk, stored["score"], issues, stored["recommendations"])
+
+    def _store(self, key: str, review: ChunkReview):
+        issues = [
+            {"severity": i.severity, "description": i.description,
+             "line": None if i.line is None else i.line - review.chunk.start_line + 1}
+            for i in review.issues
+        ]
+        self.index.put_unit(key, review.score, issues, review.recommendations)
+
+    async def review(self, root: str, review_type: ReviewType = ReviewType.FULL,
+                     context: str = "") -> tuple[str, RepoReviewStats]:
+        """
+        Review every source file under root.
+
+        Args:
+            root: Repository directory
+            review_type: Focus of the review
+            context: Additional context passed to every chunk review
+
+        Returns:
+            (merged markdown report, cache statistics)
+        """
+        started = time.perf_counter()
+        stats = RepoReviewStats()
+        root_path = Path(root)
+
+        reviews: dict[int, ChunkReview] = {}
+        # Requests to send: (unit positions, unit keys, units, request, file length)
+        pending: list[tuple[list[int], list[str], list[CodeChunk], ReviewRequest, int]] = []
+        position = 0
+        for path, language in iter_source_files(root_path):
+            try:
+                source = path.read_text(encoding="utf-8")
+            except UnicodeDecodeError:
+                continue
+            stats.files += 1
+            rel = path.relative_to(root_path).as_posix()
+            units = self._units(rel, source, language, review_type, context, stats)
+            stored = self.index.get_units([key for _, key in units])
+            request = ReviewRequest(code="", language=language, review_type=review_type, context=context)
+            changed = {}  # Position -> (unit, key)
+            for chunk, key in units:
+                if key in stored:
+                    reviews[position] = self._from_index(chunk, stored[key])
+                    stats.units_cached += 1
+                else:
+                    changed[position] = (chunk, key)
+                position += 1
+            positions = iter(changed)
+            for group in self._pack([chunk for chunk, _ in changed.values()]):
+                group_positions = [next(positions) for _ in group]
+                pending.append((group_positions, [changed[p][1] for p in group_positions], group,
+                                request, len(source.splitlines())))
+        stats.units = position
+        self.index.commit()
+
+        to_review = sum(len(units) for _, _, units, _, _ in pending)
+        print(f"🔍 {stats.files} files, {stats.units} units: "
+              f"{stats.units_cached} unchanged, {to_review} to review in {len(pending)} requests")
+
+        semaphore = asyncio.Semaphore(self.reviewer.max_concurrency)
+        results = await asyncio.gather(*(
+            self.reviewer.review_chunk(self._merge(units), request, total_lines, semaphore)
+            for _, _, units, request, total_lines in pending
+        ))
+        for (group_positions, keys, units, _, _), merged in zip(pending, results):
+            for pos, key, review in zip(group_positions, keys, self._split(merged, units)):
+                reviews[pos] = review
+                if review.error:
+                    stats.units_failed += 1  # Not stored, so it is retried next run
+                else:
+                    self._store(key, review)
+                    stats.units_reviewed += 1
+        self.index.commit()
+
+        stats.seconds = time.perf_counter() - started
+        report = merge_reviews([reviews[i] for i in range(position)]) if position else "No source files found."
+        return report, stats
+
+
+async def main():
+    """Review a repository incrementally."""
+    parser = argparse.ArgumentParser(description="Incremental repository code review")
+    parser.add_argument("root", nargs="?", default=".", help="Repository to review")
+    parser.add_argument("--type", default="full", choices=[t.value for t in ReviewType])
+    parser.add_argument("--index", default=".review_index.db", help="Review index database")
+    parser.add_argument("--chunk-tokens", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--prune-days", type=float, help="Drop index entries unused for this many days")
+    args = parser.parse_args()
+
+    index = ReviewIndex(args.index)
+    if args.prune_days is not None:
+        print(f"🧹 Pruned {index.prune(args.prune_days)} stale units")
+
+    reviewer = RepoReviewer(index, ChunkedReviewer(max_chunk_tokens=args.chunk_tokens,
+                                                   max_concurrency=args.concurrency))
+    report, stats = await reviewer.review(args.root, ReviewType(args.type))
+    index.close()
+
+    print(f"\n{report}")
+    print(f"\n📊 {stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Code Review Agent - Review Types
+Review focuses, requests and prompts shared by the review tools.
+
+Has no import side effects (no client, no environment loading), so any of
+the tools can import it, including each other.
+"""
+from enum import Enum
+from dataclasses import dataclass
+
+# Tokens reserved for the review instructions wrapped around the code
+PROMPT_OVERHEAD_TOKENS = 1500
+
+
+class ReviewType(Enum):
+    FULL = "full"
+    SECURITY = "security"
+    PERFORMANCE = "performance"
+    STYLE = "style"
+    BUGS = "bugs"
+
+
+@dataclass
+class ReviewRequest:
+    """Code review request."""
+    code: str
+    language: str = "python"
+    review_type: ReviewType = ReviewType.FULL
+    context: str = ""  # Additional context about the code
+
+
+REVIEW_PROMPTS = {
+    ReviewType.FULL: """Perform a comprehensive code review covering:
+1. **Bugs & Logic Errors**: Identify potential bugs, edge cases, null/undefined issues
+2. **Security**: Check for vulnerabilities (injection, XSS, auth issues)
+3. **Performance**: Identify inefficiencies and optimization opportunities
+4. **Code Style**: Check naming conventions, formatting, readability
+5. **Best Practices**: Suggest patterns and improvements
+6. **Documentation**: Evaluate comments and documentation""",
+
+    ReviewType.SECURITY: """Focus specifically on security vulnerabilities:
+1. **Injection Attacks**: SQL, command, LDAP, XPath injection
+2. **Authentication/Authorization**: Weak auth, missing checks
+3. **Data Exposure**: Sensitive data logging, insecure storage
+4. **Input Validation**: Missing or weak validation
+5. **Cryptography**: Weak algorithms, hardcoded secrets
+6. **Dependencies**: Known vulnerable libraries""",
+
+    ReviewType.PERFORMANCE: """Focus specifically on performance:
+1. **Time Complexity**: O(n²) or worse algorithms
+2. **Memory Usage**: Memory leaks, excessive allocation
+3. **Database Queries**: N+1 problems, missing indexes
+4. **Caching**: Opportunities for caching
+5. **Concurrency**: Race conditions, deadlocks
+6. **I/O Operations**: Blocking operations, inefficient I/O""",
+
+    ReviewType.STYLE: """Focus specifically on code style:
+1. **Naming**: Clear, consistent naming conventions
+2. **Formatting**: Proper indentation, line length
+3. **Structure**: Function/class organization
+4. **Readability**: Complex expressions, magic numbers
+5. **Comments**: Appropriate, helpful comments
+6. **Consistency**: Consistent patterns throughout""",
+
+    ReviewType.BUGS: """Focus specifically on bug detection:
+1. **Logic Errors**: Incorrect conditions, off-by-one
+2. **Null/Undefined**: Null pointer issues
+3. **Type Errors**: Type mismatches
+4. **Edge Cases**: Empty arrays, boundary values
+5. **Error Handling**: Missing try/catch, swallowed exceptions
+6. **Race Conditions**: Concurrency bugs""",
+}
+
+
+# Sample code for demo
+SAMPLE_CODE = '''
+def get_user_data(user_id):
+    """Get user data from database."""
+    query = f"SELECT * FROM users WHERE id = {user_id}"
+    result = db.execute(query)
+    return result[0]
+
+def calculate_discount(price, discount):
+    return price - (price * discount / 100)
+
+def process_items(items):
+    processed = []
+    for i in range(len(items)):
+        item = items[i]
+        if item['status'] == 'active':
+            item['processed'] = True
+            processed.append(item)
+    return processed
+
+def send_notification(user, message):
+    try:
+        api.send(user.email, message)
+    except:
+        pass
+    return True
+'''
@@ -0,0 +1,302 @@
+"""
+Routing Cache
+Reuse earlier routing decisions for repeated and near-duplicate requests.
+
+Support traffic repeats itself ("upgrade to Pro", "how much is enterprise"),
+and every repeat pays for a triage turn that picks the same specialist.
+The cache remembers which agent handled a request:
+
+1. exact    - hash of the normalized text (case, Unicode and whitespace folded)
+2. semantic - nearest neighbour of a local hashed bag-of-words embedding in
+              an in-process vector index (exact search while small, IVF
+              over NumPy arrays once it grows)
+
+A semantic hit needs a similarity of at least `min_similarity`, and the best
+neighbour with a different route must trail by `min_margin`, so requests
+that sit between two intents still go to the model. Entries are evicted
+least-recently-used. Lookups take tens of microseconds.
+"""
+import hashlib
+import re
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by can could do does did for from had has have how i i'm im in is it its "
+    "me my of on or our please so that the their them there this to us was we what when where which "
+    "who why will with would you your".split()
+)
+STEM_CHARS = 5
+
+
+def normalize(text: str) -> str:
+    """Canonical form for exact matching: Unicode-normalized, case-folded, whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(normalize(text).encode("utf-8")).hexdigest()
+
+
+class HashingEmbedder:
+    """
+    Deterministic local text embedding.
+
+    Content words, word prefixes (cheap stems) and word bigrams are hashed
+    into `dim` signed buckets and L2-normalized, so cosine similarity is a
+    dot product. No model or vocabulary is needed.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def features(self, text: str) -> list[str]:
+        words = [w for w in TOKEN_RE.findall(normalize(text)) if w not in STOPWORDS]
+        feats = list(words)
+        feats += [f"{w[:STEM_CHARS]}~" for w in words if len(w) > STEM_CHARS]
+        feats += [f"{a} {b}" for a, b in zip(words, words[1:])]
+        return feats
+
+    def __call__(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for feat in self.features(text):
+            h = zlib.crc32(feat.encode("utf-8"))
+            vec[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+
+class VectorIndex:
+    """
+    Cosine nearest-neighbour search over unit vectors in fixed slots.
+
+    Below `ivf_min` vectors the search is one matrix-vector product. Beyond
+    it, vectors are clustered with spherical k-means (an IVF index) and only
+    the `nprobe` closest clusters are searched; the clustering is retrained
+    whenever the index has doubled since the last training.
+    """
+
+    def __init__(self, dim: int, capacity: int, ivf_min: int = 4096, nprobe: int = 8, seed: int = 0):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.used = np.zeros(capacity, dtype=bool)
+        self._free = list(range(capacity - 1, -1, -1))  # Pop lowest slots first
+        self._high = 0  # Slots at or above this have never been used
+        self.count = 0
+        self.ivf_min = ivf_min
+        self.nprobe = nprobe
+        self._rng = np.random.default_rng(seed)
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: list[list[int]] = []
+        self._arrays: dict[int, np.ndarray] = {}  # Cluster -> slots as an array, rebuilt after changes
+        self._cluster = np.full(capacity, -1, dtype=np.int64)
+        self._trained_count = 0
+
+    def add(self, vector: np.ndarray) -> int:
+        slot = self._free.pop()
+        self.vectors[slot] = vector
+        self.used[slot] = True
+        self._high = max(self._high, slot + 1)
+        self.count += 1
+        if self.centroids is not None:
+            cluster = int(np.argmax(self.centroids @ vector))
+            self._cluster[slot] = cluster
+            self._lists[cluster].append(slot)
+            self._arrays.pop(cluster, None)
+        if self.count >= self.ivf_min and self.count >= 2 * self._trained_count:
+            self._train()
+        return slot
+
+    def remove(self, slot: int):
+        if not self.used[slot]:
+            return
+        self.used[slot] = False
+        self.count -= 1
+        cluster = int(self._cluster[slot])
+        if cluster >= 0:
+            self._lists[cluster].remove(slot)
+            self._arrays.pop(cluster, None)
+            self._cluster[slot] = -1
+        self._free.append(slot)
+
+    def _train(self, iterations: int = 8):
+        slots = np.flatnonzero(self.used[:self._high])
+        data = self.vectors[slots]
+        k = max(1, int(np.sqrt(len(slots))))
+        centroids = data[self._rng.choice(len(slots), k, replace=False)]
+        for _ in range(iterations):
+            assign = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, data)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            sums[empty] = data[self._rng.choice(len(slots), int(empty.sum()))]  # Re-seed empty clusters
+            norms[empty] = 1.0
+            centroids = sums / norms
+        self.centroids = centroids
+        self._cluster[:] = -1
+        self._cluster[slots] = assign
+        self._lists = [[] for _ in range(k)]
+        self._arrays = {}
+        for slot, cluster in zip(slots.tolist(), assign.tolist()):
+            self._lists[cluster].append(slot)
+        self._trained_count = len(slots)
+
+    def _slots(self, cluster: int) -> np.ndarray:
+        slots = self._arrays.get(cluster)
+        if slots is None:
+            slots = self._arrays[cluster] = np.array(self._lists[cluster], dtype=np.int64)
+        return slots
+
+    def search(self, vector: np.ndarray, k: int = 5) -> list[tuple[int, float]]:
+        """Up to k (slot, cosine similarity) pairs, most similar first."""
+        if self.count == 0:
+            return []
+        if self.centroids is None:
+            candidates = None
+            sims = self.vectors[:self._high] @ vector
+            sims[~self.used[:self._high]] = -np.inf
+        else:
+            nprobe = min(self.nprobe, len(self.centroids))
+            probe = np.argpartition(-(self.centroids @ vector), nprobe - 1)[:nprobe]
+            candidates = np.concatenate([self._slots(int(c)) for c in probe])
+            if not len(candidates):
+                return []
+            sims = self.vectors[candidates] @ vector
+        k = min(k, len(sims))
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top])]
+        slots = top if candidates is None else candidates[top]
+        return [(int(slot), float(sims[i])) for slot, i in zip(slots, top) if np.isfinite(sims[i])]
+
+
+@dataclass
+class RouteEntry:
+    route: str
+    text: str
+    slot: int
+    meta: dict = field(default_factory=dict)
+    hits: int = 0
+
+
+@dataclass
+class RouteHit:
+    """A cached routing decision."""
+    route: str
+    kind: str  # "exact" or "semantic"
+    similarity: float
+    matched_text: str
+    seconds: float
+    meta: dict = field(default_factory=dict)  # Whatever was stored with the route
+
+
+@dataclass
+class RoutingCacheStats:
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    ambiguous: int = 0  # Similar enough, but too close to another route
+    misses: int = 0
+    evictions: int = 0
+    lookup_seconds: float = 0.0
+
+    @property
+    def lookups(self) -> int:
+        return self.exact_hits + self.semantic_hits + self.ambiguous + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.exact_hits + self.semantic_hits) / self.lookups if self.lookups else 0.0
+
+    def __str__(self) -> str:
+        mean_us = self.lookup_seconds / self.lookups * 1e6 if self.lookups else 0.0
+        return (f"{self.lookups} lookups: {self.exact_hits} exact, {self.semantic_hits} semantic, "
+                f"{self.ambiguous} ambiguous, {self.misses} misses ({self.hit_rate:.0%} hit rate, "
+                f"{mean_us:.0f} µs mean), {self.evictions} evicted")
+
+
+class RoutingCache:
+    """LRU cache of routing decisions with exact and near-duplicate matching."""
+
+    def __init__(self, max_entries: int = 10_000, min_similarity: float = 0.7, min_margin: float = 0.1,
+                 embed: Callable[[str], np.ndarray] = None, dim: int = 512):
+        """
+        Args:
+            max_entries: Entries kept before the least recently used is evicted
+            min_similarity: Cosine similarity needed for a semantic hit
+            min_margin: How far the best neighbour with a different route must trail
+            embed: Text -> unit vector (default: HashingEmbedder(dim))
+            dim: Embedding size (ignored when `embed` is given; inferred from it)
+        """
+        self.embed = embed or HashingEmbedder(dim)
+        dim = len(self.embed("dimension probe"))
+        self.max_entries = max_entries
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.index = VectorIndex(dim, max_entries)
+        self._entries: OrderedDict[str, RouteEntry] = OrderedDict()  # text key -> entry
+        self._by_slot: dict[int, str] = {}
+        self.stats = RoutingCacheStats()
+
+    def lookup(self, text: str) -> Optional[RouteHit]:
+        """Cached route for the text, or None."""
+        started = time.perf_counter()
+        hit = self._lookup(text)
+        seconds = time.perf_counter() - started
+        self.stats.lookup_seconds += seconds
+        if hit:
+            hit.seconds = seconds
+        return hit
+
+    def _lookup(self, text: str) -> Optional[RouteHit]:
+        key = text_key(text)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._touch(key, entry)
+            self.stats.exact_hits += 1
+            return RouteHit(entry.route, "exact", 1.0, entry.text, 0.0, entry.meta)
+
+        neighbours = self.index.search(self.embed(text))
+        if not neighbours or neighbours[0][1] < self.min_similarity:
+            self.stats.misses += 1
+            return None
+        best_slot, similarity = neighbours[0]
+        best_key = self._by_slot[best_slot]
+        best = self._entries[best_key]
+        rival = next((sim for slot, sim in neighbours[1:]
+                      if self._entries[self._by_slot[slot]].route != best.route), -1.0)
+        if similarity - rival < self.min_margin:
+            self.stats.ambiguous += 1
+            return None
+        self._touch(best_key, best)
+        self.stats.semantic_hits += 1
+        return RouteHit(best.route, "semantic", similarity, best.text, 0.0, best.meta)
+
+    def store(self, text: str, route: str, meta: dict = None):
+        """Remember that this text was routed to `route` (with optional details, e.g. a classification)."""
+        key = text_key(text)
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.route = route
+            entry.meta = meta or {}
+            self._entries.move_to_end(key)
+            return
+        if len(self._entries) >= self.max_entries:
+            old_key, old = self._entries.popitem(last=False)
+            self.index.remove(old.slot)
+            del self._by_slot[old.slot]
+            self.stats.evictions += 1
+        slot = self.index.add(self.embed(text))
+        self._entries[key] = RouteEntry(route, text, slot, meta or {})
+        self._by_slot[slot] = key
+
+    def _touch(self, key: str, entry: RouteEntry):
+        entry.hits += 1
+        self._entries.move_to_end(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
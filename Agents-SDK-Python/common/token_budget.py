@@ -0,0 +1,233 @@
+"""
+Token Budget
+Count tokens locally and keep prompts inside a model's context window.
+
+Uses tiktoken when it is installed and its vocabulary can be loaded (the
+encoding is cached per model; tiktoken caches the vocabulary file on disk,
+see TIKTOKEN_CACHE_DIR). Otherwise falls back to a fast regex-based
+approximation that errs on the high side (also for digits and CJK text),
+so budgets stay on the safe side.
+
+Trimming and chunking are deterministic: the same input and budget always
+produce the same output.
+"""
+import math
+import re
+from functools import lru_cache
+from typing import Optional
+
+try:
+    import tiktoken
+except ImportError:  # Optional dependency
+    tiktoken = None
+
+
+# Context windows (input + output tokens) for models used in the templates
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4o-mini": 128_000,
+    "gpt-4o": 128_000,
+    "gpt-4.1": 1_047_576,
+    "gpt-4.1-mini": 1_047_576,
+    "gpt-4.1-nano": 1_047_576,
+    "gpt-5": 400_000,
+    "gpt-5-mini": 400_000,
+    "o4-mini": 200_000,
+}
+DEFAULT_CONTEXT_WINDOW = 128_000
+
+_APPROX_PIECES = re.compile(r"\d+|[^\W\d]+|[^\w\s]", re.UNICODE)
+# CJK ideographs, kana and Hangul: about one token per character
+_WIDE_CHARS = re.compile(r"[\u1100-\u11ff\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+
+
+class TokenBudgetExceeded(ValueError):
+    """Raised when a prompt cannot fit into the model's input budget."""
+
+    def __init__(self, tokens: int, limit: int, model: str):
+        super().__init__(f"Prompt needs ~{tokens} tokens but {model} allows {limit}")
+        self.tokens = tokens
+        self.limit = limit
+        self.model = model
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    """Load (once per model) the tiktoken encoding, or None if unavailable."""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # Vocabulary download failed (offline) - use the approximation
+        return None
+
+
+def approximate_tokens(text: str) -> int:
+    """
+    Fast approximation, meant to over-count: ASCII words cost 1 token per 4
+    characters, digits 1 per 3, CJK/kana/Hangul characters 1 each, other
+    non-ASCII letters 1 per 2 characters, and punctuation 1 each.
+    """
+    tokens = 0
+    for piece in _APPROX_PIECES.findall(text):
+        if piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif piece.isascii():
+            tokens += math.ceil(len(piece) / 4)
+        else:
+            wide = len(_WIDE_CHARS.findall(piece))
+            tokens += wide + math.ceil((len(piece) - wide) / 2)
+    return tokens
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Count tokens in text for a model."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return approximate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def context_window(model: str) -> int:
+    # Dated snapshots (gpt-4o-mini-2024-07-18) share their base model's window
+    for name in sorted(MODEL_CONTEXT_WINDOWS, key=len, reverse=True):
+        if model == name or model.startswith(name + "-"):
+            return MODEL_CONTEXT_WINDOWS[name]
+    return DEFAULT_CONTEXT_WINDOW
+
+
+class TokenBudget:
+    """Input token budget for one model."""
+
+    def __init__(self, model: str = "gpt-4o-mini", max_input_tokens: Optional[int] = None,
+                 reserve_output: int = 4096):
+        self.model = model
+        self.limit = max_input_tokens or context_window(model) - reserve_output
+
+    def count(self, text: str) -> int:
+        return count_tokens(text, self.model)
+
+    def fits(self, *texts: str) -> bool:
+        return sum(self.count(t) for t in texts) <= self.limit
+
+    def remaining(self, *texts: str) -> int:
+        """Tokens left after the given texts (never negative)."""
+        return max(0, self.limit - sum(self.count(t) for t in texts))
+
+    def check(self, text: str) -> int:
+        """Return the token count, raising TokenBudgetExceeded if text doesn't fit."""
+        tokens = self.count(text)
+        if tokens > self.limit:
+            raise TokenBudgetExceeded(tokens, self.limit, self.model)
+        return tokens
+
+
+# ============================================
+# Trimming and Chunking
+# ============================================
+
+def trim_lines(text: str, max_tokens: int, model: str = "gpt-4o-mini",
+               keep_header: bool = False) -> tuple[str, int]:
+    """
+    Keep whole lines from the start of text until max_tokens is reached.
+
+    Args:
+        text: Text to trim (CSV, source code, logs, ...)
+        max_tokens: Budget for the returned text
+        model: Model whose tokenizer is used
+        keep_header: Always keep the first line (e.g. a CSV header)
+
+    Returns:
+        (trimmed text, number of lines dropped)
+    """
+    lines = text.splitlines()
+    if count_tokens(text, model) <= max_tokens:
+        return text, 0
+
+    kept, used = [], 0
+    for i, line in enumerate(lines):
+        tokens = count_tokens(line, model) + 1  # +1 for the newline
+        if used + tokens > max_tokens and not (keep_header and i == 0):
+            break
+        kept.append(line)
+        used += tokens
+    return "\n".join(kept), len(lines) - len(kept)
+
+
+def trim_text(text: str, max_tokens: int, model: str = "gpt-4o-mini",
+              marker: str = "\n[... truncated ...]\n") -> str:
+    """Keep the head and tail of text, dropping the middle, so it fits max_tokens."""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    budget = max(0, max_tokens - count_tokens(marker, model))
+    encoding = _encoding(model)
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        tail_tokens = budget // 2
+        head = encoding.decode(tokens[:budget - tail_tokens])
+        tail = encoding.decode(tokens[len(tokens) - tail_tokens:]) if tail_tokens else ""
+        return head + marker + tail
+
+    # Approximate: cut by character share, then shrink until it fits
+    ratio = budget / max(1, approximate_tokens(text))
+    keep = int(len(text) * ratio)
+    while keep > 0:
+        tail_chars = keep // 2
+        head = text[:keep - tail_chars]
+        tail = text[len(text) - tail_chars:] if tail_chars else ""
+        if approximate_tokens(head) + approximate_tokens(tail) <= budget:
+            return head + marker + tail
+        keep = int(keep * 0.9)
+    return marker.strip()
+
+
+def fit_to_budget(texts: list[str], max_tokens: int, model: str = "gpt-4o-mini") -> list[str]:
+    """
+    Trim a list of texts so that together they fit max_tokens.
+
+    Texts smaller than an even share of the budget are kept whole; the rest
+    of the budget is split evenly among the larger ones, which keep their
+    head and tail (trim_text). Order is preserved.
+
+    Args:
+        texts: Texts that go into one prompt (findings, notes, documents)
+        max_tokens: Budget for all texts together
+        model: Model whose tokenizer is used
+
+    Returns:
+        The texts, trimmed where needed
+    """
+    counts = [count_tokens(text, model) for text in texts]
+    if sum(counts) <= max_tokens:
+        return list(texts)
+
+    shares, remaining = {}, max(0, max_tokens)
+    by_size = sorted(range(len(texts)), key=counts.__getitem__)
+    for n, i in enumerate(by_size):
+        shares[i] = min(counts[i], remaining // (len(texts) - n))
+        remaining -= shares[i]
+    return [text if shares[i] >= counts[i] else trim_text(text, shares[i], model)
+            for i, text in enumerate(texts)]
+
+
+def chunk_lines(text: str, max_tokens: int, model: str = "gpt-4o-mini") -> list[str]:
+    """Split text into consecutive chunks of whole lines, each within max_tokens."""
+    chunks, current, used = [], [], 0
+    for line in text.splitlines():
+        tokens = count_tokens(line, model) + 1
+        if current and used + tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, used = [], 0
+        if tokens > max_tokens:
+            # A single huge line gets its own head/tail-trimmed chunk
+            chunks.append(trim_text(line, max_tokens, model))
+            continue
+        current.append(line)
+        used += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
@@ -0,0 +1,349 @@
+"""
+Content Writer Agent - Batch Mode
+Generate thousands of content pieces through the Batch API.
+
+ContentRequests are rendered to a JSONL batch file, uploaded, submitted
+to /v1/responses, polled until finished and streamed back as results
+mapped to request ids. Batch jobs run at a discount and don't hold open
+one connection per request.
+
+LocalBatchClient is a file-based stand-in for the Files and Batches APIs,
+so the whole pipeline can run offline (python batch_writer.py --local).
+"""
+import argparse
+import json
+import tempfile
+import time
+import uuid
+from contextlib import nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Iterable, Iterator, Optional
+from openai import OpenAI
+from main import ContentRequest, ContentType, ContentWriterAgent, Tone
+
+MAX_REQUESTS_PER_BATCH = 50_000  # Batch API limit per input file
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one request in a batch."""
+    request_id: str
+    request: ContentRequest
+    content: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchSubmitError(Exception):
+    """Submission stopped partway; `jobs` holds the batches that were already submitted."""
+
+    def __init__(self, message: str, jobs: list[tuple[str, dict]]):
+        super().__init__(message)
+        self.jobs = jobs
+
+
+def extract_output_text(body: dict) -> str:
+    """Collect output_text parts from a raw Responses API response body."""
+    parts = []
+    for item in body.get("output", []):
+        if item.get("type") != "message":
+            continue
+        for content in item.get("content", []):
+            if content.get("type") == "output_text":
+                parts.append(content.get("text", ""))
+    return "".join(parts)
+
+
+class BatchContentWriter:
+    """Submits ContentRequests to the Batch API and streams back the results."""
+
+    def __init__(self, agent: ContentWriterAgent = None, client=None,
+                 work_dir: Path = None, batch_size: int = MAX_REQUESTS_PER_BATCH):
+        """
+        Args:
+            agent: Agent whose model and prompts are used
+            client: Client with files and batches (default: the agent's client)
+            work_dir: Where input files are written before upload (default: a temporary directory)
+            batch_size: Most requests per batch job
+        """
+        self.agent = agent or ContentWriterAgent(client=client)  # Only its model and prompts are used
+        self.client = client or self.agent.client
+        self.work_dir = Path(work_dir) if work_dir else None
+        self.batch_size = min(batch_size, MAX_REQUESTS_PER_BATCH)
+
+    def _render(self, requests: Iterable[ContentRequest], work_dir: Path) -> Iterator[tuple[Path, dict]]:
+        """
+        Write requests to JSONL files of at most batch_size lines each.
+
+        Ids must be unique across all batches, as results are mapped by id; a
+        duplicate raises ValueError before the file containing it is yielded.
+        Only the ids seen so far and the current chunk are held in memory.
+        """
+        seen: set[str] = set()
+        chunk: dict[str, ContentRequest] = {}
+        handle = None
+        path = None
+        try:
+            for n, request in enumerate(requests, 1):
+                request_id = request.id or f"req-{n}"
+                if request_id in seen:
+                    raise ValueError(f"Duplicate request id: {request_id}")
+                seen.add(request_id)
+                if handle is None:
+                    path = work_dir / f"batch_input_{uuid.uuid4().hex[:8]}.jsonl"
+                    handle = open(path, "w", encoding="utf-8")
+                chunk[request_id] = request
+                line = {
+                    "custom_id": request_id,
+                    "method": "POST",
+                    "url": "/v1/responses",
+                    "body": {"model": self.agent.model, "input": self.agent.build_prompt(request)},
+                }
+                handle.write(json.dumps(line) + "\n")
+                if len(chunk) >= self.batch_size:
+                    handle.close()
+                    handle = None
+                    yield path, chunk
+                    chunk = {}
+            if handle is not None:
+                handle.close()
+                handle = None
+                yield path, chunk
+        finally:
+            if handle is not None:  # Stopped partway through a file
+                handle.close()
+                path.unlink()
+
+    def submit(self, requests: Iterable[ContentRequest]) -> list[tuple[str, dict]]:
+        """
+        Upload and submit every chunk; returns (batch_id, requests_by_id) pairs.
+
+        If a later chunk fails (a duplicate id, an upload or submit error) after
+        some batches were submitted, raises BatchSubmitError carrying those
+        batches, so their results can still be collected.
+        """
+        jobs = []
+        if self.work_dir:
+            self.work_dir.mkdir(parents=True, exist_ok=True)
+        scratch = nullcontext(self.work_dir) if self.work_dir else tempfile.TemporaryDirectory(prefix="content_batch_")
+        with scratch as work_dir:
+            try:
+                for path, chunk in self._render(requests, Path(work_dir)):
+                    try:
+                        with open(path, "rb") as f:
+                            input_file = self.client.files.create(file=f, purpose="batch")
+                    finally:
+                        path.unlink()  # The uploaded copy is all that is needed
+                    batch = self.client.batches.create(
+                        input_file_id=input_file.id,
+                        endpoint="/v1/responses",
+                        completion_window="24h",
+                    )
+                    print(f"📦 Submitted batch {batch.id} ({len(chunk)} requests)")
+                    jobs.append((batch.id, chunk))
+            except Exception as e:
+                if not jobs:
+                    raise
+                raise BatchSubmitError(f"{len(jobs)} batch(es) submitted before: {e}", jobs) from e
+        return jobs
+
+    def wait(self, batch_id: str, poll_interval: float = 5.0, max_interval: float = 60.0):
+        """Poll a batch with exponential backoff until it reaches a terminal status."""
+        interval = poll_interval
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in TERMINAL_STATUSES:
+                return batch
+            counts = batch.request_counts
+            if counts is not None:
+                print(f"⏳ {batch_id}: {batch.status} ({counts.completed}/{counts.total})")
+            time.sleep(interval)
+            interval = min(interval * 2, max_interval)
+
+    def _iter_file(self, file_id: Optional[str]) -> Iterator[dict]:
+        if not file_id:
+            return
+        for line in self.client.files.content(file_id).iter_lines():
+            if line.strip():
+                yield json.loads(line)
+
+    def results(self, batch, requests: dict[str, ContentRequest]) -> Iterator[BatchResult]:
+        """Stream results for a finished batch; requests with no result are reported as errors."""
+        pending = dict(requests)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            for record in self._iter_file(file_id):
+                request_id = record["custom_id"]
+                request = pending.pop(request_id, None)
+                if request is None:
+                    continue
+                response = record.get("response") or {}
+                if record.get("error") or response.get("status_code", 200) != 200:
+                    error = record.get("error") or response.get("body", {}).get("error")
+                    yield BatchResult(request_id, request, error=json.dumps(error))
+                else:
+                    yield BatchResult(request_id, request,
+                                      content=extract_output_text(response.get("body", {})))
+        for request_id, request in pending.items():
+            yield BatchResult(request_id, request, error=f"batch {batch.id} {batch.status}")
+
+    def run(self, requests: Iterable[ContentRequest], poll_interval: float = 5.0) -> Iterator[BatchResult]:
+        """Submit, wait and stream results for all requests."""
+        jobs = self.submit(requests)
+        for batch_id, chunk in jobs:
+            batch = self.wait(batch_id, poll_interval=poll_interval)
+            print(f"✅ Batch {batch_id} {batch.status}")
+            yield from self.results(batch, chunk)
+
+
+# ============================================
+# Local Stand-in for the Files and Batches APIs
+# ============================================
+
+def echo_responder(body: dict) -> dict:
+    """Fake /v1/responses handler that returns the first line of the prompt."""
+    text = f"[local] {body['input'].splitlines()[0]}"
+    return {
+        "id": f"resp_{uuid.uuid4().hex[:12]}",
+        "object": "response",
+        "model": body["model"],
+        "status": "completed",
+        "output": [{
+            "type": "message",
+            "role": "assistant",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+    }
+
+
+class _LocalFileContent:
+    def __init__(self, path: Path):
+        self.path = path
+
+    def iter_lines(self) -> Iterator[str]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield line.rstrip("\n")
+
+    @property
+    def text(self) -> str:
+        return self.path.read_text(encoding="utf-8")
+
+
+class _LocalFiles:
+    def __init__(self, root: Path):
+        self.root = root
+
+    def create(self, file, purpose: str):
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        (self.root / file_id).write_bytes(file.read())
+        return SimpleNamespace(id=file_id, purpose=purpose)
+
+    def content(self, file_id: str) -> _LocalFileContent:
+        return _LocalFileContent(self.root / file_id)
+
+
+class _LocalBatches:
+    def __init__(self, root: Path, responder: Callable[[dict], dict]):
+        self.root = root
+        self.responder = responder
+        self._batches: dict[str, SimpleNamespace] = {}
+
+    def create(self, input_file_id: str, endpoint: str, completion_window: str, **kwargs):
+        total = sum(1 for _ in open(self.root / input_file_id, encoding="utf-8"))
+        batch = SimpleNamespace(
+            id=f"batch_{uuid.uuid4().hex[:12]}", status="validating", endpoint=endpoint,
+            input_file_id=input_file_id, output_file_id=None, error_file_id=None,
+            request_counts=SimpleNamespace(total=total, completed=0, failed=0),
+        )
+        self._batches[batch.id] = batch
+        return batch
+
+    def retrieve(self, batch_id: str):
+        batch = self._batches[batch_id]
+        if batch.status == "validating":
+            batch.status = "in_progress"  # Report progress once, like the real API
+        elif batch.status == "in_progress":
+            self._process(batch)
+        return batch
+
+    def _process(self, batch):
+        output_id = f"file-{uuid.uuid4().hex[:12]}"
+        error_id = f"file-{uuid.uuid4().hex[:12]}"
+        with open(self.root / batch.input_file_id, encoding="utf-8") as src, \
+                open(self.root / output_id, "w", encoding="utf-8") as out, \
+                open(self.root / error_id, "w", encoding="utf-8") as err:
+            for line in src:
+                request = json.loads(line)
+                try:
+                    body = self.responder(request["body"])
+                    out.write(json.dumps({
+                        "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                        "custom_id": request["custom_id"],
+                        "response": {"status_code": 200, "body": body},
+                        "error": None,
+                    }) + "\n")
+                    batch.request_counts.completed += 1
+                except Exception as e:
+                    err.write(json.dumps({
+                        "custom_id": request["custom_id"],
+                        "response": None,
+                        "error": {"code": type(e).__name__, "message": str(e)},
+                    }) + "\n")
+                    batch.request_counts.failed += 1
+        batch.output_file_id = output_id
+        batch.error_file_id = error_id if batch.request_counts.failed else None
+        batch.status = "completed"
+
+
+class LocalBatchClient:
+    """File-based stand-in for client.files and client.batches."""
+
+    def __init__(self, root: Path = None, responder: Callable[[dict], dict] = echo_responder):
+        self.root = Path(root or tempfile.mkdtemp(prefix="local_batches_"))
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.files = _LocalFiles(self.root)
+        self.batches = _LocalBatches(self.root, responder)
+
+
+# ============================================
+# Demo
+# ============================================
+
+def main():
+    """Generate a batch of content variants and print them as they stream back."""
+    parser = argparse.ArgumentParser(description="Batch content generation")
+    parser.add_argument("-n", "--variants", type=int, default=6)
+    parser.add_argument("--local", action="store_true", help="Use the local file-based stand-in")
+    args = parser.parse_args()
+
+    products = ["AI note-taking app", "Smart water bottle", "Project management tool"]
+    content_types = [ContentType.SOCIAL_TWITTER, ContentType.AD_COPY, ContentType.EMAIL_MARKETING]
+    requests = (
+        ContentRequest(
+            id=f"variant-{i + 1}",
+            topic=products[i % len(products)],
+            content_type=content_types[i % len(content_types)],
+            tone=Tone.PERSUASIVE,
+        )
+        for i in range(args.variants)
+    )
+
+    client = LocalBatchClient() if args.local else OpenAI()
+    writer = BatchContentWriter(client=client)
+
+    ok = failed = 0
+    for result in writer.run(requests, poll_interval=0.1 if args.local else 10.0):
+        if result.error:
+            failed += 1
+            print(f"❌ {result.request_id}: {result.error}")
+        else:
+            ok += 1
+            print(f"📝 {result.request_id} ({result.request.content_type.value}): {result.content[:80]}")
+
+    print(f"\n📊 {ok} generated, {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
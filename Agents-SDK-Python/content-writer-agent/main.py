@@ -12,8 +12,6 @@ from typing import Optional
 
 load_dotenv()
 
-client = OpenAI()
-
 
 class ContentType(Enum):
     BLOG_POST = "blog_post"
@@ -44,6 +42,7 @@ class ContentRequest:
     keywords: list[str] = None
     audience: str = "general"
     additional_context: str = ""
+    id: Optional[str] = None  # Used to match batch results back to requests
 
 
 CONTENT_TEMPLATES = {
@@ -156,18 +155,19 @@ Make it persuasive and scannable.""",
 class ContentWriterAgent:
     """Agent that generates various types of content."""
     
-    def __init__(self, model: str = "gpt-4o-mini"):
+    def __init__(self, model: str = "gpt-4o-mini", client: OpenAI = None):
         self.model = model
+        self.client = client or OpenAI()  # Any client with responses.create(), e.g. CachedClient
     
-    def write(self, request: ContentRequest) -> str:
-        """Generate content based on the request."""
+    def build_prompt(self, request: ContentRequest) -> str:
+        """Render the CONTENT_TEMPLATES prompt for a request."""
         template = CONTENT_TEMPLATES[request.content_type]
         
         keywords_section = ""
         if request.keywords:
             keywords_section = f"Keywords to include: {', '.join(request.keywords)}"
         
-        prompt = template.format(
+        return template.format(
             topic=request.topic,
             tone=request.tone.value,
             length=request.length,
@@ -175,12 +175,16 @@ class ContentWriterAgent:
             keywords_section=keywords_section,
             additional_context=request.additional_context or "N/A"
         )
+    
+    def write(self, request: ContentRequest) -> str:
+        """Generate content based on the request."""
+        prompt = self.build_prompt(request)
         
         print(f"✍️  Generating {request.content_type.value}...")
         print(f"   Topic: {request.topic}")
         print(f"   Tone: {request.tone.value}")
         
-        response = client.responses.create(
+        response = self.client.responses.create(
             model=self.model,
             input=prompt,
         )
@@ -191,7 +195,7 @@ class ContentWriterAgent:
         """Rewrite existing content with specific instructions."""
         print("🔄 Rewriting content...")
         
-        response = client.responses.create(
+        response = self.client.responses.create(
             model=self.model,
             input=f"""Rewrite this content following these instructions:
 
@@ -209,7 +213,7 @@ Provide the rewritten version:"""
         """Suggest improvements for existing content."""
         print("🔍 Analyzing content for improvements...")
         
-        response = client.responses.create(
+        response = self.client.responses.create(
             model=self.model,
             input=f"""Analyze this content and provide specific improvements:
 
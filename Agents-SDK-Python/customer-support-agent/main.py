@@ -5,34 +5,16 @@ An AI agent that handles customer support tickets with intelligent routing.
 Uses the Agents SDK for multi-agent handoffs.
 """
 import asyncio
-from dataclasses import dataclass
-from enum import Enum
-from agents import Agent, Runner
+import sys
+from collections import Counter
+from pathlib import Path
+from pydantic import BaseModel
+from agents import Agent, RunContextWrapper, Runner, handoff
+from tickets import Ticket, TicketCategory, Urgency
+from ticket_queue import TicketProcessor
 
-
-class TicketCategory(Enum):
-    BILLING = "billing"
-    TECHNICAL = "technical"
-    GENERAL = "general"
-    FEEDBACK = "feedback"
-
-
-class Urgency(Enum):
-    LOW = "low"
-    MEDIUM = "medium"
-    HIGH = "high"
-    CRITICAL = "critical"
-
-
-@dataclass
-class Ticket:
-    """Support ticket data structure."""
-    id: str
-    customer_name: str
-    email: str
-    message: str
-    category: TicketCategory = None
-    urgency: Urgency = None
+sys.path.append(str(Path(__file__).resolve().parent.parent / "common"))
+from routing_cache import RoutingCache
 
 
 # ============================================
@@ -86,7 +68,20 @@ general_agent = Agent(
     to the right resources or information.""",
 )
 
-# Triage agent that routes to specialists
+
+class TriageDecision(BaseModel):
+    """Classification the triage agent sends as its handoff arguments."""
+    category: TicketCategory
+    urgency: Urgency
+    confidence: float  # 0-1
+
+
+def record_triage(ctx: RunContextWrapper[Ticket], decision: TriageDecision):
+    """Fill in the ticket from the handoff, so classifying costs no extra call (urgency is only raised)."""
+    ctx.context.classify(decision.category, decision.urgency, decision.confidence)
+
+
+# Triage agent that classifies the ticket and routes it to a specialist in one turn
 triage_agent = Agent(
     name="Support Triage",
     instructions="""You are a support triage agent. Analyze incoming tickets and:
@@ -94,6 +89,7 @@ triage_agent = Agent(
     1. Determine the category:
        - BILLING: payments, subscriptions, invoices, pricing
        - TECHNICAL: bugs, errors, crashes, features, integrations
+       - FEEDBACK: praise, complaints, suggestions
        - GENERAL: everything else
     
     2. Assess urgency:
@@ -102,23 +98,23 @@ triage_agent = Agent(
        - MEDIUM: inconvenience, questions
        - LOW: feedback, suggestions
     
-    3. Briefly acknowledge the customer, then hand off to the appropriate specialist.
-    
-    Example: "Thanks for reaching out! I'm connecting you with our billing team."
+    3. Always hand off to the appropriate specialist (FEEDBACK goes to general support),
+       passing the category, the urgency and your confidence in both (0-1) as the
+       handoff arguments.
     """,
-    handoffs=[billing_agent, technical_agent, general_agent],
+    handoffs=[
+        handoff(agent, input_type=TriageDecision, on_handoff=record_triage)
+        for agent in (billing_agent, technical_agent, general_agent)
+    ],
 )
 
+# Repeated and near-duplicate tickets go straight to the specialist triage picked last time
+routing_cache = RoutingCache()
+SPECIALISTS = {agent.name: agent for agent in (billing_agent, technical_agent, general_agent)}
+
 
 async def handle_ticket(ticket: Ticket) -> str:
     """Process a support ticket through the agent system."""
-    print(f"\n{'='*50}")
-    print(f"🎫 Ticket #{ticket.id}")
-    print(f"👤 From: {ticket.customer_name} <{ticket.email}>")
-    print(f"{'='*50}")
-    print(f"📝 Message:\n{ticket.message}")
-    print(f"{'='*50}\n")
-    
     # Format ticket for agent
     agent_input = f"""
     Customer: {ticket.customer_name}
@@ -128,11 +124,37 @@ async def handle_ticket(ticket: Ticket) -> str:
     {ticket.message}
     """
     
-    # Process through triage
-    result = await Runner.run(triage_agent, agent_input)
-    
+    hit = routing_cache.lookup(ticket.message)
+    if hit:
+        if hit.meta:
+            # Reuse the earlier ticket's classification, discounted by how similar the tickets are
+            ticket.classify(TicketCategory(hit.meta["category"]), Urgency(hit.meta["urgency"]),
+                            hit.meta["confidence"] * hit.similarity)
+        result = await Runner.run(SPECIALISTS[hit.route], agent_input, context=ticket)
+    else:
+        # Process through triage; its handoff fills in category, urgency and confidence
+        result = await Runner.run(triage_agent, agent_input, context=ticket)
+        if result.last_agent.name in SPECIALISTS:
+            meta = {}
+            if ticket.confidence is not None:
+                meta = {"category": ticket.category.value, "urgency": ticket.urgency.value,
+                        "confidence": ticket.confidence}
+            routing_cache.store(ticket.message, result.last_agent.name, meta)
+    
+    # Tickets are handled concurrently, so each one is printed in one piece once done
+    print(f"\n{'='*50}")
+    print(f"🎫 Ticket #{ticket.id} ({ticket.urgency.value if ticket.urgency else 'no urgency'})")
+    print(f"👤 From: {ticket.customer_name} <{ticket.email}>")
+    print(f"{'='*50}")
+    print(f"📝 Message:\n{ticket.message}")
+    print(f"{'='*50}\n")
+    if hit:
+        print(f"💾 Cached route ({hit.kind}, similarity {hit.similarity:.2f}, {hit.seconds * 1e6:.0f} µs)")
+    if ticket.confidence is not None:
+        print(f"📋 Triage: {ticket.category.value}, {ticket.urgency.value} ({ticket.confidence:.0%} confident)")
     print(f"🔀 Routed to: {result.last_agent.name}")
     print(f"\n📧 Response:\n{result.final_output}")
+    print("\n" + "-"*50 + "\n")
     
     return result.final_output
 
@@ -146,7 +168,8 @@ async def main():
             customer_name="John Smith",
             email="john@example.com",
             message="I was charged twice for my subscription this month. "
-                    "Please refund the duplicate charge. Order #12345."
+                    "Please refund the duplicate charge. Order #12345.",
+            urgency=Urgency.HIGH,
         ),
         Ticket(
             id="T-002",
@@ -154,26 +177,52 @@ async def main():
             email="sarah@example.com",
             message="The mobile app keeps crashing whenever I try to upload "
                     "a photo. I'm using iPhone 15 with iOS 17. This started "
-                    "after the last update."
+                    "after the last update.",
+            urgency=Urgency.HIGH,
         ),
         Ticket(
             id="T-003",
             customer_name="Mike Brown",
             email="mike@example.com",
-            message="How do I export my data? I need a backup of everything."
+            message="How do I export my data? I need a backup of everything.",
+            urgency=Urgency.MEDIUM,
         ),
         Ticket(
             id="T-004",
             customer_name="Emily Davis",
             email="emily@example.com",
             message="Just wanted to say your product is fantastic! The new "
-                    "dark mode feature is exactly what I needed. Great work team!"
+                    "dark mode feature is exactly what I needed. Great work team!",
+            urgency=Urgency.LOW,
+        ),
+        Ticket(
+            id="T-005",
+            customer_name="John Smith",
+            email="john@example.com",
+            message="Following up on my earlier ticket: I was charged twice for my subscription "
+                    "this month, please refund the duplicate charge. Order #12345.",
+            urgency=Urgency.CRITICAL,
+        ),
+        Ticket(
+            id="T-006",
+            customer_name="Ana Garcia",
+            email="ana@example.com",
+            message="Our whole team is locked out - every login returns an error "
+                    "and we have a client demo in an hour!",
+            urgency=Urgency.CRITICAL,
         ),
     ]
     
+    # Most urgent first, one ticket at a time per customer (T-005 waits for T-001)
+    processor = TicketProcessor(handle_ticket, concurrency=3)
     for ticket in tickets:
-        await handle_ticket(ticket)
-        print("\n" + "-"*50 + "\n")
+        await processor.submit(ticket)
+    await processor.run()
+    
+    print(f"📊 Queue: {processor.metrics}")
+    categories = Counter(ticket.category.value if ticket.category else "unclassified" for ticket in tickets)
+    print(f"📋 Categories: {dict(categories)}")
+    print(f"💾 Routing cache: {routing_cache.stats}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,152 @@
+"""
+Customer Support Agent - Queue Simulation
+Compare the sequential loop with the ticket queue on a synthetic backlog.
+
+A backlog of LOW and MEDIUM tickets is queued up front; HIGH and CRITICAL
+tickets arrive while it is being worked off. The handler sleeps for a
+random, agent-like latency and can be made to fail with rate limits, so no
+API calls are made.
+
+Usage:
+    python simulate_queue.py
+    python simulate_queue.py --tickets 400 --concurrency 16 --rate-limit 0.05 --queue sqlite
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import httpx
+import openai
+from tickets import Ticket, Urgency
+from ticket_queue import LatencyStats, MemoryTicketQueue, SQLiteTicketQueue, TicketProcessor
+
+
+def make_backlog(count: int, customers: int, rng: random.Random) -> list[Ticket]:
+    return [
+        Ticket(id=f"B-{i:04d}", customer_name=f"Customer {i % customers}", email=f"c{i % customers}@example.com",
+               message="Backlog ticket", urgency=rng.choice([Urgency.LOW] * 4 + [Urgency.MEDIUM]))
+        for i in range(count)
+    ]
+
+
+def make_urgent(count: int, rng: random.Random) -> list[Ticket]:
+    return [
+        Ticket(id=f"U-{i:03d}", customer_name=f"Urgent {i}", email=f"u{i}@example.com",
+               message="Service is down", urgency=rng.choice([Urgency.HIGH, Urgency.CRITICAL]))
+        for i in range(count)
+    ]
+
+
+def rate_limit_error(retry_after: float) -> openai.RateLimitError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/responses")
+    response = httpx.Response(429, headers={"retry-after": str(retry_after)}, request=request)
+    return openai.RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def make_handler(latency: float, rate_limit: float, rng: random.Random):
+    async def handle(ticket: Ticket):
+        if rng.random() < rate_limit:
+            raise rate_limit_error(0.05)
+        await asyncio.sleep(latency * rng.uniform(0.5, 1.5))
+    return handle
+
+
+async def arrive(urgent: list[Ticket], interval: float, submit):
+    for ticket in urgent:
+        await asyncio.sleep(interval)
+        await submit(ticket)
+
+
+async def run_sequential(backlog, urgent, handler, interval) -> tuple[float, dict[str, LatencyStats]]:
+    """The original `for ticket in tickets: await handle_ticket(ticket)`, FIFO."""
+    queue: asyncio.Queue = asyncio.Queue()
+    waits = {u.value: LatencyStats() for u in Urgency}
+
+    async def submit(ticket):
+        await queue.put((ticket, time.time()))
+
+    for ticket in backlog:
+        await submit(ticket)
+    arrivals = asyncio.create_task(arrive(urgent, interval, submit))
+    started = time.perf_counter()
+    handled = 0
+    while handled < len(backlog) + len(urgent):
+        ticket, submitted_at = await queue.get()
+        waits[ticket.urgency.value].record(time.time() - submitted_at)
+        while True:
+            try:
+                await handler(ticket)
+                break
+            except openai.RateLimitError:
+                await asyncio.sleep(0.05)
+        handled += 1
+    await arrivals
+    return time.perf_counter() - started, waits
+
+
+async def run_queue(backlog, urgent, handler, interval, concurrency, reserved, queue):
+    processor = TicketProcessor(handler, queue=queue, concurrency=concurrency, reserved=reserved,
+                                base_delay=0.05, poll_interval=0.01)
+    for ticket in backlog:
+        await processor.submit(ticket)
+    arrivals = asyncio.create_task(arrive(urgent, interval, processor.submit))
+    await asyncio.gather(processor.run(drain=False), _stop_when_done(processor, arrivals))
+    return processor.metrics
+
+
+async def _stop_when_done(processor: TicketProcessor, arrivals: asyncio.Task):
+    await arrivals
+    while await processor.queue.pending():
+        await asyncio.sleep(0.01)
+    processor.stop()
+
+
+def describe(name: str, seconds: float, count: int, waits: dict[str, LatencyStats]):
+    p95 = "  ".join(f"{urgency} {waits[urgency].percentile(95) * 1000:>6.0f}ms"
+                    for urgency in ("critical", "high", "low") if waits[urgency].count)
+    print(f"{name:<28} {count / seconds:>7.1f} tickets/s   p95 wait: {p95}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Simulate the ticket queue against the sequential loop")
+    parser.add_argument("--tickets", type=int, default=200, help="Backlog size")
+    parser.add_argument("--customers", type=int, default=50)
+    parser.add_argument("--urgent", type=int, default=10, help="HIGH/CRITICAL tickets arriving later")
+    parser.add_argument("--window", type=float, default=1.0, help="Seconds over which urgent tickets arrive")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean seconds per ticket")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Probability of a rate-limit error")
+    parser.add_argument("--queue", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    backlog = make_backlog(args.tickets, args.customers, rng)
+    urgent = make_urgent(args.urgent, rng)
+    total = len(backlog) + len(urgent)
+    handler = make_handler(args.latency, args.rate_limit, rng)
+    interval = args.window / max(1, args.urgent)
+
+    print(f"🎫 {args.tickets} backlog tickets from {args.customers} customers, {args.urgent} urgent arrivals, "
+          f"{args.latency * 1000:.0f}ms per ticket, {args.rate_limit:.0%} rate limited\n")
+
+    seconds, waits = await run_sequential(backlog, urgent, handler, interval)
+    describe("sequential loop", seconds, total, waits)
+
+    tmpdir = tempfile.mkdtemp()
+    for reserved in (0, 1):
+        if args.queue == "sqlite":
+            queue = SQLiteTicketQueue(os.path.join(tmpdir, f"queue-{reserved}.db"))
+        else:
+            queue = MemoryTicketQueue()
+        metrics = await run_queue(backlog, urgent, handler, interval, args.concurrency, reserved, queue)
+        describe(f"queue x{args.concurrency}, reserved={reserved}", metrics.elapsed, metrics.completed, metrics.wait)
+        if metrics.retries or metrics.failed:
+            print(f"{'':<28} {metrics.retries} retries ({metrics.rate_limited} rate limited), "
+                  f"{metrics.failed} failed")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,538 @@
+"""
+Customer Support Agent - Ticket Queue
+Process tickets concurrently: most urgent first, in order per customer.
+
+A pool of asyncio workers pulls tickets from a pluggable queue:
+
+- Priority: the next ticket comes from the customer with the most urgent
+  pending ticket. A customer's tickets are still handled one at a time in
+  the order they were submitted, so a CRITICAL follow-up lifts the priority
+  of that customer's earlier tickets instead of overtaking them.
+- Reserved workers: `reserved` workers only take HIGH and CRITICAL tickets,
+  so urgent tickets start immediately even while every other worker is busy
+  with a backlog of LOW ones.
+- Retries: rate limits, connection errors and 5xx responses are retried with
+  exponential backoff and jitter (at least Retry-After); a rate limit pauses
+  all workers, since they share the same quota.
+- Metrics: throughput, and queue wait / handling time per urgency.
+
+Queues: MemoryTicketQueue (one process) and SQLiteTicketQueue (durable and
+shareable between processes). Both implement the TicketQueue protocol.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from statistics import quantiles
+from typing import Awaitable, Callable, Optional, Protocol
+import openai
+from tickets import Ticket, Urgency
+
+DEFAULT_URGENCY = Urgency.MEDIUM  # For tickets submitted before triage has set one
+
+# Transient errors worth retrying (APITimeoutError is an APIConnectionError)
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+
+def ticket_urgency(ticket: Ticket) -> Urgency:
+    return ticket.urgency or DEFAULT_URGENCY
+
+
+@dataclass
+class Job:
+    """A queued ticket."""
+    ticket: Ticket
+    seq: int  # Submission order
+    priority: int
+    enqueued_at: float  # time.time()
+    attempts: int = 0  # Claims so far, including the current one
+    available_at: float = 0.0  # Not claimable before this (retry backoff)
+    error: str = ""
+
+    @property
+    def customer(self) -> str:
+        return self.ticket.email
+
+
+class TicketQueue(Protocol):
+    async def put(self, ticket: Ticket) -> Job: ...
+
+    async def claim(self, min_priority: int = 0) -> Optional[Job]:
+        """Next job to handle, or None. The job's customer has no other job in progress."""
+        ...
+
+    async def complete(self, job: Job, failed: bool = False): ...
+
+    async def retry(self, job: Job, delay: float):
+        """Put a claimed job back; it stays first in line for its customer."""
+        ...
+
+    async def pending(self) -> int:
+        """Jobs queued or in progress."""
+        ...
+
+
+# ============================================
+# Queues
+# ============================================
+
+class MemoryTicketQueue:
+    """
+    In-process queue: a FIFO per customer, scheduled by each customer's most urgent ticket.
+
+    Claimable customers sit in a heap keyed by (-most urgent priority, head
+    seq), customers in retry backoff in a second heap keyed by when they are
+    due. Any change to a customer pushes a fresh entry and makes the old one
+    stale (skipped when it reaches the top), so put, claim, complete and
+    retry are O(log customers) however long the backlog is.
+    """
+
+    def __init__(self):
+        self._customers: dict[str, deque[Job]] = {}
+        self._priorities: dict[str, Counter] = {}  # Customer -> pending priorities
+        self._running: set[str] = set()
+        self._seq = itertools.count()
+        self._failed: list[Job] = []
+        self._ready: list[tuple[int, int, str, int]] = []  # (-top priority, head seq, customer, version)
+        self._delayed: list[tuple[float, str, int]] = []  # (available_at, customer, version)
+        self._versions: dict[str, int] = {}  # Heap entries with another version are stale
+        self._stamps = itertools.count(1)
+
+    async def put(self, ticket: Ticket) -> Job:
+        job = Job(ticket, next(self._seq), ticket_urgency(ticket).priority, time.time())
+        priorities = self._priorities.get(job.customer)
+        top = max(priorities) if priorities else None
+        self._customers.setdefault(job.customer, deque()).append(job)
+        self._count(job.customer, job.priority, 1)
+        if top is None or job.priority > top:
+            self._schedule(job.customer)  # New customer, or now more urgent
+        return job
+
+    def _count(self, customer: str, priority: int, delta: int):
+        priorities = self._priorities.setdefault(customer, Counter())
+        priorities[priority] += delta
+        if not priorities[priority]:
+            del priorities[priority]
+
+    def _schedule(self, customer: str):
+        """Replace the customer's heap entry after its jobs or state changed."""
+        version = self._versions[customer] = next(self._stamps)
+        jobs = self._customers.get(customer)
+        if not jobs or customer in self._running:
+            return
+        head = jobs[0]
+        if head.available_at > time.time():
+            heapq.heappush(self._delayed, (head.available_at, customer, version))
+        else:
+            heapq.heappush(self._ready, (-max(self._priorities[customer]), head.seq, customer, version))
+
+    async def claim(self, min_priority: int = 0) -> Optional[Job]:
+        now = time.time()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, customer, version = heapq.heappop(self._delayed)
+            if self._versions.get(customer) == version:
+                self._schedule(customer)
+        while self._ready:
+            negative_top, _, customer, version = self._ready[0]
+            if self._versions.get(customer) != version:
+                heapq.heappop(self._ready)
+                continue
+            if -negative_top < min_priority:
+                return None  # The most urgent waiting customer is below this worker's minimum
+            heapq.heappop(self._ready)
+            self._running.add(customer)
+            self._versions[customer] = next(self._stamps)
+            job = self._customers[customer][0]
+            job.attempts += 1
+            return job
+        return None
+
+    async def complete(self, job: Job, failed: bool = False):
+        jobs = self._customers[job.customer]
+        jobs.popleft()
+        self._count(job.customer, job.priority, -1)
+        if not jobs:
+            del self._customers[job.customer], self._priorities[job.customer]
+        self._running.discard(job.customer)
+        self._schedule(job.customer)
+        if not jobs:
+            del self._versions[job.customer]  # Its entries are stale either way
+        if failed:
+            self._failed.append(job)
+
+    async def retry(self, job: Job, delay: float):
+        job.available_at = time.time() + delay
+        priority = ticket_urgency(job.ticket).priority  # Triage may have set the urgency meanwhile
+        if priority != job.priority:
+            self._count(job.customer, job.priority, -1)
+            self._count(job.customer, priority, 1)
+            job.priority = priority
+        self._running.discard(job.customer)
+        self._schedule(job.customer)
+
+    async def pending(self) -> int:
+        return sum(len(jobs) for jobs in self._customers.values())
+
+    def failed_jobs(self) -> list[Job]:
+        return list(self._failed)
+
+
+class SQLiteTicketQueue:
+    """
+    Durable queue in a SQLite file, safe to share between worker processes.
+
+    Claims take a lease: a job whose worker died is claimable again once the
+    lease expires. Finished jobs stay in the table with status 'done' or
+    'failed' and the ticket as the handler left it (e.g. with its triage
+    classification); purge() deletes the done ones.
+
+    Each customer's head (oldest unfinished job) and most urgent priority
+    are kept in a `heads` table by triggers, so a claim reads the first
+    claimable row of an index instead of grouping every queued job. Database
+    calls run in a worker thread, so a busy database never blocks the event loop.
+    """
+
+    def __init__(self, path: str = "tickets_queue.db", lease: float = 600.0):
+        self.lease = lease
+        # Explicit transactions below; calls come from worker threads, one at a time
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                customer TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',  -- pending, running, done or failed
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL DEFAULT 0,  -- Backoff end, or lease expiry while running
+                enqueued_at REAL NOT NULL,
+                error TEXT NOT NULL DEFAULT '',
+                ticket TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_customer ON jobs (status, customer, seq);
+            CREATE TABLE IF NOT EXISTS heads (  -- Customers with unfinished jobs; kept up to date by the triggers
+                customer TEXT PRIMARY KEY,
+                head INTEGER NOT NULL,  -- seq of the oldest unfinished job
+                top INTEGER NOT NULL,  -- Highest priority among unfinished jobs
+                available_at REAL NOT NULL  -- Of the head job
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS heads_by_priority ON heads (top DESC, head);
+            CREATE TRIGGER IF NOT EXISTS heads_insert AFTER INSERT ON jobs BEGIN
+                INSERT INTO heads VALUES (NEW.customer, NEW.seq, NEW.priority, NEW.available_at)
+                ON CONFLICT DO UPDATE SET top = MAX(top, NEW.priority);
+            END;
+            CREATE TRIGGER IF NOT EXISTS heads_update AFTER UPDATE OF status, priority, available_at ON jobs BEGIN
+                DELETE FROM heads WHERE customer = NEW.customer;
+                INSERT INTO heads
+                SELECT customer, seq, (SELECT MAX(priority) FROM jobs
+                                       WHERE status IN ('pending', 'running') AND customer = NEW.customer),
+                       available_at
+                FROM jobs WHERE status IN ('pending', 'running') AND customer = NEW.customer
+                ORDER BY seq LIMIT 1;
+            END;
+        """)
+        self._lock = threading.Lock()
+
+    async def _run(self, fn, *args):
+        """Run a database call in a worker thread, one call on the connection at a time."""
+        def locked():
+            with self._lock:
+                return fn(*args)
+        return await asyncio.to_thread(locked)
+
+    @staticmethod
+    def _job(row: tuple) -> Job:
+        seq, priority, attempts, available_at, enqueued_at, error, ticket = row
+        return Job(Ticket.from_dict(json.loads(ticket)), seq, priority, enqueued_at,
+                   attempts, available_at, error)
+
+    async def put(self, ticket: Ticket) -> Job:
+        job = Job(ticket, 0, ticket_urgency(ticket).priority, time.time())
+        cursor = await self._run(
+            self.conn.execute,
+            "INSERT INTO jobs (customer, priority, enqueued_at, ticket) VALUES (?, ?, ?, ?)",
+            (job.customer, job.priority, job.enqueued_at, json.dumps(ticket.to_dict())),
+        )
+        job.seq = cursor.lastrowid
+        return job
+
+    async def claim(self, min_priority: int = 0) -> Optional[Job]:
+        return await self._run(self._claim, min_priority)
+
+    def _claim(self, min_priority: int) -> Optional[Job]:
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")  # One claimer at a time across processes
+        try:
+            # A running head (lease not expired) keeps the customer's later jobs waiting
+            row = self.conn.execute("""
+                SELECT j.seq, j.priority, j.attempts, j.available_at, j.enqueued_at, j.error, j.ticket
+                FROM heads JOIN jobs j ON j.seq = heads.head
+                WHERE heads.top >= ? AND heads.available_at <= ?
+                ORDER BY heads.top DESC, heads.head
+                LIMIT 1
+            """, (min_priority, now)).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            job = self._job(row)
+            job.attempts += 1
+            job.available_at = now + self.lease
+            self.conn.execute("UPDATE jobs SET status = 'running', attempts = ?, available_at = ? WHERE seq = ?",
+                              (job.attempts, job.available_at, job.seq))
+            self.conn.execute("COMMIT")
+            return job
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    async def complete(self, job: Job, failed: bool = False):
+        await self._run(self.conn.execute, "UPDATE jobs SET status = ?, error = ?, ticket = ? WHERE seq = ?",
+                        ("failed" if failed else "done", job.error, json.dumps(job.ticket.to_dict()), job.seq))
+
+    async def retry(self, job: Job, delay: float):
+        job.available_at = time.time() + delay
+        job.priority = ticket_urgency(job.ticket).priority  # Triage may have set the urgency meanwhile
+        await self._run(self.conn.execute, """
+            UPDATE jobs SET status = 'pending', priority = ?, available_at = ?, error = ?, ticket = ?
+            WHERE seq = ?
+        """, (job.priority, job.available_at, job.error, json.dumps(job.ticket.to_dict()), job.seq))
+
+    async def pending(self) -> int:
+        cursor = await self._run(self.conn.execute,
+                                 "SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'running')")
+        return cursor.fetchone()[0]
+
+    def _finished(self, status: str) -> list[Job]:
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT seq, priority, attempts, available_at, enqueued_at, error, ticket
+                FROM jobs WHERE status = ? ORDER BY seq
+            """, (status,)).fetchall()
+        return [self._job(row) for row in rows]
+
+    def done_jobs(self) -> list[Job]:
+        return self._finished("done")
+
+    def failed_jobs(self) -> list[Job]:
+        return self._finished("failed")
+
+    def purge(self) -> int:
+        """Delete done jobs; returns how many."""
+        with self._lock:
+            return self.conn.execute("DELETE FROM jobs WHERE status = 'done'").rowcount
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+# ============================================
+# Metrics
+# ============================================
+
+@dataclass
+class LatencyStats:
+    """Durations in seconds (recent samples kept for percentiles)."""
+    count: int = 0
+    total: float = 0.0
+    recent: deque = field(default_factory=lambda: deque(maxlen=1024))
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: int) -> float:
+        if len(self.recent) < 2:
+            return self.recent[0] if self.recent else 0.0
+        return quantiles(self.recent, n=100)[p - 1]
+
+
+@dataclass
+class QueueMetrics:
+    """Counters, throughput and per-urgency latency for a TicketProcessor."""
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    wait: dict[str, LatencyStats] = field(default_factory=lambda: {u.value: LatencyStats() for u in Urgency})
+    handling: dict[str, LatencyStats] = field(default_factory=lambda: {u.value: LatencyStats() for u in Urgency})
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """Completed tickets per second."""
+        return self.completed / self.elapsed if self.elapsed else 0.0
+
+    def snapshot(self) -> dict:
+        """Flat dict of all metrics, for logging or a metrics exporter."""
+        data = {
+            "submitted": self.submitted, "completed": self.completed, "failed": self.failed,
+            "retries": self.retries, "rate_limited": self.rate_limited, "throughput": self.throughput,
+        }
+        for kind, stats_by_urgency in (("wait", self.wait), ("handling", self.handling)):
+            for urgency, stats in stats_by_urgency.items():
+                data[f"{kind}.{urgency}.count"] = stats.count
+                data[f"{kind}.{urgency}.mean_s"] = stats.mean
+                data[f"{kind}.{urgency}.p95_s"] = stats.percentile(95)
+        return data
+
+    def __str__(self) -> str:
+        waits = ", ".join(f"{urgency} {stats.percentile(95):.2f}s"
+                          for urgency, stats in reversed(self.wait.items()) if stats.count)
+        return (f"{self.completed} completed, {self.failed} failed, {self.retries} retries "
+                f"in {self.elapsed:.1f}s ({self.throughput:.1f} tickets/s); p95 wait: {waits or 'n/a'}")
+
+
+# ============================================
+# Processor
+# ============================================
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds from the Retry-After header of an API error, if any."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class TicketProcessor:
+    """Worker pool that handles queued tickets with bounded concurrency."""
+
+    def __init__(self, handler: Callable[[Ticket], Awaitable], queue: TicketQueue = None,
+                 concurrency: int = 4, reserved: int = 1, urgent: Urgency = Urgency.HIGH,
+                 max_attempts: int = 4, base_delay: float = 1.0, max_delay: float = 60.0,
+                 poll_interval: float = 0.1):
+        """
+        Args:
+            handler: Async function that handles one ticket (e.g. handle_ticket)
+            queue: Ticket queue (default: MemoryTicketQueue)
+            concurrency: Tickets handled at once
+            reserved: Workers (out of `concurrency`) kept for tickets at `urgent` or above
+            urgent: Lowest urgency the reserved workers take
+            max_attempts: Attempts per ticket before it is marked failed
+            base_delay: Backoff before the first retry, doubled per attempt
+            max_delay: Longest backoff
+            poll_interval: How often idle workers check for retried or externally queued jobs
+        """
+        if not 0 <= reserved < concurrency:
+            raise ValueError("reserved must be less than concurrency")
+        self.handler = handler
+        self.queue = queue or MemoryTicketQueue()
+        self.concurrency = concurrency
+        self.reserved = reserved
+        self.urgent = urgent
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.metrics = QueueMetrics()
+        self._changed = asyncio.Event()
+        self._paused_until = 0.0  # time.monotonic() until which no jobs are claimed
+        self._stopping = False
+
+    def _notify(self):
+        self._changed.set()  # Wakes every idle worker
+        self._changed.clear()
+
+    async def submit(self, ticket: Ticket) -> Job:
+        job = await self.queue.put(ticket)
+        self.metrics.submitted += 1
+        self._notify()
+        return job
+
+    def stop(self):
+        """Let workers finish their current ticket, then exit."""
+        self._stopping = True
+        self._notify()
+
+    async def run(self, drain: bool = True):
+        """
+        Run the workers.
+
+        Args:
+            drain: Return once the queue is empty; otherwise run until stop()
+        """
+        self._stopping = False
+        self.metrics.started_at = time.perf_counter()
+        self.metrics.finished_at = None
+        min_priorities = [self.urgent.priority] * self.reserved + [0] * (self.concurrency - self.reserved)
+        try:
+            await asyncio.gather(*(self._worker(p, drain) for p in min_priorities))
+        finally:
+            self.metrics.finished_at = time.perf_counter()
+
+    async def _worker(self, min_priority: int, drain: bool):
+        while not self._stopping:
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+            job = await self.queue.claim(min_priority)
+            if job is None:
+                if drain and await self.queue.pending() == 0:
+                    return
+                try:
+                    await asyncio.wait_for(self._changed.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._process(job)
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay = random.uniform(delay / 2, delay)  # Jitter, so retries don't arrive together
+        return max(delay, retry_after(error) or 0.0)
+
+    async def _process(self, job: Job):
+        urgency = ticket_urgency(job.ticket).value
+        if job.attempts == 1:
+            self.metrics.wait[urgency].record(time.time() - job.enqueued_at)
+        started = time.perf_counter()
+        try:
+            await self.handler(job.ticket)
+        except asyncio.CancelledError:
+            await self.queue.retry(job, 0.0)  # Hand it back rather than leave the customer blocked
+            raise
+        except RETRYABLE_ERRORS as e:
+            job.error = f"{type(e).__name__}: {e}"
+            if job.attempts >= self.max_attempts:
+                self.metrics.failed += 1
+                await self.queue.complete(job, failed=True)
+            else:
+                delay = self._backoff(job.attempts, e)
+                if isinstance(e, openai.RateLimitError):
+                    self.metrics.rate_limited += 1
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                self.metrics.retries += 1
+                await self.queue.retry(job, delay)
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            self.metrics.failed += 1
+            await self.queue.complete(job, failed=True)
+        else:
+            self.metrics.handling[urgency].record(time.perf_counter() - started)
+            self.metrics.completed += 1
+            await self.queue.complete(job)
+        finally:
+            self._notify()
@@ -0,0 +1,57 @@
+"""
+Customer Support Agent - Tickets
+Ticket data model shared by the agents and the ticket queue.
+"""
+from dataclasses import asdict, dataclass
+from enum import Enum
+
+
+class TicketCategory(Enum):
+    BILLING = "billing"
+    TECHNICAL = "technical"
+    GENERAL = "general"
+    FEEDBACK = "feedback"
+
+
+class Urgency(Enum):
+    LOW = "low"
+    MEDIUM = "medium"
+    HIGH = "high"
+    CRITICAL = "critical"
+
+    @property
+    def priority(self) -> int:
+        """Scheduling priority, higher first (LOW=0 ... CRITICAL=3)."""
+        return list(Urgency).index(self)
+
+
+@dataclass
+class Ticket:
+    """Support ticket data structure."""
+    id: str
+    customer_name: str
+    email: str
+    message: str
+    category: TicketCategory = None
+    urgency: Urgency = None
+    confidence: float = None  # Triage's confidence in category and urgency (0-1)
+
+    def classify(self, category: TicketCategory, urgency: Urgency, confidence: float):
+        """Set the triage result; an urgency set earlier (e.g. on submission) is never lowered."""
+        self.category = category
+        if self.urgency is None or urgency.priority > self.urgency.priority:
+            self.urgency = urgency
+        self.confidence = min(max(confidence, 0.0), 1.0)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["category"] = self.category.value if self.category else None
+        data["urgency"] = self.urgency.value if self.urgency else None
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Ticket":
+        data = dict(data)
+        data["category"] = TicketCategory(data["category"]) if data.get("category") else None
+        data["urgency"] = Urgency(data["urgency"]) if data.get("urgency") else None
+        return cls(**data)
@@ -2,16 +2,31 @@
 Data Analyst Agent
 An AI agent that analyzes data, generates insights, and creates reports.
 
-Uses the Responses API with code_interpreter for calculations.
+Uses the Responses API with code_interpreter for calculations. Quick stats
+and trend analysis are computed locally (stats_engine.py) and only the
+summary is sent to the model.
 """
+import sys
+from pathlib import Path
 from openai import OpenAI
 from dotenv import load_dotenv
 import json
 
+sys.path.append(str(Path(__file__).resolve().parent.parent / "common"))
+from token_budget import TokenBudget, trim_lines
+from stats_engine import Table
+from streaming_ingest import profile_csv
+
 load_dotenv()
 
 client = OpenAI()
 
+# Tokens reserved for the instructions wrapped around the dataset
+PROMPT_OVERHEAD_TOKENS = 1000
+
+# File name of the dataset inside pooled code_interpreter containers
+DATA_FILE = "data.csv"
+
 
 # Sample dataset for demonstration
 SAMPLE_DATA = """
@@ -34,20 +49,58 @@ Dec,95000,350,12000,0.01
 class DataAnalystAgent:
     """Agent that analyzes data and generates insights."""
     
-    def __init__(self, model: str = "gpt-4o-mini"):
+    def __init__(self, model: str = "gpt-4o-mini", client: OpenAI = client,
+                 max_input_tokens: int = None, container_pool=None):
         self.model = model
+        self.client = client  # Any client with responses.create(), e.g. CachedClient
+        self.budget = TokenBudget(model, max_input_tokens=max_input_tokens)
+        # Optional ContainerPool (Built-in-Tools/code-interpreter-agent/python/container_pool.py):
+        # datasets are uploaded once as files and containers stay warm between calls
+        self.container_pool = container_pool
+    
+    def _fit_data(self, data: str) -> str:
+        """Trim the dataset to whole rows (header kept) that fit the input budget."""
+        limit = self.budget.limit - PROMPT_OVERHEAD_TOKENS
+        fitted, dropped = trim_lines(data.strip(), limit, self.model, keep_header=True)
+        if dropped:
+            print(f"✂️  Dataset trimmed to {limit} tokens ({dropped} rows omitted)")
+            fitted += f"\n... ({dropped} more rows omitted to fit the context window)"
+        return fitted
+    
+    def _prompt_data(self, data: str) -> str:
+        """Dataset for the prompt: a pointer to the uploaded file with a container pool, else the CSV."""
+        if self.container_pool is not None:
+            return f"(the complete dataset is uploaded to the code interpreter as {DATA_FILE})"
+        return self._fit_data(data)
+    
+    def _code_interpreter(self, prompt: str, data: str):
+        """Run a code_interpreter request, in a pooled container when one is configured."""
+        if self.container_pool is not None:
+            return self.container_pool.run(
+                prompt, files={DATA_FILE: data.strip().encode("utf-8")}, model=self.model
+            )
+        return self.client.responses.create(
+            model=self.model,
+            input=prompt,
+            tools=[
+                {
+                    "type": "code_interpreter",
+                    "container": {"type": "auto"}
+                }
+            ]
+        )
     
     def analyze(self, data: str, question: str) -> str:
         """Analyze data and answer the question."""
         print(f"📊 Analyzing data...")
         print(f"❓ Question: {question}\n")
+        prompt_data = self._prompt_data(data)
         
-        response = client.responses.create(
-            model=self.model,
-            input=f"""You are a data analyst. Analyze this data and answer the question.
+        response = self._code_interpreter(
+            f"""You are a data analyst. Analyze this data and answer the question.
 
 DATA (CSV format):
-{data}
+{prompt_data}
 
 QUESTION: {question}
 
@@ -63,50 +116,128 @@ Format your response with:
 - Recommendations (what to do)
 
 Use markdown formatting.""",
-            tools=[
-                {
-                    "type": "code_interpreter",
-                    "container": {"type": "auto"}
-                }
-            ]
+            data,
         )
         
         return response.output_text
     
-    def quick_stats(self, data: str) -> str:
-        """Generate quick statistical summary."""
-        print("📈 Generating quick stats...")
+    def _local_summary(self, data: str) -> str:
+        """Parse the full dataset and compute its statistics locally."""
+        table = Table.from_csv(data)
+        print(f"🧮 Computed stats locally ({table.n_rows} rows, {len(table.columns)} columns)")
+        return table.summarize()
+    
+    def analyze_file(self, source, question: str, sample_rows: int = 50) -> str:
+        """
+        Analyze a CSV file or binary stream of any size.
         
-        response = client.responses.create(
+        The data is streamed once with bounded memory; the model gets the
+        schema, statistics over every row and a random sample instead of
+        the raw data.
+        
+        Args:
+            source: CSV file path or binary stream (e.g. sys.stdin.buffer)
+            question: Question to answer
+            sample_rows: Rows in the representative sample
+        """
+        print(f"📊 Profiling {source if isinstance(source, (str, Path)) else 'stream'}...")
+        print(f"❓ Question: {question}\n")
+        profile = profile_csv(source)
+        print(f"🧮 Streamed {profile.rows} rows in {profile.blocks} blocks")
+        
+        response = self.client.responses.create(
             model=self.model,
-            input=f"""Analyze this CSV data and provide:
+            input=f"""You are a data analyst. Answer the question about this dataset.
+
+The statistics below were computed over every row; the sample is a uniform random
+sample of rows for context. Base numbers on the statistics, not on the sample.
+
+{profile.summarize(sample_rows=sample_rows)}
+
+QUESTION: {question}
+
+Format your response with:
+- Key Metrics (numbers and percentages)
+- Insights (what the data shows)
+- Recommendations (what to do)
+
+Use markdown formatting.""",
+        )
+        
+        return response.output_text
+    
+    def quick_stats(self, data: str, local: bool = True) -> str:
+        """
+        Generate quick statistical summary.
+        
+        Args:
+            data: CSV data
+            local: Compute the statistics locally and send only the summary;
+                if False, the model computes them with code_interpreter
+        """
+        print("📈 Generating quick stats...")
+        if local:
+            response = self.client.responses.create(
+                model=self.model,
+                input=f"""These statistics were computed from the complete dataset:
+
+{self._local_summary(data)}
+
+Present them as a clear table (min, max, mean, median per numeric column, totals and averages)
+and point out any notable patterns. Use the numbers as given; don't recompute them.""",
+            )
+            return response.output_text
+        
+        prompt_data = self._prompt_data(data)
+        
+        response = self._code_interpreter(
+            f"""Analyze this CSV data and provide:
 1. Basic statistics for each numeric column (min, max, mean, median)
 2. Total and averages
 3. Any notable patterns
 
 DATA:
-{data}
+{prompt_data}
 
 Use code interpreter for accurate calculations. Format as a clear table.""",
-            tools=[
-                {
-                    "type": "code_interpreter",
-                    "container": {"type": "auto"}
-                }
-            ]
+            data,
         )
         
         return response.output_text
     
-    def trend_analysis(self, data: str) -> str:
-        """Identify trends in the data."""
+    def trend_analysis(self, data: str, local: bool = True) -> str:
+        """
+        Identify trends in the data.
+        
+        Args:
+            data: CSV time series data
+            local: Compute growth, correlations and seasonality locally and
+                send only the summary; if False, use code_interpreter
+        """
         print("📉 Analyzing trends...")
+        if local:
+            response = self.client.responses.create(
+                model=self.model,
+                input=f"""These statistics were computed from the complete time series:
+
+{self._local_summary(data)}
+
+Report:
+1. Overall trend (increasing/decreasing/stable)
+2. Growth rates (period over period)
+3. Seasonality patterns if any
+4. Correlation between variables
+
+Use the numbers as given and provide specific figures; don't recompute them.""",
+            )
+            return response.output_text
         
-        response = client.responses.create(
-            model=self.model,
-            input=f"""Analyze trends in this time series data:
+        prompt_data = self._prompt_data(data)
+        
+        response = self._code_interpreter(
+            f"""Analyze trends in this time series data:
 
-{data}
+{prompt_data}
 
 Calculate and report:
 1. Overall trend (increasing/decreasing/stable)
@@ -115,12 +246,7 @@ Calculate and report:
 4. Correlation between variables
 
 Use code interpreter for calculations. Provide specific numbers.""",
-            tools=[
-                {
-                    "type": "code_interpreter",
-                    "container": {"type": "auto"}
-                }
-            ]
+            data,
         )
         
         return response.output_text
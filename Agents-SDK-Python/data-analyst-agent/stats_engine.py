@@ -0,0 +1,394 @@
+"""
+Data Analyst Agent - Local Stats Engine
+Compute descriptive statistics, growth, correlations and seasonality locally.
+
+The CSV is parsed once into typed NumPy columns (numeric, time, categorical)
+and every statistic is a vectorized pass over those arrays. Only the compact
+markdown summary is sent to the model, so the model explains numbers instead
+of computing them in a code_interpreter container.
+"""
+import csv
+import gc
+import io
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+MISSING_VALUES = {"", "na", "n/a", "nan", "null", "none", "-"}
+MONTHS = {
+    name: i + 1
+    for i, names in enumerate(zip(
+        ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"],
+        ["january", "february", "march", "april", "may", "june", "july", "august",
+         "september", "october", "november", "december"],
+    ))
+    for name in names
+}
+MONTH_LABELS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+WEEKDAY_LABELS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+DESCRIBE_KEYS = ("min", "p25", "median", "mean", "p75", "max", "std", "sum")
+MIN_NUMERIC_SHARE = 0.95  # Share of non-missing cells that must parse for a numeric column
+
+
+@dataclass
+class Column:
+    """One typed column."""
+    name: str
+    kind: str  # "numeric", "time" or "categorical"
+    values: np.ndarray  # float64 (NaN = missing), datetime64[D] / month number, or str
+    period: Optional[int] = None  # Seasonal period implied by a time column
+    phase: Optional[np.ndarray] = None  # Position of each row within that period
+    phase_labels: Optional[list[str]] = None
+    frequency: str = ""
+
+
+# ============================================
+# Parsing
+# ============================================
+
+def _missing_mask(raw: np.ndarray) -> np.ndarray:
+    return np.isin(np.char.lower(raw), list(MISSING_VALUES))
+
+
+def parse_float(cell: str) -> Optional[float]:
+    try:
+        return float(cell.replace(",", "").replace("$", "").replace("%", ""))
+    except ValueError:
+        return None
+
+
+def parse_numeric(cells: Sequence[str]) -> Optional[np.ndarray]:
+    """Parse a column of strings to float64, or None if it isn't numeric."""
+    try:
+        return np.array(cells, dtype=np.float64)  # Fast path: clean numbers only
+    except ValueError:
+        pass
+
+    raw = np.char.strip(np.array(cells, dtype=str))
+    missing = _missing_mask(raw)
+    present = int((~missing).sum())
+    # Text columns (names, dates, categories) fail on a small sample; don't scan them all
+    sample = raw[~missing][:200]
+    failures = sum(parse_float(cell) is None for cell in sample)
+    if not present or failures > len(sample) * (1 - MIN_NUMERIC_SHARE):
+        return None
+
+    # Slow path: missing markers, currency symbols, thousands separators, percentages
+    cleaned = np.where(missing, "nan", raw)
+    cleaned = np.char.replace(np.char.replace(np.char.replace(cleaned, ",", ""), "$", ""), "%", "")
+    try:
+        return cleaned.astype(np.float64)
+    except ValueError:
+        pass
+    values = np.full(len(raw), np.nan)
+    parsed = 0
+    for i in np.flatnonzero(~missing):
+        try:
+            values[i] = float(cleaned[i])
+            parsed += 1
+        except ValueError:
+            pass
+    return values if parsed / present >= MIN_NUMERIC_SHARE else None
+
+
+def parse_time(name: str, raw: np.ndarray) -> Optional[Column]:
+    """Recognize month names or ISO dates; returns a time Column or None."""
+    lowered = np.char.lower(np.char.strip(raw))
+    months = np.array([MONTHS.get(v, 0) for v in lowered[:1000]])
+    if len(months) and (months > 0).all():
+        values = np.array([MONTHS.get(v, 0) for v in lowered])
+        if (values > 0).all():
+            return Column(name, "time", values, period=12, phase=values - 1,
+                          phase_labels=MONTH_LABELS, frequency="monthly")
+
+    try:
+        dates = raw.astype("datetime64[D]")
+    except ValueError:
+        return None
+    dated = dates[~np.isnat(dates)]
+    if not len(dated):
+        return None
+    column = Column(name, "time", dates)
+    steps = np.diff(np.sort(dated)).astype(np.int64)
+    step = float(np.median(steps)) if len(steps) else 0.0
+    if step <= 1.5:
+        weekday = (dates.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+        column.period, column.phase, column.phase_labels, column.frequency = 7, weekday, WEEKDAY_LABELS, "daily"
+    elif 27 <= step <= 32:
+        month = dates.astype("datetime64[M]").astype(np.int64) % 12
+        column.period, column.phase, column.phase_labels, column.frequency = 12, month, MONTH_LABELS, "monthly"
+    elif 88 <= step <= 93:
+        quarter = dates.astype("datetime64[M]").astype(np.int64) % 12 // 3
+        column.period, column.phase, column.phase_labels = 4, quarter, ["Q1", "Q2", "Q3", "Q4"]
+        column.frequency = "quarterly"
+    elif 6 <= step <= 8:
+        column.frequency = "weekly"
+    return column
+
+
+class Table:
+    """A CSV parsed once into typed columns."""
+
+    def __init__(self, columns: list[Column]):
+        self.columns = columns
+        self.n_rows = len(columns[0].values) if columns else 0
+        self.undated_rows = 0  # Rows dropped for a missing or invalid date
+
+    @classmethod
+    def from_rows(cls, header: list[str], rows: list[list[str]]) -> "Table":
+        width = len(header)
+        rows = [row if len(row) == width else row[:width] + [""] * (width - len(row))
+                for row in rows if row and any(row)]
+        cells_by_column = list(zip(*rows)) if rows else [() for _ in header]
+
+        columns = []
+        for name, cells in zip(header, cells_by_column):
+            values = parse_numeric(cells)
+            if values is not None:
+                columns.append(Column(name, "numeric", values))
+                continue
+            raw = np.char.strip(np.array(cells, dtype=str))
+            time_column = parse_time(name, raw)
+            columns.append(time_column or Column(name, "categorical", raw))
+
+        table = cls(columns)
+        time_column = table.time_column
+        if time_column is not None and time_column.values.dtype.kind == "M":
+            # Rows without a date can't be placed in time order, so they would skew the trends
+            dated = np.flatnonzero(~np.isnat(time_column.values))
+            order = dated[np.argsort(time_column.values[dated], kind="stable")]
+            if len(order) < table.n_rows or (order != np.arange(len(order))).any():
+                table.undated_rows = table.n_rows - len(order)
+                table._reorder(order)
+        return table
+
+    @classmethod
+    def from_csv(cls, text: str) -> "Table":
+        """Parse CSV text (first non-empty line is the header)."""
+        reader = csv.reader(io.StringIO(text.strip()))
+        header = [h.strip() for h in next(reader, [])]
+        # Millions of small row lists make the cyclic GC rescan the heap repeatedly
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return cls.from_rows(header, list(reader))
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _reorder(self, order: np.ndarray):
+        """Keep the rows at `order`, in that order."""
+        self.n_rows = len(order)
+        for column in self.columns:
+            column.values = column.values[order]
+            if column.phase is not None:
+                column.phase = column.phase[order]
+
+    @property
+    def numeric(self) -> list[Column]:
+        return [c for c in self.columns if c.kind == "numeric"]
+
+    @property
+    def time_column(self) -> Optional[Column]:
+        return next((c for c in self.columns if c.kind == "time"), None)
+
+    def summarize(self, max_correlations: int = 10) -> str:
+        return summarize(self, max_correlations)
+
+
+# ============================================
+# Statistics
+# ============================================
+
+def describe(values: np.ndarray) -> dict:
+    """Descriptive statistics of a numeric column, ignoring missing values."""
+    present = values[~np.isnan(values)]
+    stats = {"count": int(present.size), "missing": int(values.size - present.size)}
+    if present.size == 0:
+        return stats
+    p25, median, p75 = np.percentile(present, [25, 50, 75])
+    stats.update(
+        min=float(present.min()), p25=float(p25), median=float(median), mean=float(present.mean()),
+        p75=float(p75), max=float(present.max()), std=float(present.std(ddof=1)) if present.size > 1 else 0.0,
+        sum=float(present.sum()),
+    )
+    return stats
+
+
+def growth(values: np.ndarray) -> Optional[dict]:
+    """Period-over-period growth and linear trend of a series (in row order)."""
+    mask = ~np.isnan(values)
+    series = values[mask]
+    if series.size < 2:
+        return None
+
+    previous, current = series[:-1], series[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pop = np.where(previous != 0, (current - previous) / np.abs(previous), np.nan)
+    pop = pop[np.isfinite(pop)]
+
+    x = np.flatnonzero(mask).astype(np.float64)
+    slope, intercept = np.polyfit(x, series, 1)
+    fitted = slope * x + intercept
+    total = ((series - series.mean()) ** 2).sum()
+    r2 = 1 - ((series - fitted) ** 2).sum() / total if total else 0.0
+
+    first, last = float(series[0]), float(series[-1])
+    periods = series.size - 1
+    cagr = (last / first) ** (1 / periods) - 1 if first > 0 and last > 0 else None
+    relative_slope = slope / abs(series.mean()) if series.mean() else 0.0
+    if r2 < 0.3 or abs(relative_slope) < 0.005:
+        trend = "stable"
+    else:
+        trend = "increasing" if slope > 0 else "decreasing"
+
+    return {
+        "first": first, "last": last,
+        "total_change": (last - first) / abs(first) if first else None,
+        "mean_pop": float(pop.mean()) if pop.size else None,
+        "median_pop": float(np.median(pop)) if pop.size else None,
+        "cagr": cagr, "slope": float(slope), "r2": float(r2), "trend": trend,
+    }
+
+
+def correlations(columns: list[Column]) -> list[tuple[str, str, float]]:
+    """Pairwise Pearson correlations, strongest first (rows with missing values are skipped)."""
+    if len(columns) < 2:
+        return []
+    matrix = np.column_stack([c.values for c in columns])
+    matrix = matrix[~np.isnan(matrix).any(axis=1)]
+    if matrix.shape[0] < 3:
+        return []
+    std = matrix.std(axis=0)
+    keep = std > 0
+    names = [c.name for c, k in zip(columns, keep) if k]
+    if len(names) < 2:
+        return []
+    r = np.corrcoef(matrix[:, keep], rowvar=False)
+    upper = np.triu_indices(len(names), k=1)
+    pairs = [(names[i], names[j], float(r[i, j])) for i, j in zip(*upper)]
+    return sorted(pairs, key=lambda p: abs(p[2]), reverse=True)
+
+
+def seasonality(values: np.ndarray, period: int, phase: np.ndarray = None) -> Optional[dict]:
+    """
+    Seasonal strength and per-phase index of a series.
+
+    Strength is the autocorrelation of the detrended series at lag `period`;
+    the index is each phase's mean divided by the overall mean. Needs at
+    least two full periods.
+    """
+    mask = ~np.isnan(values)
+    series = values[mask]
+    if period < 2 or series.size < 2 * period:
+        return None
+    phase = (np.arange(values.size) % period if phase is None else phase)[mask]
+
+    x = np.arange(series.size, dtype=np.float64)
+    detrended = series - np.polyval(np.polyfit(x, series, 1), x)
+    centered = detrended - detrended.mean()
+    denominator = (centered ** 2).sum()
+    strength = float((centered[period:] * centered[:-period]).sum() / denominator) if denominator else 0.0
+
+    counts = np.bincount(phase, minlength=period)
+    sums = np.bincount(phase, weights=series, minlength=period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        index = (sums / counts) / series.mean() if series.mean() else np.full(period, np.nan)
+    return {"strength": strength, "index": index}
+
+
+# ============================================
+# Summary
+# ============================================
+
+def format_number(value: Optional[float]) -> str:
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return "-"
+    if abs(value) >= 1000:
+        return f"{value:,.0f}"
+    return f"{value:.4g}"
+
+
+def format_percent(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:+.1%}"
+
+
+def summarize(table: Table, max_correlations: int = 10) -> str:
+    """Compact markdown summary of every statistic, ready to put in a prompt."""
+    numeric = table.numeric
+    time_column = table.time_column
+    categorical = [c for c in table.columns if c.kind == "categorical"]
+
+    shape = f"{table.n_rows} rows, {len(table.columns)} columns ({len(numeric)} numeric"
+    if time_column is not None:
+        shape += f", time: {time_column.name}{f' ({time_column.frequency})' if time_column.frequency else ''}"
+    if categorical:
+        shape += f", {len(categorical)} categorical"
+    lines = [f"Dataset: {shape})"]
+    if table.undated_rows:
+        lines.append(f"Rows left out for a missing or invalid {time_column.name}: {table.undated_rows}")
+    lines.append("")
+
+    if numeric:
+        lines += [
+            "### Descriptive Statistics",
+            "| Column | Count | Missing | Min | P25 | Median | Mean | P75 | Max | Std | Sum |",
+            "|---|---|---|---|---|---|---|---|---|---|---|",
+        ]
+        for column in numeric:
+            s = describe(column.values)
+            lines.append(
+                f"| {column.name} | {s['count']} | {s['missing']} | "
+                + " | ".join(format_number(s.get(k)) for k in DESCRIBE_KEYS)
+                + " |"
+            )
+
+        order = f"ordered by {time_column.name}" if time_column is not None else "in row order"
+        growth_rows = []
+        for column in numeric:
+            g = growth(column.values)
+            if g is None:
+                continue
+            growth_rows.append(
+                f"| {column.name} | {format_number(g['first'])} | {format_number(g['last'])} | "
+                f"{format_percent(g['total_change'])} | {format_percent(g['mean_pop'])} | "
+                f"{format_percent(g['median_pop'])} | {format_percent(g['cagr'])} | "
+                f"{format_number(g['slope'])} | {g['r2']:.2f} | {g['trend']} |"
+            )
+        if growth_rows:
+            lines += [
+                "",
+                f"### Growth ({order})",
+                "| Column | First | Last | Total Change | Mean PoP | Median PoP | CAGR/period | Slope/period | R² | Trend |",
+                "|---|---|---|---|---|---|---|---|---|---|",
+            ] + growth_rows
+
+        pairs = correlations(numeric)[:max_correlations]
+        if pairs:
+            lines += ["", "### Correlations (Pearson, strongest first)"]
+            lines += [f"- {a} ~ {b}: {r:+.2f}" for a, b, r in pairs]
+
+        if time_column is not None and time_column.period:
+            period = time_column.period
+            lines += ["", f"### Seasonality (period {period})"]
+            for column in numeric:
+                season = seasonality(column.values, period, time_column.phase)
+                if season is None:
+                    lines.append(f"- {column.name}: needs at least {2 * period} rows (two full {period}-row cycles)")
+                    continue
+                labels = time_column.phase_labels or [str(i) for i in range(period)]
+                index = season["index"]
+                peak, low = int(np.nanargmax(index)), int(np.nanargmin(index))
+                lines.append(
+                    f"- {column.name}: strength {season['strength']:+.2f}, "
+                    f"peak {labels[peak]} ({index[peak]:.2f}x mean), low {labels[low]} ({index[low]:.2f}x mean)"
+                )
+
+    for column in categorical:
+        values, counts = np.unique(column.values, return_counts=True)
+        top = np.argsort(counts)[::-1][:5]
+        share = ", ".join(f"{values[i]} ({counts[i] / table.n_rows:.0%})" for i in top)
+        lines += ["", f"### {column.name}", f"{len(values)} unique values; top: {share}"]
+
+    return "\n".join(lines).strip()
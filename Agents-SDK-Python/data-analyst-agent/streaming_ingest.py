@@ -0,0 +1,549 @@
+"""
+Data Analyst Agent - Streaming Ingestion
+Profile CSV files of any size with bounded memory.
+
+Files are memory-mapped and read in blocks of whole rows (streams such as
+stdin are read in blocks too). Each block is parsed into typed columns and
+folded into mergeable aggregates:
+
+- Numeric: count, missing, min/max, sum, mean/std (Welford/Chan merge),
+  linear trend against row position, period-over-period growth
+- Correlations: a co-moment matrix over rows with every numeric column set
+- Seasonality: per-period means when there is a month/date column
+- Categorical: heavy-hitter counts (Misra-Gries, bounded number of keys)
+- A uniform reservoir sample of rows, used for quantiles and as the
+  representative sample shown to the model
+
+Memory depends on block size, reservoir size and column count, never on
+the number of rows.
+"""
+import csv
+import gc
+import io
+import mmap
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Union
+
+import numpy as np
+
+from stats_engine import (
+    DESCRIBE_KEYS, Table, format_number, format_percent, parse_float, parse_numeric, parse_time,
+)
+
+DEFAULT_BLOCK_BYTES = 8 * 1024 * 1024
+MAX_CATEGORY_KEYS = 1000
+
+
+# ============================================
+# Reading
+# ============================================
+
+def _row_boundary(data, start: int, target: int, end: int) -> int:
+    """First newline at/after target that isn't inside a quoted field (quote parity from start)."""
+    quotes = data[start:target].count(b'"')
+    cut = target
+    while cut < end:
+        newline = data.find(b"\n", cut, end)
+        if newline == -1:
+            return end
+        quotes += data[cut:newline].count(b'"')
+        if quotes % 2 == 0:
+            return newline + 1
+        cut = newline + 1
+    return end
+
+
+def _iter_mmap_blocks(path: Path, block_bytes: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        if path.stat().st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start, size = 0, len(data)
+            while start < size:
+                end = _row_boundary(data, start, min(start + block_bytes, size), size)
+                yield data[start:end]
+                start = end
+
+
+def _iter_stream_blocks(stream: BinaryIO, block_bytes: int) -> Iterator[bytes]:
+    pending = b""
+    while True:
+        chunk = stream.read(block_bytes)
+        if not chunk:
+            break
+        pending += chunk
+        # Yield up to the last complete row; the unfinished rest waits for more data
+        end = len(pending)
+        while end > 0:
+            newline = pending.rfind(b"\n", 0, end)
+            if newline == -1:
+                break
+            if pending.count(b'"', 0, newline) % 2 == 0:
+                yield pending[:newline + 1]
+                pending = pending[newline + 1:]
+                break
+            end = newline
+    if pending:
+        yield pending
+
+
+def iter_csv_blocks(source: Union[str, Path, BinaryIO],
+                    block_bytes: int = DEFAULT_BLOCK_BYTES) -> Iterator[tuple[list[str], list[list[str]]]]:
+    """
+    Yield (header, rows) blocks from a CSV file path or binary stream.
+
+    Paths are memory-mapped; streams are read block by block. Blocks always
+    end on a row boundary, also when a quoted field contains newlines.
+    """
+    if isinstance(source, (str, Path)):
+        blocks = _iter_mmap_blocks(Path(source), block_bytes)
+    else:
+        blocks = _iter_stream_blocks(source, block_bytes)
+
+    header = None
+    for block in blocks:
+        text = block.decode("utf-8-sig" if header is None else "utf-8", errors="replace")
+        reader = csv.reader(io.StringIO(text))
+        if header is None:
+            header = next((row for row in reader if any(cell.strip() for cell in row)), None)
+            if header is None:
+                continue
+            header = [h.strip() for h in header]
+        rows = [row for row in reader if row]
+        if rows:
+            yield header, rows
+
+
+# ============================================
+# Streaming aggregates
+# ============================================
+
+@dataclass
+class NumericAggregate:
+    """Mergeable moments of one numeric column plus its trend against row position."""
+    count: int = 0
+    missing: int = 0
+    minimum: float = np.inf
+    maximum: float = -np.inf
+    total: float = 0.0
+    mean: float = 0.0
+    m2: float = 0.0
+    mean_x: float = 0.0
+    m2_x: float = 0.0
+    c_xy: float = 0.0
+    first: Optional[float] = None
+    last: Optional[float] = None
+    pop_sum: float = 0.0
+    pop_count: int = 0
+
+    def update(self, values: np.ndarray, positions: np.ndarray):
+        mask = ~np.isnan(values)
+        self.missing += int(values.size - mask.sum())
+        y, x = values[mask], positions[mask].astype(np.float64)
+        if y.size == 0:
+            return
+
+        # Period-over-period growth, including the step across the block boundary
+        series = y if self.last is None else np.concatenate(([self.last], y))
+        previous, current = series[:-1], series[1:]
+        valid = previous != 0
+        pop = (current[valid] - previous[valid]) / np.abs(previous[valid])
+        self.pop_sum += float(pop.sum())
+        self.pop_count += int(pop.size)
+        if self.first is None:
+            self.first = float(y[0])
+        self.last = float(y[-1])
+
+        self.minimum = min(self.minimum, float(y.min()))
+        self.maximum = max(self.maximum, float(y.max()))
+        self.total += float(y.sum())
+
+        # Chan et al. parallel merge of (mean, M2) for y and x, and the x/y co-moment
+        n_b = y.size
+        mean_b, mean_xb = float(y.mean()), float(x.mean())
+        m2_b = float(((y - mean_b) ** 2).sum())
+        m2_xb = float(((x - mean_xb) ** 2).sum())
+        c_b = float(((x - mean_xb) * (y - mean_b)).sum())
+        n = self.count + n_b
+        delta, delta_x = mean_b - self.mean, mean_xb - self.mean_x
+        weight = self.count * n_b / n
+        self.m2 += m2_b + delta ** 2 * weight
+        self.m2_x += m2_xb + delta_x ** 2 * weight
+        self.c_xy += c_b + delta * delta_x * weight
+        self.mean += delta * n_b / n
+        self.mean_x += delta_x * n_b / n
+        self.count = n
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else 0.0
+
+    def trend(self) -> dict:
+        slope = self.c_xy / self.m2_x if self.m2_x else 0.0
+        r2 = self.c_xy ** 2 / (self.m2_x * self.m2) if self.m2_x and self.m2 else 0.0
+        # Change explained by the trend over the whole file, relative to the mean
+        relative_change = slope * (self.count - 1) / abs(self.mean) if self.mean else 0.0
+        if r2 < 0.3 or abs(relative_change) < 0.05:
+            label = "stable"
+        else:
+            label = "increasing" if slope > 0 else "decreasing"
+        return {"slope": slope, "r2": r2, "trend": label}
+
+
+class CoMoments:
+    """Mergeable mean vector and co-moment matrix over complete numeric rows."""
+
+    def __init__(self, width: int):
+        self.count = 0
+        self.mean = np.zeros(width)
+        self.c = np.zeros((width, width))
+
+    def update(self, matrix: np.ndarray):
+        matrix = matrix[~np.isnan(matrix).any(axis=1)]
+        n_b = matrix.shape[0]
+        if n_b == 0:
+            return
+        mean_b = matrix.mean(axis=0)
+        centered = matrix - mean_b
+        c_b = centered.T @ centered
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        self.c += c_b + np.outer(delta, delta) * self.count * n_b / n
+        self.mean += delta * n_b / n
+        self.count = n
+
+    def correlations(self, names: list[str]) -> list[tuple[str, str, float]]:
+        if self.count < 3:
+            return []
+        variance = np.diag(self.c)
+        pairs = []
+        for i in range(len(names)):
+            for j in range(i + 1, len(names)):
+                if variance[i] > 0 and variance[j] > 0:
+                    pairs.append((names[i], names[j], float(self.c[i, j] / np.sqrt(variance[i] * variance[j]))))
+        return sorted(pairs, key=lambda p: abs(p[2]), reverse=True)
+
+
+class HeavyHitters:
+    """Approximate top values with at most max_keys counters (Misra-Gries)."""
+
+    def __init__(self, max_keys: int = MAX_CATEGORY_KEYS):
+        self.max_keys = max_keys
+        self.counts: dict[str, int] = {}
+        self.total = 0
+        self.truncated = False
+
+    def update(self, values: np.ndarray):
+        keys, counts = np.unique(values, return_counts=True)
+        self.total += int(counts.sum())
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.counts[key] = self.counts.get(key, 0) + count
+        if len(self.counts) > self.max_keys:
+            # Subtract the (max_keys + 1)-th largest count from everyone; drop what reaches zero
+            threshold = sorted(self.counts.values(), reverse=True)[self.max_keys]
+            self.counts = {k: c - threshold for k, c in self.counts.items() if c > threshold}
+            self.truncated = True
+
+    def top(self, k: int = 5) -> list[tuple[str, int]]:
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+class Reservoir:
+    """Uniform random sample of rows: keeps the rows with the smallest random keys."""
+
+    def __init__(self, capacity: int, seed: Optional[int] = None):
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        self.keys = np.empty(0)
+        self.positions = np.empty(0, dtype=np.int64)
+        self.rows: list[list[str]] = []
+
+    def update(self, rows: list[list[str]], first_position: int):
+        keys = self.rng.random(len(rows))
+        candidates = np.arange(len(rows))
+        if len(self.keys) >= self.capacity:
+            candidates = candidates[keys < self.keys.max()]
+            if candidates.size == 0:
+                return
+        all_keys = np.concatenate((self.keys, keys[candidates]))
+        all_positions = np.concatenate((self.positions, first_position + candidates))
+        all_rows = self.rows + [rows[i] for i in candidates]
+        keep = np.argpartition(all_keys, self.capacity - 1)[:self.capacity] \
+            if len(all_keys) > self.capacity else np.arange(len(all_keys))
+        self.keys, self.positions = all_keys[keep], all_positions[keep]
+        self.rows = [all_rows[i] for i in keep]
+
+    def sample(self, k: int) -> list[list[str]]:
+        """k rows of the reservoir (still uniform), in file order."""
+        chosen = np.argsort(self.keys)[:k]
+        return [self.rows[i] for i in sorted(chosen, key=lambda i: self.positions[i])]
+
+
+# ============================================
+# Profile
+# ============================================
+
+def _dated(column) -> np.ndarray:
+    """Rows of a time column with a valid date (month names are always valid)."""
+    if column.values.dtype.kind == "M":
+        return ~np.isnat(column.values)
+    return np.ones(len(column.values), dtype=bool)
+
+
+@dataclass
+class DatasetProfile:
+    """Schema, streaming statistics and a representative sample of a CSV."""
+    header: list[str]
+    kinds: dict[str, str]
+    rows: int = 0
+    blocks: int = 0
+    numeric: dict[str, NumericAggregate] = field(default_factory=dict)
+    categorical: dict[str, HeavyHitters] = field(default_factory=dict)
+    co_moments: Optional[CoMoments] = None
+    time_range: Optional[tuple] = None
+    time_frequency: str = ""
+    period: Optional[int] = None  # Seasonal period, fixed by the first block with enough rows
+    phase_sums: dict[str, np.ndarray] = field(default_factory=dict)
+    phase_counts: dict[str, np.ndarray] = field(default_factory=dict)
+    phase_labels: list[str] = field(default_factory=list)
+    reservoir: Optional[Reservoir] = None
+
+    @classmethod
+    def from_first_block(cls, header: list[str], rows: list[list[str]],
+                         reservoir_size: int, seed: Optional[int]) -> "DatasetProfile":
+        """Column types are inferred from the first block and kept for the rest of the file."""
+        table = Table.from_rows(header, rows)
+        kinds = {c.name: c.kind for c in table.columns}
+        numeric_names = [name for name, kind in kinds.items() if kind == "numeric"]
+        profile = cls(header, kinds, reservoir=Reservoir(reservoir_size, seed))
+        profile.numeric = {name: NumericAggregate() for name in numeric_names}
+        profile.categorical = {name: HeavyHitters() for name, kind in kinds.items() if kind == "categorical"}
+        profile.co_moments = CoMoments(len(numeric_names))
+        time_column = table.time_column
+        if time_column is not None:
+            profile.time_frequency = time_column.frequency
+        return profile
+
+    def _time_column(self, cells: tuple, name: str):
+        column = parse_time(name, np.char.strip(np.array(cells, dtype=str)))
+        if column is None:
+            return None
+        if column.values.dtype.kind == "M":
+            dated = column.values[~np.isnat(column.values)]  # parse_time() found at least one
+            low, high = dated.min(), dated.max()
+            self.time_range = (low, high) if self.time_range is None else \
+                (min(self.time_range[0], low), max(self.time_range[1], high))
+        return column
+
+    def _seasonal_phase(self, column) -> Optional[np.ndarray]:
+        """
+        Phase of each row of a block within the seasonal period, or None.
+
+        The period is inferred per block, which is unreliable for short
+        blocks (a single trailing row looks daily), so the first block with
+        a full period of rows fixes it and blocks that disagree are left out
+        of the seasonal profile.
+        """
+        if column is None or not column.period:
+            return None
+        labels = column.phase_labels or []
+        if self.period is None:
+            if np.count_nonzero(_dated(column)) < column.period:
+                return None
+            self.period, self.phase_labels = column.period, labels
+        elif column.period != self.period or labels != self.phase_labels:
+            return None
+        return column.phase
+
+    def update(self, rows: list[list[str]]):
+        """
+        Add a block of rows to the statistics.
+
+        Rows without a valid date have no place in the seasonal profile and
+        are left out of it, as stats_engine leaves them out of the table:
+
+        >>> from stats_engine import Table, seasonality
+        >>> dates = [f"{2020 + i // 12}-{i % 12 + 1:02d}-01" for i in range(48)]
+        >>> dates[4::7] = [""] * len(dates[4::7])
+        >>> text = "date,sales\\n" + "\\n".join(f"{d},{100 + i % 12 * 10 + i}" for i, d in enumerate(dates)) + "\\n"
+        >>> streamed = profile_csv(io.BytesIO(text.encode()))
+        >>> sums, counts = streamed.phase_sums["sales"], streamed.phase_counts["sales"]
+        >>> table = Table.from_csv(text)
+        >>> expected = seasonality(table.numeric[0].values, 12, table.time_column.phase)["index"]
+        >>> bool(np.allclose(sums / counts / (sums.sum() / counts.sum()), expected))
+        True
+        """
+        width = len(self.header)
+        rows = [row if len(row) == width else row[:width] + [""] * (width - len(row)) for row in rows]
+        positions = np.arange(self.rows, self.rows + len(rows))
+        cells_by_column = dict(zip(self.header, zip(*rows)))
+
+        phase = dated = None
+        for name, kind in self.kinds.items():
+            if kind == "time":
+                time_column = self._time_column(cells_by_column[name], name)
+                phase = self._seasonal_phase(time_column)
+                if phase is not None:
+                    dated = _dated(time_column)
+                break
+
+        columns = []
+        for name, aggregate in self.numeric.items():
+            cells = cells_by_column[name]
+            values = parse_numeric(cells)
+            if values is None:
+                # Column turned messy later in the file: unparsable cells count as missing
+                values = np.array([np.nan if (v := parse_float(c)) is None else v for c in cells])
+            aggregate.update(values, positions)
+            columns.append(values)
+            if phase is not None:
+                present = ~np.isnan(values) & dated
+                sums = np.bincount(phase[present], weights=values[present], minlength=self.period)
+                counts = np.bincount(phase[present], minlength=self.period)
+                if name in self.phase_sums:
+                    self.phase_sums[name] += sums
+                    self.phase_counts[name] += counts
+                else:
+                    self.phase_sums[name], self.phase_counts[name] = sums, counts
+        if columns:
+            self.co_moments.update(np.column_stack(columns))
+
+        for name, hitters in self.categorical.items():
+            hitters.update(np.char.strip(np.array(cells_by_column[name], dtype=str)))
+
+        self.reservoir.update(rows, self.rows)
+        self.rows += len(rows)
+        self.blocks += 1
+
+    def quantiles(self) -> dict[str, np.ndarray]:
+        """P25/median/P75 per numeric column, estimated from the reservoir."""
+        if not self.reservoir.rows:
+            return {}
+        table = Table.from_rows(self.header, self.reservoir.rows)
+        estimates = {}
+        for column in table.columns:
+            if column.name in self.numeric and column.kind == "numeric":
+                present = column.values[~np.isnan(column.values)]
+                if present.size:
+                    estimates[column.name] = np.percentile(present, [25, 50, 75])
+        return estimates
+
+    def summarize(self, sample_rows: int = 50, max_correlations: int = 10) -> str:
+        """Schema + statistics + representative sample, as compact markdown."""
+        lines = [f"Dataset: {self.rows} rows, {len(self.header)} columns (streamed in {self.blocks} blocks)", ""]
+
+        lines += ["### Schema", "| Column | Type |", "|---|---|"]
+        lines += [f"| {name} | {self.kinds[name]} |" for name in self.header]
+
+        if self.time_range is not None:
+            low, high = self.time_range
+            frequency = f", {self.time_frequency}" if self.time_frequency else ""
+            lines.append(f"\nTime range: {low} to {high}{frequency}")
+
+        if self.numeric:
+            quantiles = self.quantiles()
+            lines += [
+                "",
+                "### Descriptive Statistics (quartiles estimated from a uniform sample)",
+                "| Column | Count | Missing | " + " | ".join(k.title() for k in DESCRIBE_KEYS) + " |",
+                "|---|---|---|" + "---|" * len(DESCRIBE_KEYS),
+            ]
+            for name, agg in self.numeric.items():
+                p25, median, p75 = quantiles.get(name, (None, None, None))
+                stats = {"min": agg.minimum if agg.count else None, "p25": p25, "median": median,
+                         "mean": agg.mean if agg.count else None, "p75": p75,
+                         "max": agg.maximum if agg.count else None, "std": agg.std, "sum": agg.total}
+                lines.append(f"| {name} | {agg.count} | {agg.missing} | "
+                             + " | ".join(format_number(stats[k]) for k in DESCRIBE_KEYS) + " |")
+
+            lines += [
+                "",
+                "### Growth (in file order)",
+                "| Column | First | Last | Total Change | Mean PoP | Slope/row | R² | Trend |",
+                "|---|---|---|---|---|---|---|---|",
+            ]
+            for name, agg in self.numeric.items():
+                if agg.count < 2:
+                    continue
+                trend = agg.trend()
+                total_change = (agg.last - agg.first) / abs(agg.first) if agg.first else None
+                mean_pop = agg.pop_sum / agg.pop_count if agg.pop_count else None
+                lines.append(
+                    f"| {name} | {format_number(agg.first)} | {format_number(agg.last)} | "
+                    f"{format_percent(total_change)} | {format_percent(mean_pop)} | "
+                    f"{format_number(trend['slope'])} | {trend['r2']:.2f} | {trend['trend']} |"
+                )
+
+            pairs = self.co_moments.correlations(list(self.numeric))[:max_correlations]
+            if pairs:
+                lines += ["", "### Correlations (Pearson, strongest first)"]
+                lines += [f"- {a} ~ {b}: {r:+.2f}" for a, b, r in pairs]
+
+        if self.phase_sums:
+            lines += ["", "### Seasonal Profile (mean per period, relative to overall mean)"]
+            for name, sums in self.phase_sums.items():
+                counts = self.phase_counts[name]
+                overall = sums.sum() / counts.sum() if counts.sum() else 0
+                if not overall:
+                    continue
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    index = (sums / counts) / overall
+                labels = self.phase_labels or [str(i) for i in range(len(index))]
+                peak, low = int(np.nanargmax(index)), int(np.nanargmin(index))
+                lines.append(f"- {name}: peak {labels[peak]} ({index[peak]:.2f}x), "
+                             f"low {labels[low]} ({index[low]:.2f}x)")
+
+        for name, hitters in self.categorical.items():
+            approx = "~" if hitters.truncated else ""
+            top = ", ".join(f"{key!r} ({approx}{count / hitters.total:.0%})" if "\n" in key
+                            else f"{key} ({approx}{count / hitters.total:.0%})" for key, count in hitters.top())
+            distinct = f"over {hitters.max_keys}" if hitters.truncated else str(len(hitters.counts))
+            lines += ["", f"### {name}", f"{distinct} distinct values; top: {top}"]
+
+        sample = self.reservoir.sample(sample_rows)
+        if sample:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator="\n")
+            writer.writerow(self.header)
+            writer.writerows(sample)
+            lines += ["", f"### Representative Sample ({len(sample)} random rows, in file order)",
+                      "```csv", buffer.getvalue().strip(), "```"]
+
+        return "\n".join(lines)
+
+
+def profile_csv(source: Union[str, Path, BinaryIO], block_bytes: int = DEFAULT_BLOCK_BYTES,
+                reservoir_size: int = 10_000, seed: Optional[int] = None) -> DatasetProfile:
+    """
+    Stream a CSV once and build its profile.
+
+    Args:
+        source: File path (memory-mapped) or binary stream (e.g. sys.stdin.buffer)
+        block_bytes: Approximate bytes parsed per block
+        reservoir_size: Rows kept for quantile estimates and the sample
+        seed: Random seed for a reproducible sample
+
+    Returns:
+        DatasetProfile with streaming statistics and a reservoir sample
+    """
+    profile = None
+    gc_enabled = gc.isenabled()
+    gc.disable()  # Row lists are short-lived; the cyclic GC only slows parsing down
+    try:
+        for header, rows in iter_csv_blocks(source, block_bytes):
+            if profile is None:
+                profile = DatasetProfile.from_first_block(header, rows, reservoir_size, seed)
+            profile.update(rows)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    if profile is None:
+        raise ValueError("CSV source is empty")
+    return profile
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] != "-" else sys.stdin.buffer
+    print(profile_csv(source).summarize())
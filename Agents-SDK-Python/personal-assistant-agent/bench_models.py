@@ -0,0 +1,130 @@
+"""
+Personal Assistant - Model Benchmark
+Memory and load time of task records: the previous dataclass vs. the compact one.
+
+The previous Task had a per-object __dict__, an ISO string timestamp made
+in __post_init__, and priority/status as separate strings per record. The
+compact Task is slotted, stores epoch seconds and shares enum members.
+
+Measured for a history of N tasks:
+- memory: bytes per record held after loading the JSON history
+- history size: the JSON history each model writes
+- JSON load: json.loads + building the records
+- row load: building records from stored row tuples (what storage.py does)
+- to_dict: converting every record back to JSON-ready dicts
+
+Usage:
+    python bench_models.py
+    python bench_models.py --sizes 10000 100000 500000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+from models import Task
+
+START = datetime(2025, 1, 1)
+
+
+@dataclass
+class PreviousTask:
+    """The Task model before this change."""
+    id: str
+    title: str
+    due_date: Optional[str] = None
+    priority: str = "medium"
+    status: str = "pending"
+    created_at: str = None
+    version: int = 1
+
+    def __post_init__(self):
+        if self.created_at is None:
+            self.created_at = datetime.now().isoformat()
+
+    def to_dict(self) -> dict:
+        """Hand-written like Task.to_dict, so to_dict times compare the models rather than asdict."""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "due_date": self.due_date,
+            "priority": self.priority,
+            "status": self.status,
+            "created_at": self.created_at,
+            "version": self.version,
+        }
+
+
+def make_tasks(count: int) -> list[dict]:
+    return [
+        {"id": f"task_{i + 1}", "title": f"Task number {i + 1}", "due_date": f"2026-01-{i % 28 + 1:02d}",
+         "priority": ("low", "medium", "high")[i % 3], "status": ("pending", "completed")[i % 2],
+         "created_at": (START + timedelta(seconds=i * 37)).isoformat(), "version": 1}
+        for i in range(count)
+    ]
+
+
+def measure(build, repeat: int = 3) -> tuple[list, float, int]:
+    """(records, best seconds of `repeat` runs, bytes still allocated by the build)."""
+    seconds = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        build()
+        seconds = min(seconds, time.perf_counter() - started)
+    gc.collect()
+    tracemalloc.start()
+    records = build()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return records, seconds, allocated
+
+
+def run(count: int) -> dict[str, tuple[float, float]]:
+    """Metric -> (previous, compact)."""
+    data = make_tasks(count)
+    previous = [PreviousTask(**d) for d in data]
+    compact = [Task.from_dict(d) for d in data]
+
+    # Each model's history as it would write it
+    _, previous_dict_seconds, _ = measure(lambda: [t.to_dict() for t in previous])
+    _, compact_dict_seconds, _ = measure(lambda: [t.to_dict() for t in compact])
+    previous_history = json.dumps([t.to_dict() for t in previous])
+    compact_history = json.dumps([t.to_dict() for t in compact])
+    del previous, compact
+
+    previous, previous_load, previous_bytes = measure(
+        lambda: [PreviousTask(**d) for d in json.loads(previous_history)])
+    compact, compact_load, compact_bytes = measure(lambda: [Task.from_dict(d) for d in json.loads(compact_history)])
+
+    previous_rows = [(t.id, t.title, t.due_date, t.priority, t.status, t.created_at, t.version) for t in previous]
+    compact_rows = [(t.id, t.title, t.due_date, int(t.priority), int(t.status), t.created_at, t.version)
+                    for t in compact]
+    _, previous_rows_seconds, _ = measure(lambda: [PreviousTask(*row) for row in previous_rows])
+    _, compact_rows_seconds, _ = measure(lambda: [Task.from_row(row) for row in compact_rows])
+
+    return {
+        "bytes/task": (previous_bytes / count, compact_bytes / count),
+        "history KB": (len(previous_history) / 1024, len(compact_history) / 1024),
+        "JSON load ms": (previous_load * 1000, compact_load * 1000),
+        "row load ms": (previous_rows_seconds * 1000, compact_rows_seconds * 1000),
+        "to_dict ms": (previous_dict_seconds * 1000, compact_dict_seconds * 1000),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark task record memory and load time")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'tasks':>8} {'metric':<13} {'previous':>10} {'compact':>10} {'change':>8}")
+    for size in args.sizes:
+        for metric, (before, after) in run(size).items():
+            print(f"{size:>8} {metric:<13} {before:>10.1f} {after:>10.1f} {after / before - 1:>+8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Personal Assistant - Note Search Benchmark
+search_notes latency on a large note history, with and without the index.
+
+One user gets N synthetic notes, and other users on the same shard get
+as many again, so the index also holds rows the search has to skip. Word
+frequencies follow a Zipf distribution, so queries range from very
+common words to rare ones. The baseline is what search would cost without
+an index: a LIKE scan over the user's notes.
+
+Usage:
+    python bench_search.py
+    python bench_search.py --notes 100000 --queries 200
+"""
+import argparse
+import asyncio
+import random
+import shutil
+import tempfile
+import time
+from itertools import accumulate
+from pathlib import Path
+from statistics import quantiles
+from models import Note
+from storage import AssistantDB
+
+USER = "power-user"
+
+
+def make_vocabulary(size: int, rng: random.Random) -> list[str]:
+    syllables = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ber", "dan", "gor", "pel", "rin", "tos"]
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_notes(count: int, vocabulary: list[str], rng: random.Random) -> list[Note]:
+    cumulative = list(accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))  # Zipf
+    return [Note(id=f"note_{i + 1}",
+                 content=" ".join(rng.choices(vocabulary, cum_weights=cumulative, k=rng.randint(8, 20))))
+            for i in range(count)]
+
+
+async def timed(call, repeat: int) -> list[float]:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def like_scan(db: AssistantDB, word: str) -> list:
+    """Baseline: no index, scan the user's notes."""
+    shard = db._shard(USER)
+    with shard.read() as conn:
+        return conn.execute("SELECT id, content, created_at FROM notes WHERE user_id = ? AND content LIKE ? "
+                            "LIMIT 10", (USER, f"%{word}%")).fetchall()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark note search")
+    parser.add_argument("--notes", type=int, default=100_000, help="Notes of the searching user")
+    parser.add_argument("--other-users", type=int, default=100, help="Users sharing the shard")
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=100, help="Searches per query type")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        db = AssistantDB(workdir, shards=1)  # Everyone on one shard: the largest index to search
+        started = time.perf_counter()
+        await db.import_user(USER, [], make_notes(args.notes, vocabulary, rng))
+        per_user = args.notes // args.other_users
+        for i in range(args.other_users):
+            await db.import_user(f"user-{i}", [], make_notes(per_user, vocabulary, rng))
+        print(f"🔎 Indexed {args.notes} + {per_user * args.other_users} notes in "
+              f"{time.perf_counter() - started:.1f}s\n")
+
+        add_latencies = await timed(lambda: db.add_note(USER, " ".join(rng.sample(vocabulary, 12))), args.queries)
+
+        def pick(ranks: range) -> str:
+            return vocabulary[rng.choice(ranks)]
+
+        queries = {
+            "common word": lambda: db.search_notes(USER, pick(range(0, 10))),
+            "mid word": lambda: db.search_notes(USER, pick(range(100, 1000))),
+            "rare word": lambda: db.search_notes(USER, pick(range(5000, args.vocabulary))),
+            "two words": lambda: db.search_notes(USER, f"{pick(range(0, 100))} {pick(range(100, 1000))}"),
+            "prefix": lambda: db.search_notes(USER, pick(range(0, 1000))[:4], prefix=True),
+        }
+        print(f"{'query':<14} {'p50':>8} {'p95':>8}")
+        for name, query in queries.items():
+            cuts = quantiles(await timed(query, args.queries), n=20)
+            print(f"{name:<14} {cuts[9] * 1000:>6.2f}ms {cuts[18] * 1000:>6.2f}ms")
+        cuts = quantiles(add_latencies, n=20)
+        print(f"{'take_note':<14} {cuts[9] * 1000:>6.2f}ms {cuts[18] * 1000:>6.2f}ms  (insert + index update)")
+
+        scan = await timed(lambda: db._run(like_scan, db, pick(range(5000, args.vocabulary))), 10)
+        print(f"\nWithout the index (LIKE scan, rare word): {sorted(scan)[len(scan) // 2] * 1000:.1f}ms")
+        db.close()
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Personal Assistant - Multi-User Benchmark
+Many users calling the storage concurrently, as their tool calls would.
+
+Every user adds tasks, lists them, completes some and reads counts, all at
+the same time. Each user also has a task that several requests rename at
+once (read, append to the title, update with a version check, retry on
+conflict), so lost writes show up as missing appends.
+
+Usage:
+    python bench_users.py
+    python bench_users.py --users 5000 --tasks 10 --shards 1 8 16
+"""
+import argparse
+import asyncio
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from statistics import quantiles
+from models import Priority, Status
+from storage import AssistantDB, ConflictError
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.conflicts = 0
+
+    async def timed(self, call):
+        started = time.perf_counter()
+        result = await call
+        self.latencies.append(time.perf_counter() - started)
+        return result
+
+
+async def rename(db: AssistantDB, user_id: str, task_id: str, recorder: Recorder):
+    """Read-modify-write with optimistic concurrency: retry until our version wins."""
+    while True:
+        task = await recorder.timed(db.get_task(user_id, task_id))
+        try:
+            await recorder.timed(db.update_task(user_id, task, title=task.title + "+"))
+            return
+        except ConflictError:
+            recorder.conflicts += 1
+
+
+async def user_session(db: AssistantDB, user_id: str, tasks: int, writers: int, recorder: Recorder):
+    for i in range(tasks):
+        await recorder.timed(db.add_task(user_id, f"Task {i}", due_date=f"2026-01-{i % 28 + 1:02d}",
+                                         priority=Priority(i % 3)))
+    await recorder.timed(db.query_tasks(user_id, status=Status.PENDING))
+    for i in range(1, tasks + 1, 2):
+        task = await recorder.timed(db.get_task(user_id, f"task_{i}"))
+        await recorder.timed(db.update_task(user_id, task, status=Status.COMPLETED))
+    await recorder.timed(db.task_counts(user_id))
+    await asyncio.gather(*(rename(db, user_id, "task_1", recorder) for _ in range(writers)))
+
+
+async def run(users: int, tasks: int, writers: int, shards: int, readers: int) -> tuple[float, Recorder, int]:
+    workdir = Path(tempfile.mkdtemp())
+    try:
+        db = AssistantDB(workdir, shards=shards, readers=readers)
+        recorder = Recorder()
+        user_ids = [f"user-{i}" for i in range(users)]
+        started = time.perf_counter()
+        await asyncio.gather(*(user_session(db, u, tasks, writers, recorder) for u in user_ids))
+        seconds = time.perf_counter() - started
+
+        lost = 0
+        for user_id in user_ids:
+            task = await db.get_task(user_id, "task_1")
+            lost += writers - task.title.count("+")
+            _, total = await db.query_tasks(user_id, limit=0)
+            lost += tasks - total
+        db.close()
+        return seconds, recorder, lost
+    finally:
+        shutil.rmtree(workdir)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent multi-user storage")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--tasks", type=int, default=10, help="Tasks added per user")
+    parser.add_argument("--writers", type=int, default=4, help="Concurrent renames of one task per user")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--readers", type=int, default=4, help="Read connections per shard")
+    args = parser.parse_args()
+
+    print(f"👥 {args.users} concurrent users, {args.tasks} tasks each, {args.writers} concurrent renames per user\n")
+    print(f"{'shards':>6} {'ops/s':>9} {'p50':>8} {'p99':>8} {'conflicts':>10} {'lost writes':>12}")
+    for shards in args.shards:
+        seconds, recorder, lost = await run(args.users, args.tasks, args.writers, shards, args.readers)
+        cuts = quantiles(recorder.latencies, n=100)
+        print(f"{shards:>6} {len(recorder.latencies) / seconds:>9.0f} {cuts[49] * 1000:>6.1f}ms "
+              f"{cuts[98] * 1000:>6.1f}ms {recorder.conflicts:>10} {lost:>12}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
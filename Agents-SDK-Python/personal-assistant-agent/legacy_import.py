@@ -0,0 +1,31 @@
+"""
+Personal Assistant - Legacy Import
+Moves single-user data from earlier versions into the SQLite storage.
+
+Earlier versions kept everything in `assistant_data.json`; it is read once
+and imported for one user.
+"""
+import json
+from pathlib import Path
+from models import Note, Task
+from storage import AssistantDB
+
+
+async def import_legacy_data(db: AssistantDB, user_id: str, data_file: Path) -> bool:
+    """
+    Import the single-user JSON file into `user_id`'s partition, once.
+
+    Args:
+        db: Storage to import into
+        user_id: Owner of the imported data
+        data_file: JSON data file of earlier versions
+
+    Returns:
+        True if data was imported
+    """
+    if await db.has_user(user_id) or not data_file.exists():
+        return False
+    data = json.loads(data_file.read_text())
+    tasks = [Task.from_dict(t) for t in data.get("tasks", [])]
+    notes = [Note.from_dict(n) for n in data.get("notes", [])]
+    return await db.import_user(user_id, tasks, notes)
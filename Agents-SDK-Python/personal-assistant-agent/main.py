@@ -5,66 +5,52 @@ An AI agent that helps manage tasks, schedules, and daily productivity.
 Uses function tools for task and schedule management.
 """
 import asyncio
-import json
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
-from dataclasses import dataclass, asdict
 from typing import Optional
-from agents import Agent, Runner, function_tool
+from agents import Agent, RunContextWrapper, Runner, function_tool
+from legacy_import import import_legacy_data
+from models import Priority, Status, Task
+from storage import AssistantDB, ConflictError
 
 
-# Data file for persistence
-DATA_FILE = Path("assistant_data.json")
+# SQLite shards for all users; data from earlier versions is imported on first run
+DATA_DIR = Path("assistant_data")
+LEGACY_DATA_FILE = Path("assistant_data.json")
 
+# User for the local demo, and owner of imported data
+DEFAULT_USER = "local"
 
-@dataclass
-class Task:
-    """A task item."""
-    id: str
-    title: str
-    due_date: Optional[str] = None
-    priority: str = "medium"  # low, medium, high
-    status: str = "pending"  # pending, completed
-    created_at: str = None
-    
-    def __post_init__(self):
-        if self.created_at is None:
-            self.created_at = datetime.now().isoformat()
+# Most tasks shown by one list_tasks call
+LIST_LIMIT = 50
 
+# Attempts at a read-modify-write before giving up on concurrent changes
+UPDATE_ATTEMPTS = 3
 
-@dataclass
-class Note:
-    """A quick note."""
-    id: str
-    content: str
-    created_at: str = None
-    
-    def __post_init__(self):
-        if self.created_at is None:
-            self.created_at = datetime.now().isoformat()
+# Most notes shown by one search_notes call
+SEARCH_LIMIT = 10
 
+PRIORITY_ICONS = {Priority.HIGH: "🔴", Priority.MEDIUM: "🟡", Priority.LOW: "🟢"}
 
-# In-memory storage
-tasks: list[Task] = []
-notes: list[Note] = []
 
-
-def load_data():
-    """Load data from file."""
-    global tasks, notes
-    if DATA_FILE.exists():
-        data = json.loads(DATA_FILE.read_text())
-        tasks = [Task(**t) for t in data.get("tasks", [])]
-        notes = [Note(**n) for n in data.get("notes", [])]
+@dataclass
+class AssistantContext:
+    """Run context: the user the tools act for, and the shared database."""
+    user_id: str
+    db: AssistantDB
 
 
-def save_data():
-    """Save data to file."""
-    data = {
-        "tasks": [asdict(t) for t in tasks],
-        "notes": [asdict(n) for n in notes]
-    }
-    DATA_FILE.write_text(json.dumps(data, indent=2))
+def due_range(due: str) -> tuple[Optional[str], Optional[str]]:
+    """(first, last) due date for a due filter: today, week (next 7 days) or overdue."""
+    today = datetime.now().date()
+    if due == "today":
+        return today.isoformat(), today.isoformat()
+    if due == "week":
+        return today.isoformat(), (today + timedelta(days=6)).isoformat()
+    if due == "overdue":
+        return None, (today - timedelta(days=1)).isoformat()
+    raise ValueError(f"Unknown due filter: {due}")
 
 
 # ============================================
@@ -72,7 +58,8 @@ def save_data():
 # ============================================
 
 @function_tool
-def add_task(title: str, due_date: str = None, priority: str = "medium") -> str:
+async def add_task(ctx: RunContextWrapper[AssistantContext], title: str, due_date: str = None,
+                   priority: str = "medium") -> str:
     """
     Add a new task to the task list.
     
@@ -84,17 +71,18 @@ def add_task(title: str, due_date: str = None, priority: str = "medium") -> str:
     Returns:
         Confirmation message
     """
-    task_id = f"task_{len(tasks) + 1}"
-    task = Task(id=task_id, title=title, due_date=due_date, priority=priority)
-    tasks.append(task)
-    save_data()
+    try:
+        level = Priority.parse(priority)
+    except ValueError:
+        return f"❌ Unknown priority: {priority} (use low, medium or high)"
+    await ctx.context.db.add_task(ctx.context.user_id, title, due_date, level)
     
     due_str = f" (due: {due_date})" if due_date else ""
-    return f"✅ Added task: '{title}'{due_str} [{priority} priority]"
+    return f"✅ Added task: '{title}'{due_str} [{level.label} priority]"
 
 
 @function_tool
-def complete_task(task_id: str) -> str:
+async def complete_task(ctx: RunContextWrapper[AssistantContext], task_id: str) -> str:
     """
     Mark a task as completed.
     
@@ -104,50 +92,66 @@ def complete_task(task_id: str) -> str:
     Returns:
         Confirmation message
     """
-    for task in tasks:
-        if task.id == task_id:
-            task.status = "completed"
-            save_data()
+    db, user_id = ctx.context.db, ctx.context.user_id
+    for _ in range(UPDATE_ATTEMPTS):
+        task = await db.get_task(user_id, task_id)
+        if task is None:
+            return f"❌ Task not found: {task_id}"
+        if task.status is Status.COMPLETED:
+            return f"✅ Already completed: '{task.title}'"
+        try:
+            await db.update_task(user_id, task, status=Status.COMPLETED)
             return f"✅ Completed: '{task.title}'"
-    
-    return f"❌ Task not found: {task_id}"
+        except ConflictError:
+            continue  # Changed by a concurrent call: read it again
+    return f"❌ Task {task_id} is being changed by another request, please try again"
 
 
 @function_tool
-def list_tasks(status: str = "all", priority: str = "all") -> str:
+async def list_tasks(ctx: RunContextWrapper[AssistantContext], status: str = "all", priority: str = "all",
+                     due: str = "any") -> str:
     """
     List tasks with optional filtering.
     
     Args:
         status: Filter by status (all, pending, completed)
         priority: Filter by priority (all, low, medium, high)
+        due: Filter by due date (any, today, week, overdue)
     
     Returns:
         Formatted task list
     """
-    filtered = tasks
-    
-    if status != "all":
-        filtered = [t for t in filtered if t.status == status]
-    
-    if priority != "all":
-        filtered = [t for t in filtered if t.priority == priority]
-    
-    if not filtered:
+    try:
+        status_filter = None if status == "all" else Status.parse(status)
+        priority_filter = None if priority == "all" else Priority.parse(priority)
+    except ValueError as e:
+        return f"❌ {e}"
+    shown, total = await ctx.context.db.query_tasks(
+        ctx.context.user_id,
+        status=status_filter,
+        priority=priority_filter,
+        due=None if due == "any" else due_range(due),
+        limit=LIST_LIMIT,
+    )
+    
+    if not shown:
         return "📋 No tasks found matching criteria."
     
     lines = ["📋 Tasks:"]
-    for task in filtered:
-        status_icon = "✅" if task.status == "completed" else "⬜"
-        priority_icon = {"high": "🔴", "medium": "🟡", "low": "🟢"}.get(task.priority, "")
+    for task in shown:
+        status_icon = "✅" if task.status is Status.COMPLETED else "⬜"
+        priority_icon = PRIORITY_ICONS[task.priority]
         due_str = f" (due: {task.due_date})" if task.due_date else ""
         lines.append(f"  {status_icon} {priority_icon} [{task.id}] {task.title}{due_str}")
     
+    if total > len(shown):
+        lines.append(f"  ... and {total - len(shown)} more")
+    
     return "\n".join(lines)
 
 
 @function_tool
-def take_note(content: str) -> str:
+async def take_note(ctx: RunContextWrapper[AssistantContext], content: str) -> str:
     """
     Save a quick note.
     
@@ -157,27 +161,25 @@ def take_note(content: str) -> str:
     Returns:
         Confirmation message
     """
-    note_id = f"note_{len(notes) + 1}"
-    note = Note(id=note_id, content=content)
-    notes.append(note)
-    save_data()
+    await ctx.context.db.add_note(ctx.context.user_id, content)
     
     return f"📝 Note saved: '{content[:50]}...'" if len(content) > 50 else f"📝 Note saved: '{content}'"
 
 
 @function_tool
-def list_notes() -> str:
+async def list_notes(ctx: RunContextWrapper[AssistantContext]) -> str:
     """
     List all notes.
     
     Returns:
         Formatted note list
     """
+    notes = await ctx.context.db.recent_notes(ctx.context.user_id, limit=10)
     if not notes:
         return "📝 No notes found."
     
     lines = ["📝 Notes:"]
-    for note in notes[-10:]:  # Last 10 notes
+    for note in notes:
         preview = note.content[:50] + "..." if len(note.content) > 50 else note.content
         lines.append(f"  • [{note.id}] {preview}")
     
@@ -185,7 +187,31 @@ def list_notes() -> str:
 
 
 @function_tool
-def daily_summary() -> str:
+async def search_notes(ctx: RunContextWrapper[AssistantContext], query: str, prefix: bool = False) -> str:
+    """
+    Search all notes by keywords, best matches first.
+    
+    Args:
+        query: Words the notes must contain
+        prefix: Also match words starting with the query words (e.g. "meet" finds "meeting")
+    
+    Returns:
+        Matching notes
+    """
+    notes = await ctx.context.db.search_notes(ctx.context.user_id, query, limit=SEARCH_LIMIT, prefix=prefix)
+    if not notes:
+        return f"🔎 No notes found for '{query}'."
+    
+    lines = [f"🔎 Notes matching '{query}':"]
+    for note in notes:
+        preview = note.content[:50] + "..." if len(note.content) > 50 else note.content
+        lines.append(f"  • [{note.id}] {preview}")
+    
+    return "\n".join(lines)
+
+
+@function_tool
+async def daily_summary(ctx: RunContextWrapper[AssistantContext]) -> str:
     """
     Generate a summary of today's tasks and notes.
     
@@ -194,22 +220,24 @@ def daily_summary() -> str:
     """
     today = datetime.now().strftime("%Y-%m-%d")
     
-    # Pending tasks
-    pending = [t for t in tasks if t.status == "pending"]
-    due_today = [t for t in pending if t.due_date == today]
-    high_priority = [t for t in pending if t.priority == "high"]
-    
-    # Completed today
-    completed_today = [t for t in tasks if t.status == "completed"]
+    # Pending tasks (index lookups and counts within the user's partition)
+    db, user_id = ctx.context.db, ctx.context.user_id
+    counts = await db.task_counts(user_id)
+    due_today, due_today_count = await db.query_tasks(user_id, status=Status.PENDING, due=(today, today),
+                                                      limit=LIST_LIMIT)
+    high_priority, high_priority_count = await db.query_tasks(user_id, status=Status.PENDING,
+                                                              priority=Priority.HIGH, limit=10)
+    _, overdue = await db.query_tasks(user_id, status=Status.PENDING, due=due_range("overdue"), limit=0)
     
     lines = [
         f"📅 Daily Summary - {today}",
         "",
         f"📊 Overview:",
-        f"  • Pending tasks: {len(pending)}",
-        f"  • Due today: {len(due_today)}",
-        f"  • High priority: {len(high_priority)}",
-        f"  • Completed: {len(completed_today)}",
+        f"  • Pending tasks: {sum(n for (s, _), n in counts.items() if s is Status.PENDING)}",
+        f"  • Due today: {due_today_count}",
+        f"  • Overdue: {overdue}",
+        f"  • High priority: {high_priority_count}",
+        f"  • Completed: {sum(n for (s, _), n in counts.items() if s is Status.COMPLETED)}",
     ]
     
     if due_today:
@@ -217,10 +245,12 @@ def daily_summary() -> str:
         for task in due_today:
             lines.append(f"  • {task.title}")
     
-    if high_priority:
+    if high_priority_count:
         lines.append("\n🔴 High Priority:")
         for task in high_priority:
             lines.append(f"  • {task.title}")
+        if high_priority_count > 10:
+            lines.append(f"  ... and {high_priority_count - 10} more")
     
     return "\n".join(lines)
 
@@ -234,7 +264,7 @@ assistant_agent = Agent(
     instructions="""You are a helpful personal assistant. Help users manage their:
     
     1. Tasks - Add, complete, and organize tasks
-    2. Notes - Take quick notes
+    2. Notes - Take quick notes and search them (use search_notes to find older notes)
     3. Daily planning - Provide summaries and priorities
     
     Be proactive:
@@ -243,19 +273,22 @@ assistant_agent = Agent(
     - Offer to help organize when things get cluttered
     
     Be conversational but efficient. Use the available tools to help users.""",
-    tools=[add_task, complete_task, list_tasks, take_note, list_notes, daily_summary],
+    tools=[add_task, complete_task, list_tasks, take_note, list_notes, search_notes, daily_summary],
 )
 
 
-async def chat(message: str) -> str:
-    """Process a message through the assistant."""
-    result = await Runner.run(assistant_agent, message)
+async def chat(message: str, context: AssistantContext) -> str:
+    """Process a message through the assistant for `context.user_id`."""
+    result = await Runner.run(assistant_agent, message, context=context)
     return result.final_output
 
 
 async def main():
     """Interactive demo of the personal assistant."""
-    load_data()
+    db = AssistantDB(DATA_DIR)
+    if await import_legacy_data(db, DEFAULT_USER, LEGACY_DATA_FILE):
+        print(f"📦 Imported existing tasks and notes for user '{DEFAULT_USER}'")
+    context = AssistantContext(user_id=DEFAULT_USER, db=db)
     
     print("="*50)
     print("🤖 PERSONAL ASSISTANT AGENT")
@@ -270,15 +303,17 @@ async def main():
         "Show me my tasks",
         "Give me today's summary",
         "Take a note: Remember to update the documentation",
+        "Find my notes about documentation",
     ]
     
     for message in demo_messages:
         print(f"\n👤 You: {message}")
-        response = await chat(message)
+        response = await chat(message, context)
         print(f"🤖 Assistant: {response}")
     
+    db.close()
     print("\n" + "="*50)
-    print("Demo complete! Data saved to assistant_data.json")
+    print(f"Demo complete! Data saved to {DATA_DIR}/")
 
 
 if __name__ == "__main__":
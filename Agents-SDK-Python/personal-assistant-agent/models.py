@@ -0,0 +1,124 @@
+"""
+Personal Assistant - Models
+Task and note records.
+
+Records are kept compact, since large histories hold many of them:
+slotted dataclasses (no per-object __dict__), epoch-second timestamps
+instead of ISO strings, priority/status as shared enum members stored as
+small integer codes, and interned due dates (many tasks share one). The
+dict/JSON form ("high"/"pending" labels) is only built by to_dict();
+from_dict() reads it back, including records from earlier versions with
+ISO timestamps.
+"""
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import IntEnum
+from typing import Optional
+
+
+class LabeledCode(IntEnum):
+    """Small integer code with a lowercase label ("high", "pending") for users and JSON."""
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+
+    @classmethod
+    def parse(cls, label: str):
+        """Member for a label such as "high"; ValueError if unknown."""
+        try:
+            return cls[label.upper()]
+        except KeyError:
+            raise ValueError(f"Unknown {cls.__name__.lower()}: {label}") from None
+
+
+class Priority(LabeledCode):
+    LOW = 0
+    MEDIUM = 1
+    HIGH = 2
+
+
+class Status(LabeledCode):
+    PENDING = 0
+    COMPLETED = 1
+
+
+# Members by code and by label, for decoding stored records without enum lookups
+PRIORITIES = tuple(Priority)
+STATUSES = tuple(Status)
+PRIORITY_LABELS = {p.label: p for p in Priority}
+STATUS_LABELS = {s.label: s for s in Status}
+
+
+def now() -> int:
+    """Current time in epoch seconds."""
+    return int(time.time())
+
+
+def to_epoch(value) -> int:
+    """Epoch seconds from an epoch number, or an ISO timestamp (records from earlier versions)."""
+    if isinstance(value, str):
+        return int(datetime.fromisoformat(value).timestamp())
+    return value
+
+
+@dataclass(slots=True)
+class Task:
+    """A task item."""
+    id: str
+    title: str
+    due_date: Optional[str] = None  # YYYY-MM-DD
+    priority: Priority = Priority.MEDIUM
+    status: Status = Status.PENDING
+    created_at: int = field(default_factory=now)  # Epoch seconds
+    version: int = 1  # Incremented on every update (optimistic concurrency)
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "Task":
+        """Task from stored columns (id, title, due_date, priority, status, created_at, version)."""
+        task_id, title, due_date, priority, status, created_at, version = row
+        return cls(task_id, title, due_date and sys.intern(due_date), PRIORITIES[priority], STATUSES[status],
+                   created_at, version)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "due_date": self.due_date,
+            "priority": self.priority.label,
+            "status": self.status.label,
+            "created_at": self.created_at,
+            "version": self.version,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Task":
+        created_at = data.get("created_at")
+        due_date = data.get("due_date")
+        return cls(
+            data["id"],
+            data["title"],
+            due_date and sys.intern(due_date),
+            PRIORITY_LABELS[data.get("priority") or "medium"],
+            STATUS_LABELS[data.get("status") or "pending"],
+            to_epoch(created_at) if created_at is not None else now(),
+            data.get("version", 1),
+        )
+
+
+@dataclass(slots=True)
+class Note:
+    """A quick note."""
+    id: str
+    content: str
+    created_at: int = field(default_factory=now)  # Epoch seconds
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "content": self.content, "created_at": self.created_at}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Note":
+        created_at = data.get("created_at")
+        return cls(data["id"], data["content"], to_epoch(created_at) if created_at is not None else now())
@@ -0,0 +1,439 @@
+"""
+Personal Assistant - Multi-User Storage
+Tasks and notes for many users in one process, in SQLite.
+
+- Partitioning: users are spread over `shards` database files by a stable
+  hash of the user id. Tables are WITHOUT ROWID with the user id leading
+  the primary key, so a user's rows are stored together and every query is
+  a range scan inside that user's partition.
+- WAL: readers never block the writer or each other.
+- Connection pool: each shard has a pool of read connections and one
+  writer connection. Writers to a shard queue on an in-process lock
+  instead of spinning on SQLITE_BUSY; users on different shards write in
+  parallel.
+- Async: calls run on a thread pool sized to the connections, so tools
+  never block the event loop.
+- Optimistic concurrency: tasks carry a version. update_task() applies only
+  if the task still has the version that was read, and raises
+  ConflictError otherwise, so concurrent read-modify-write calls cannot
+  silently overwrite each other.
+- Schema version: each shard records SCHEMA_VERSION in PRAGMA
+  user_version, so a later schema change can recognize and upgrade it.
+- Note search: an FTS5 inverted index in each shard, updated by a trigger
+  as notes are added, with prefix indexes for "meet*"-style queries. Index
+  rows are numbered (user uid << 32 | note seq), so a search only reads
+  the rowid range of one user, newest first. BM25 ranks the newest
+  SEARCH_CANDIDATES matches: exact for selective queries, and a word that
+  is in most notes costs no more than a rare one.
+"""
+import asyncio
+import queue
+import re
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import replace
+from pathlib import Path
+from typing import Iterable, Optional
+from models import PRIORITIES, STATUSES, Note, Priority, Status, Task
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    uid INTEGER NOT NULL,  -- Numeric id within the shard (search index rowid ranges)
+    last_task INTEGER NOT NULL DEFAULT 0,  -- Id counters: task_N, note_N
+    last_note INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE UNIQUE INDEX IF NOT EXISTS users_by_uid ON users (uid);
+CREATE TABLE IF NOT EXISTS tasks (
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    seq INTEGER NOT NULL,  -- Creation order within the user
+    title TEXT NOT NULL,
+    due_date TEXT,
+    priority INTEGER NOT NULL,  -- models.Priority code
+    status INTEGER NOT NULL,  -- models.Status code
+    created_at INTEGER NOT NULL,  -- Epoch seconds
+    version INTEGER NOT NULL,
+    PRIMARY KEY (user_id, id)
+) WITHOUT ROWID;
+CREATE UNIQUE INDEX IF NOT EXISTS tasks_by_seq ON tasks (user_id, seq);
+CREATE INDEX IF NOT EXISTS tasks_by_status ON tasks (user_id, status, priority, seq);
+CREATE INDEX IF NOT EXISTS tasks_by_due ON tasks (user_id, status, due_date) WHERE due_date IS NOT NULL;
+CREATE TABLE IF NOT EXISTS task_counts (  -- Kept up to date by the triggers below
+    user_id TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    priority INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (user_id, status, priority)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS task_counts_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO task_counts VALUES (NEW.user_id, NEW.status, NEW.priority, 1)
+    ON CONFLICT DO UPDATE SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS task_counts_update AFTER UPDATE OF status, priority ON tasks BEGIN
+    UPDATE task_counts SET n = n - 1
+    WHERE user_id = OLD.user_id AND status = OLD.status AND priority = OLD.priority;
+    INSERT INTO task_counts VALUES (NEW.user_id, NEW.status, NEW.priority, 1)
+    ON CONFLICT DO UPDATE SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS task_counts_delete AFTER DELETE ON tasks BEGIN
+    UPDATE task_counts SET n = n - 1
+    WHERE user_id = OLD.user_id AND status = OLD.status AND priority = OLD.priority;
+END;
+CREATE TABLE IF NOT EXISTS notes (
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    created_at INTEGER NOT NULL,
+    PRIMARY KEY (user_id, id)
+) WITHOUT ROWID;
+CREATE UNIQUE INDEX IF NOT EXISTS notes_by_seq ON notes (user_id, seq);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(  -- Index only; text stays in notes
+    content, content='', prefix='2 3 4', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS notes_fts_insert AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts (rowid, content)
+    VALUES (((SELECT uid FROM users WHERE user_id = NEW.user_id) << 32) | NEW.seq, NEW.content);
+END;
+"""
+
+SCHEMA_VERSION = 1  # PRAGMA user_version of a shard with SCHEMA
+
+NEW_UID = "(SELECT COALESCE(MAX(uid), 0) + 1 FROM users)"
+SEARCH_CANDIDATES = 1000  # Newest matches ranked by BM25
+
+TASK_COLUMNS = "id, title, due_date, priority, status, created_at, version"  # Task field order
+NOTE_COLUMNS = "id, content, created_at"
+UPDATABLE_FIELDS = {"title", "due_date", "priority", "status"}
+
+
+class ConflictError(Exception):
+    """The task was changed by someone else since it was read."""
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)  # Explicit transactions
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; a power loss may drop the last commits
+    conn.execute("PRAGMA busy_timeout=5000")  # Other processes sharing the files
+    return conn
+
+
+def match_expression(query: str, prefix: bool = False) -> Optional[str]:
+    """FTS5 query for all words of `query`, each quoted so user input is never parsed as FTS syntax."""
+    words = re.findall(r"\w+", query)
+    if not words:
+        return None
+    suffix = "*" if prefix else ""
+    return " ".join(f'"{word}"{suffix}' for word in words)
+
+
+def _create_schema(conn: sqlite3.Connection):
+    """Create the tables and record the schema version."""
+    try:
+        conn.executescript(f"BEGIN IMMEDIATE; {SCHEMA} PRAGMA user_version = {SCHEMA_VERSION}; COMMIT;")
+    except sqlite3.Error:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+
+
+def _id_number(item_id: str) -> int:
+    _, _, number = item_id.rpartition("_")
+    return int(number) if number.isdigit() else 0
+
+
+class _Shard:
+    """One database file: a writer connection behind a lock and a pool of read connections."""
+
+    def __init__(self, path: Path, readers: int):
+        self.writer = _connect(path)
+        _create_schema(self.writer)
+        self.write_lock = threading.Lock()
+        self.readers: queue.SimpleQueue = queue.SimpleQueue()
+        self.connections = [self.writer]
+        for _ in range(readers):
+            conn = _connect(path)
+            self.readers.put(conn)
+            self.connections.append(conn)
+
+    @contextmanager
+    def read(self):
+        """A pooled connection inside a read transaction (one consistent snapshot)."""
+        conn = self.readers.get()
+        try:
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            finally:
+                conn.execute("COMMIT")
+        finally:
+            self.readers.put(conn)
+
+    @contextmanager
+    def write(self):
+        with self.write_lock:
+            self.writer.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.writer
+            except BaseException:
+                self.writer.execute("ROLLBACK")
+                raise
+            self.writer.execute("COMMIT")
+
+
+class AssistantDB:
+    """Per-user tasks and notes, safe to use from concurrent tool calls."""
+
+    def __init__(self, directory: Path, shards: int = 8, readers: int = 4):
+        """
+        Args:
+            directory: Where the shard files live (created if missing)
+            shards: Database files; fixed once the directory has data
+            readers: Read connections per shard
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        existing = len(list(directory.glob("shard-*.db")))
+        if existing and existing != shards:
+            raise ValueError(f"{directory} holds {existing} shards, not {shards}")
+        self._shards = [_Shard(directory / f"shard-{i}.db", readers) for i in range(shards)]
+        self._executor = ThreadPoolExecutor(max_workers=shards * (readers + 1), thread_name_prefix="assistant-db")
+
+    def _shard(self, user_id: str) -> _Shard:
+        return self._shards[zlib.crc32(user_id.encode()) % len(self._shards)]
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # ============================================
+    # Tasks
+    # ============================================
+
+    async def add_task(self, user_id: str, title: str, due_date: str = None,
+                       priority: Priority = Priority.MEDIUM) -> Task:
+        return await self._run(self._add_task, user_id, title, due_date, priority)
+
+    def _add_task(self, user_id, title, due_date, priority) -> Task:
+        with self._shard(user_id).write() as conn:
+            number = conn.execute(
+                f"INSERT INTO users (user_id, uid, last_task) VALUES (?, {NEW_UID}, 1) "
+                "ON CONFLICT (user_id) DO UPDATE SET last_task = last_task + 1 RETURNING last_task",
+                (user_id,),
+            ).fetchone()[0]
+            task = Task(id=f"task_{number}", title=title, due_date=due_date, priority=priority, version=1)
+            self._insert_tasks(conn, user_id, [(number, task)])
+        return task
+
+    @staticmethod
+    def _insert_tasks(conn: sqlite3.Connection, user_id: str, tasks: Iterable[tuple[int, Task]]):
+        """Insert (seq, task) pairs."""
+        conn.executemany(
+            f"INSERT INTO tasks (user_id, seq, {TASK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ((user_id, seq, task.id, task.title, task.due_date, task.priority, task.status,
+              task.created_at, task.version) for seq, task in tasks),
+        )
+
+    async def get_task(self, user_id: str, task_id: str) -> Optional[Task]:
+        return await self._run(self._get_task, user_id, task_id)
+
+    def _get_task(self, user_id, task_id) -> Optional[Task]:
+        with self._shard(user_id).read() as conn:
+            row = conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE user_id = ? AND id = ?",
+                               (user_id, task_id)).fetchone()
+        return Task.from_row(row) if row else None
+
+    async def update_task(self, user_id: str, task: Task, **changes) -> Task:
+        """
+        Change fields of a task read earlier, if nobody has changed it since.
+
+        Args:
+            user_id: Owner of the task
+            task: The task as read (its version is checked)
+            **changes: New values for title, due_date, priority or status
+
+        Returns:
+            The updated task, with the new version
+
+        Raises:
+            ConflictError: The task was changed or deleted after it was read
+        """
+        if not changes.keys() <= UPDATABLE_FIELDS:
+            raise ValueError(f"Cannot update {sorted(changes.keys() - UPDATABLE_FIELDS)}")
+        return await self._run(self._update_task, user_id, task, changes)
+
+    def _update_task(self, user_id, task: Task, changes: dict) -> Task:
+        assignments = ", ".join(f"{name} = ?" for name in changes)
+        with self._shard(user_id).write() as conn:
+            updated = conn.execute(
+                f"UPDATE tasks SET {assignments}, version = version + 1 "
+                "WHERE user_id = ? AND id = ? AND version = ?",
+                (*changes.values(), user_id, task.id, task.version),
+            ).rowcount
+        if not updated:
+            raise ConflictError(f"{task.id} changed since version {task.version}")
+        return replace(task, **changes, version=task.version + 1)
+
+    async def query_tasks(self, user_id: str, status: Status = None, priority: Priority = None,
+                          due: Optional[tuple[Optional[str], Optional[str]]] = None,
+                          limit: int = 50) -> tuple[list[Task], int]:
+        """
+        Tasks matching the filters, with the total number of matches.
+
+        Args:
+            user_id: Whose tasks
+            status: Only this status (None for all)
+            priority: Only this priority (None for all)
+            due: (first, last) due date, either end open if None; None for no due filter
+            limit: Most tasks returned
+
+        Returns:
+            (tasks in creation order, or by due date with a due filter; total matches)
+        """
+        return await self._run(self._query_tasks, user_id, status, priority, due, limit)
+
+    def _query_tasks(self, user_id, status, priority, due, limit) -> tuple[list[Task], int]:
+        conditions, params = ["user_id = ?"], [user_id]
+        for column, value in (("status", status), ("priority", priority)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        order = "seq"
+        if due is not None:
+            start, end = due
+            conditions.append("due_date IS NOT NULL")
+            if start:
+                conditions.append("due_date >= ?")
+                params.append(start)
+            if end:
+                conditions.append("due_date <= ?")
+                params.append(end)
+            order = "due_date, seq"
+        where = " AND ".join(conditions)
+        # Without a due filter, the total comes from the maintained counts instead of a scan
+        count_sql = (f"SELECT COUNT(*) FROM tasks WHERE {where}" if due is not None
+                     else f"SELECT COALESCE(SUM(n), 0) FROM task_counts WHERE {where}")
+        with self._shard(user_id).read() as conn:
+            rows = conn.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE {where} ORDER BY {order} LIMIT ?",
+                                (*params, limit)).fetchall()
+            total = conn.execute(count_sql, params).fetchone()[0]
+        return [Task.from_row(row) for row in rows], total
+
+    async def task_counts(self, user_id: str) -> Counter:
+        """Number of tasks per (status, priority)."""
+        return await self._run(self._task_counts, user_id)
+
+    def _task_counts(self, user_id) -> Counter:
+        with self._shard(user_id).read() as conn:
+            rows = conn.execute("SELECT status, priority, n FROM task_counts WHERE user_id = ? AND n > 0",
+                                (user_id,)).fetchall()
+        return Counter({(STATUSES[status], PRIORITIES[priority]): n for status, priority, n in rows})
+
+    # ============================================
+    # Notes
+    # ============================================
+
+    async def add_note(self, user_id: str, content: str) -> Note:
+        return await self._run(self._add_note, user_id, content)
+
+    def _add_note(self, user_id, content) -> Note:
+        with self._shard(user_id).write() as conn:
+            number = conn.execute(
+                f"INSERT INTO users (user_id, uid, last_note) VALUES (?, {NEW_UID}, 1) "
+                "ON CONFLICT (user_id) DO UPDATE SET last_note = last_note + 1 RETURNING last_note",
+                (user_id,),
+            ).fetchone()[0]
+            note = Note(id=f"note_{number}", content=content)
+            self._insert_notes(conn, user_id, [(number, note)])
+        return note
+
+    @staticmethod
+    def _insert_notes(conn: sqlite3.Connection, user_id: str, notes: Iterable[tuple[int, Note]]):
+        """Insert (seq, note) pairs."""
+        conn.executemany(f"INSERT INTO notes (user_id, seq, {NOTE_COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+                         ((user_id, seq, note.id, note.content, note.created_at) for seq, note in notes))
+
+    async def recent_notes(self, user_id: str, limit: int = 10) -> list[Note]:
+        """The last `limit` notes, oldest first."""
+        return await self._run(self._recent_notes, user_id, limit)
+
+    def _recent_notes(self, user_id, limit) -> list[Note]:
+        with self._shard(user_id).read() as conn:
+            rows = conn.execute(f"SELECT {NOTE_COLUMNS} FROM notes WHERE user_id = ? ORDER BY seq DESC LIMIT ?",
+                                (user_id, limit)).fetchall()
+        return [Note(*row) for row in reversed(rows)]
+
+    async def search_notes(self, user_id: str, query: str, limit: int = 10, prefix: bool = False) -> list[Note]:
+        """
+        Notes containing every word of `query`, best BM25 match first (among the newest SEARCH_CANDIDATES).
+
+        Args:
+            user_id: Whose notes
+            query: Words to look for (punctuation and search operators are ignored)
+            limit: Most notes returned
+            prefix: Also match words that start with the query words ("meet" finds "meeting")
+
+        Returns:
+            Matching notes, best first
+        """
+        return await self._run(self._search_notes, user_id, query, limit, prefix)
+
+    def _search_notes(self, user_id, query, limit, prefix) -> list[Note]:
+        expression = match_expression(query, prefix)
+        if expression is None:
+            return []
+        with self._shard(user_id).read() as conn:
+            user = conn.execute("SELECT uid FROM users WHERE user_id = ?", (user_id,)).fetchone()
+            if user is None:
+                return []
+            first = user[0] << 32
+            rows = conn.execute("""
+                SELECT notes.id, notes.content, notes.created_at
+                FROM (
+                    SELECT rowid, rank FROM notes_fts
+                    WHERE notes_fts MATCH ? AND rowid BETWEEN ? AND ?
+                    ORDER BY rowid DESC LIMIT ?
+                ) AS hits
+                JOIN notes ON notes.user_id = ? AND notes.seq = hits.rowid & 0xFFFFFFFF
+                ORDER BY hits.rank LIMIT ?
+            """, (expression, first, first | 0xFFFFFFFF, SEARCH_CANDIDATES, user_id, limit)).fetchall()
+        return [Note(*row) for row in rows]
+
+    # ============================================
+    # Import and shutdown
+    # ============================================
+
+    async def has_user(self, user_id: str) -> bool:
+        return await self._run(self._has_user, user_id)
+
+    def _has_user(self, user_id) -> bool:
+        with self._shard(user_id).read() as conn:
+            return conn.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone() is not None
+
+    async def import_user(self, user_id: str, tasks: Iterable[Task], notes: Iterable[Note]) -> bool:
+        """Store existing data for a new user (e.g. from the old data files). False if the user exists."""
+        return await self._run(self._import_user, user_id, list(tasks), list(notes))
+
+    def _import_user(self, user_id, tasks: list[Task], notes: list[Note]) -> bool:
+        with self._shard(user_id).write() as conn:
+            if conn.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone():
+                return False
+            # New ids continue after the imported ones
+            last_task = max([len(tasks)] + [_id_number(t.id) for t in tasks])
+            last_note = max([len(notes)] + [_id_number(n.id) for n in notes])
+            conn.execute(f"INSERT INTO users (user_id, uid, last_task, last_note) VALUES (?, {NEW_UID}, ?, ?)",
+                         (user_id, last_task, last_note))
+            self._insert_tasks(conn, user_id, enumerate(tasks, 1))
+            self._insert_notes(conn, user_id, enumerate(notes, 1))  # Indexed for search by the trigger
+        return True
+
+    def close(self):
+        self._executor.shutdown()
+        for shard in self._shards:
+            for conn in shard.connections:
+                conn.close()
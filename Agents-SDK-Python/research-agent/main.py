@@ -3,60 +3,72 @@ Research Agent
 An AI agent that searches for information and synthesizes it into comprehensive reports.
 
 Uses the Responses API with web_search built-in tool for real-time information.
+Sub-question searches run concurrently with AsyncOpenAI.
 """
 import asyncio
-from openai import OpenAI
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 from datetime import datetime
+from synthesizer import MapReduceSynthesizer
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "common"))
+from token_budget import TokenBudget, fit_to_budget
 
 load_dotenv()
 
 client = OpenAI()
+async_client = AsyncOpenAI()
 
 
 class ResearchAgent:
     """Agent that conducts research and generates reports."""
     
-    def __init__(self, model: str = "gpt-4o-mini"):
+    def __init__(self, model: str = "gpt-4o-mini", client: OpenAI = client,
+                 async_client: AsyncOpenAI = async_client, max_questions: int = 4):
         self.model = model
+        self.max_questions = max_questions
+        self.client = client  # Any client with responses.create(), e.g. CachedClient
+        self.async_client = async_client
         self.research_results = []
     
-    def search(self, query: str) -> str:
-        """Search the web for information."""
-        print(f"  🔍 Searching: {query}")
-        
-        response = client.responses.create(
+    # ============================================
+    # Request builders (shared by sync and async paths)
+    # ============================================
+    
+    def _search_request(self, query: str) -> dict:
+        return dict(
             model=self.model,
             input=f"Search for: {query}. Provide detailed findings with sources.",
             tools=[{"type": "web_search_preview"}]
         )
-        
-        return response.output_text
     
-    def plan_research(self, topic: str) -> list[str]:
-        """Break down the topic into sub-questions."""
-        print(f"📋 Planning research for: {topic}")
-        
-        response = client.responses.create(
+    def _plan_request(self, topic: str) -> dict:
+        return dict(
             model=self.model,
-            input=f"""You are a research planner. Break down this topic into 3-4 specific 
+            input=f"""You are a research planner. Break down this topic into {min(3, self.max_questions)}-{self.max_questions} specific 
             sub-questions that would help create a comprehensive understanding.
             
             Topic: {topic}
             
             Return just the questions, one per line, no numbering."""
         )
-        
-        questions = [q.strip() for q in response.output_text.strip().split('\n') if q.strip()]
-        return questions[:4]  # Limit to 4 sub-questions
     
-    def synthesize(self, topic: str, findings: list[str]) -> str:
-        """Synthesize findings into a report."""
-        print("📝 Synthesizing findings...")
-        
+    def _synthesize_request(self, topic: str, findings: list[str], missing: list[str] = None) -> dict:
         findings_text = "\n\n---\n\n".join(findings)
         
-        response = client.responses.create(
+        missing_text = ""
+        if missing:
+            missing_text = (
+                "\n            These sub-questions could not be researched; "
+                "mention them as gaps in the report:\n            - "
+                + "\n            - ".join(missing) + "\n"
+            )
+        
+        return dict(
             model=self.model,
             input=f"""You are a research synthesizer. Create a comprehensive report from these findings.
             
@@ -65,7 +77,7 @@ class ResearchAgent:
             
             Findings:
             {findings_text}
-            
+            {missing_text}
             Create a report with:
             1. Executive Summary (2-3 sentences)
             2. Key Findings (bullet points)
@@ -74,6 +86,40 @@ class ResearchAgent:
             
             Use markdown formatting."""
         )
+    
+    def _parse_questions(self, text: str) -> list[str]:
+        questions = [q.strip() for q in text.strip().split('\n') if q.strip()]
+        return questions[:self.max_questions]
+    
+    # ============================================
+    # Sequential pipeline
+    # ============================================
+    
+    def search(self, query: str) -> str:
+        """Search the web for information."""
+        print(f"  🔍 Searching: {query}")
+        
+        response = self.client.responses.create(**self._search_request(query))
+        
+        return response.output_text
+    
+    def plan_research(self, topic: str) -> list[str]:
+        """Break down the topic into sub-questions."""
+        print(f"📋 Planning research for: {topic}")
+        
+        response = self.client.responses.create(**self._plan_request(topic))
+        
+        return self._parse_questions(response.output_text)
+    
+    def synthesize(self, topic: str, findings: list[str], missing: list[str] = None) -> str:
+        """Synthesize findings into a report, trimming them to the model's input budget."""
+        print("📝 Synthesizing findings...")
+        
+        budget = TokenBudget(self.model)
+        prompt = self._synthesize_request(topic, [], missing)["input"]
+        separators = 5 * len(findings)  # "---" between findings
+        findings = fit_to_budget(findings, budget.remaining(prompt) - separators, self.model)
+        response = self.client.responses.create(**self._synthesize_request(topic, findings, missing))
         
         return response.output_text
     
@@ -102,9 +148,134 @@ class ResearchAgent:
         report = self.synthesize(topic, findings)
         
         return report
+    
+    # ============================================
+    # Concurrent pipeline
+    # ============================================
+    
+    async def search_async(self, query: str) -> str:
+        """Search the web for information without blocking other searches."""
+        print(f"  🔍 Searching: {query}")
+        
+        response = await self.async_client.responses.create(**self._search_request(query))
+        
+        return response.output_text
+    
+    async def plan_research_async(self, topic: str) -> list[str]:
+        """Break down the topic into sub-questions."""
+        print(f"📋 Planning research for: {topic}")
+        
+        response = await self.async_client.responses.create(**self._plan_request(topic))
+        
+        return self._parse_questions(response.output_text)
+    
+    async def synthesize_async(self, topic: str, findings: list[str], missing: list[str] = None) -> str:
+        """Synthesize findings into a report."""
+        print(f"📝 Synthesizing {len(findings)} findings...")
+        
+        response = await self.async_client.responses.create(
+            **self._synthesize_request(topic, findings, missing)
+        )
+        
+        return response.output_text
+    
+    async def gather_findings(self, questions: list[str], max_concurrency: int = 4,
+                              search_timeout: float = 90.0, quorum: int = None,
+                              straggler_grace: float = 10.0,
+                              on_finding: Callable[[str, str], None] = None) -> tuple[dict[str, str], list[str]]:
+        """
+        Run all searches concurrently.
+        
+        Args:
+            questions: Sub-questions to search
+            max_concurrency: Maximum searches in flight at once
+            search_timeout: Per-search timeout in seconds
+            quorum: Once this many findings have arrived, wait at most
+                straggler_grace seconds for the rest (default: wait for all)
+            straggler_grace: Extra seconds granted to slow searches after quorum
+            on_finding: Called with (question, result) as each search completes
+        
+        Returns:
+            (findings keyed by question, questions that failed or timed out)
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def bounded_search(question: str) -> str:
+            async with semaphore:
+                return await asyncio.wait_for(self.search_async(question), search_timeout)
+        
+        pending = {asyncio.create_task(bounded_search(q)): q for q in questions}
+        findings: dict[str, str] = {}
+        failed: list[str] = []
+        started = time.perf_counter()
+        deadline = None
+        
+        try:
+            while pending:
+                timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                done, _ = await asyncio.wait(pending, timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break  # Grace period over; synthesize without the stragglers
+                
+                for task in done:
+                    question = pending.pop(task)
+                    try:
+                        findings[question] = task.result()
+                        if on_finding is not None:
+                            on_finding(question, findings[question])
+                        print(f"  ✅ [{len(findings)}/{len(questions)}] {time.perf_counter() - started:.1f}s: {question}")
+                    except Exception as e:
+                        failed.append(question)
+                        print(f"  ⚠️  Failed ({type(e).__name__}): {question}")
+                
+                if quorum is not None and deadline is None and len(findings) >= quorum:
+                    deadline = time.perf_counter() + straggler_grace
+        finally:
+            for task, question in pending.items():
+                task.cancel()
+                failed.append(question)
+                print(f"  ⏭️  Skipped (too slow): {question}")
+        
+        return findings, failed
+    
+    async def research_async(self, topic: str, max_concurrency: int = 4,
+                             search_timeout: float = 90.0, quorum: int = None,
+                             straggler_grace: float = 10.0, chunk_tokens: int = 6000) -> str:
+        """
+        Conduct research with all sub-question searches running concurrently.
+        
+        Findings are handed to a map-reduce synthesizer as they arrive, so
+        large finding sets are condensed in chunks of at most chunk_tokens
+        while the remaining searches are still running.
+        """
+        print(f"\n{'='*50}")
+        print(f"🔬 Starting Research: {topic}")
+        print(f"{'='*50}\n")
+        
+        # Step 1: Plan research
+        questions = await self.plan_research_async(topic)
+        print(f"  Questions to explore: {len(questions)}")
+        for q in questions:
+            print(f"    • {q}")
+        print()
+        
+        # Step 2: Research all questions at once, condensing findings as they arrive
+        synthesizer = MapReduceSynthesizer(self, topic, chunk_tokens=chunk_tokens,
+                                           max_concurrency=max_concurrency)
+        findings, failed = await self.gather_findings(
+            questions, max_concurrency, search_timeout, quorum, straggler_grace,
+            on_finding=lambda q, result: synthesizer.add(f"## {q}\n\n{result}", questions.index(q), q),
+        )
+        if not findings:
+            raise RuntimeError(f"All {len(questions)} searches failed")
+        
+        # Step 3: Reduce and synthesize
+        print()
+        return await synthesizer.finish(missing=failed)
 
 
-def main():
+async def main():
     """Demo the research agent."""
     agent = ResearchAgent()
     
@@ -113,10 +284,11 @@ def main():
     ]
     
     for topic in topics:
-        report = agent.research(topic)
+        started = time.perf_counter()
+        report = await agent.research_async(topic, max_concurrency=4, quorum=3)
         
         print(f"\n{'='*50}")
-        print("📄 FINAL REPORT")
+        print(f"📄 FINAL REPORT ({time.perf_counter() - started:.1f}s)")
         print(f"{'='*50}\n")
         print(report)
         
@@ -128,4 +300,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -0,0 +1,196 @@
+"""
+Research Agent - Map-Reduce Synthesizer
+Synthesize large sets of findings with bounded per-call prompt size.
+
+Findings are packed into chunks of at most `chunk_tokens`; each chunk is
+condensed as soon as it fills up (map), while searches are still running.
+Chunk notes are then merged in a tree, `fan_in` at a time, until they fit
+into a single final report prompt (reduce).
+
+Findings keep their position in the research plan, so notes are reduced
+and reported in planned order whatever order the searches finish in. A
+failed map or reduce call does not sink the report: the questions it
+covered are reported as missing.
+"""
+import asyncio
+import sys
+from pathlib import Path
+from typing import Callable
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "common"))
+from token_budget import count_tokens as count_model_tokens, fit_to_budget
+
+MAP_PROMPT = """You are a research assistant. Condense these findings about "{topic}" into
+concise research notes.
+
+Keep every concrete fact, number, date and source (with URLs). Drop repetition and filler.
+Group notes under the original question headings.
+
+Findings:
+{text}"""
+
+REDUCE_PROMPT = """You are a research assistant. Merge these research notes about "{topic}"
+into one set of notes.
+
+Combine overlapping points, keep every distinct fact, number and source (with URLs),
+and group the result by theme.
+
+Notes:
+{text}"""
+
+SEPARATOR = "\n\n---\n\n"
+
+
+def split_oversized(text: str, max_tokens: int, count_tokens: Callable[[str], int]) -> list[str]:
+    """Split a single finding that exceeds max_tokens at paragraph boundaries."""
+    if count_tokens(text) <= max_tokens:
+        return [text]
+
+    pieces, current = [], ""
+    for paragraph in text.split("\n\n"):
+        candidate = f"{current}\n\n{paragraph}" if current else paragraph
+        if count_tokens(candidate) <= max_tokens:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+        # A single paragraph larger than the budget is cut by characters
+        while count_tokens(paragraph) > max_tokens:
+            cut = max(1, len(paragraph) * max_tokens // count_tokens(paragraph))
+            pieces.append(paragraph[:cut])
+            paragraph = paragraph[cut:]
+        current = paragraph
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def pack(texts: list[str], max_tokens: int, count_tokens: Callable[[str], int]) -> list[list[str]]:
+    """Greedily group texts (in order) so each group fits in max_tokens."""
+    groups, current, used = [], [], 0
+    for text in texts:
+        tokens = count_tokens(text)
+        if current and used + tokens > max_tokens:
+            groups.append(current)
+            current, used = [], 0
+        current.append(text)
+        used += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+class MapReduceSynthesizer:
+    """Incrementally condenses findings and reduces them into one report."""
+
+    def __init__(self, agent, topic: str, chunk_tokens: int = 6000, fan_in: int = 4,
+                 max_concurrency: int = 4, count_tokens: Callable[[str], int] = None):
+        self.agent = agent
+        self.topic = topic
+        self.chunk_tokens = chunk_tokens
+        self.fan_in = fan_in
+        self.count_tokens = count_tokens or (lambda text: count_model_tokens(text, agent.model))
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Buffered pieces and map calls carry (planned position, piece number) and the question they cover
+        self._buffer: list[tuple[tuple[int, int], str, str]] = []
+        self._buffer_tokens = 0
+        self._map_tasks: list[tuple[tuple[int, int], list[str], asyncio.Task]] = []
+        self._added = 0
+        self.calls = 0
+
+    async def _condense(self, template: str, texts: list[str]) -> str:
+        async with self._semaphore:
+            self.calls += 1
+            response = await self.agent.async_client.responses.create(
+                model=self.agent.model,
+                input=template.format(topic=self.topic, text=SEPARATOR.join(texts)),
+            )
+            return response.output_text
+
+    def _flush(self):
+        if self._buffer:
+            pieces = sorted(self._buffer)
+            questions = list(dict.fromkeys(question for _, question, _ in pieces))
+            task = asyncio.create_task(self._condense(MAP_PROMPT, [text for _, _, text in pieces]))
+            self._map_tasks.append((pieces[0][0], questions, task))
+            self._buffer, self._buffer_tokens = [], 0
+
+    def add(self, finding: str, order: int = None, question: str = None):
+        """
+        Buffer a finding; starts a map call as soon as a chunk is full.
+
+        Args:
+            finding: Research result text
+            order: Position of the finding's question in the plan (default: arrival order)
+            question: Reported as missing if the finding is lost to a failed call
+        """
+        order = self._added if order is None else order
+        question = question or f"Finding {order + 1}"
+        self._added += 1
+        for i, piece in enumerate(split_oversized(finding, self.chunk_tokens, self.count_tokens)):
+            tokens = self.count_tokens(piece)
+            if self._buffer and self._buffer_tokens + tokens > self.chunk_tokens:
+                self._flush()
+            self._buffer.append(((order, i), question, piece))
+            self._buffer_tokens += tokens
+
+    @staticmethod
+    def _succeeded(calls: list[tuple], results: list, missing: list[str]) -> list[tuple]:
+        """(order, questions, notes) of the calls that succeeded; questions of failed calls go to missing."""
+        notes = []
+        for (order, questions, _), result in zip(calls, results):
+            if isinstance(result, Exception):
+                print(f"  ⚠️  Condensing failed ({type(result).__name__}): {', '.join(questions)}")
+                missing.extend(questions)
+            else:
+                notes.append((order, questions, result))
+        return notes
+
+    async def finish(self, missing: list[str] = None) -> str:
+        """Wait for the map calls, reduce their notes and write the final report."""
+        missing = list(missing or [])
+        if not self._map_tasks:
+            # Everything fits in one prompt: a single synthesis call, no map step
+            texts = [text for _, _, text in sorted(self._buffer)]
+            self._buffer = []
+        else:
+            self._flush()
+            tasks, self._map_tasks = self._map_tasks, []
+            results = await asyncio.gather(*(task for _, _, task in tasks), return_exceptions=True)
+            notes = sorted(self._succeeded(tasks, results, missing), key=lambda note: note[0])  # Planned order
+            if not notes:
+                raise RuntimeError(f"All {len(tasks)} map calls failed")
+
+            # Reduce level by level until the notes fit one final prompt
+            level = 1
+            while len(notes) > 1 and sum(self.count_tokens(text) for _, _, text in notes) > self.chunk_tokens:
+                groups, cursor = [], 0
+                for batch in pack([text for _, _, text in notes], self.chunk_tokens, self.count_tokens):
+                    for i in range(0, len(batch), self.fan_in):
+                        members = notes[cursor + i:cursor + min(i + self.fan_in, len(batch))]
+                        groups.append((members[0][0], [q for _, questions, _ in members for q in questions],
+                                       [text for _, _, text in members]))
+                    cursor += len(batch)
+                if len(groups) == len(notes):
+                    # Every note already fills a chunk on its own: trim them to fit the final prompt
+                    fitted = fit_to_budget([text for _, _, text in notes], self.chunk_tokens, self.agent.model)
+                    notes = [(order, questions, text) for (order, questions, _), text in zip(notes, fitted)]
+                    print(f"  ✂️  Trimmed {len(notes)} notes to fit {self.chunk_tokens} tokens")
+                    break
+                print(f"  🌳 Reduce level {level}: {len(notes)} notes → {len(groups)}")
+                results = await asyncio.gather(*(self._condense(REDUCE_PROMPT, texts) for _, _, texts in groups),
+                                               return_exceptions=True)
+                notes = self._succeeded(groups, results, missing)
+                if not notes:
+                    raise RuntimeError("All reduce calls failed")
+                level += 1
+            texts = [text for _, _, text in notes]
+
+        self.calls += 1
+        return await self.agent.synthesize_async(self.topic, texts, missing=list(dict.fromkeys(missing)))
+
+    async def synthesize(self, findings: list[str], missing: list[str] = None) -> str:
+        """Non-incremental entry point: add all findings, then finish."""
+        for finding in findings:
+            self.add(finding)
+        return await self.finish(missing)
@@ -0,0 +1,234 @@
+"""
+Code Interpreter - Container Pool
+Reuse code_interpreter containers and uploaded files across requests.
+
+`"container": {"type": "auto"}` starts a fresh container for every request,
+so each call pays the cold start and datasets are re-sent inline. The pool
+creates containers explicitly, keeps them warm, uploads each file once per
+container (deduplicated by content hash) and hands the container id to the
+code_interpreter tool.
+
+Containers expire on the server after `idle_minutes` without activity. The
+pool tracks last use locally, checks containers that may have expired
+before reusing them, and replaces containers that turn out to be gone.
+"""
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+from openai import NotFoundError, OpenAI
+
+EXPIRY_MARGIN_SECONDS = 60  # Re-check containers this close to their idle expiry
+
+
+@dataclass
+class PooledContainer:
+    """A container owned by the pool."""
+    id: str
+    created_at: float
+    last_used_at: float
+    files: dict[str, str] = field(default_factory=dict)  # content hash -> path in container
+    uses: int = 0
+    busy: bool = False
+
+
+@dataclass
+class PoolStats:
+    warm: int = 0
+    cold: int = 0
+    expired: int = 0
+    uploads: int = 0
+    uploads_reused: int = 0
+
+    @property
+    def warm_rate(self) -> float:
+        total = self.warm + self.cold
+        return self.warm / total if total else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.warm} warm / {self.cold} cold ({self.warm_rate:.0%} warm), "
+                f"{self.expired} expired, {self.uploads} uploads, {self.uploads_reused} reused")
+
+
+class ContainerPool:
+    """A bounded pool of warm code_interpreter containers."""
+
+    def __init__(self, client: OpenAI = None, size: int = 2, idle_minutes: int = 20,
+                 name_prefix: str = "ci-pool", memory_limit: Optional[str] = None):
+        """
+        Args:
+            client: OpenAI client (default: a new OpenAI())
+            size: Maximum number of containers kept at once
+            idle_minutes: Server-side expiry after the last activity
+            name_prefix: Container name prefix (shows up in the dashboard)
+            memory_limit: Optional container memory ("1g", "4g", ...)
+        """
+        self.client = client or OpenAI()
+        self.size = size
+        self.idle_seconds = idle_minutes * 60
+        self.name_prefix = name_prefix
+        self.memory_limit = memory_limit
+        self.stats = PoolStats()
+        self._containers: list[PooledContainer] = []
+        self._available = threading.Condition()
+
+    # ============================================
+    # Container lifecycle
+    # ============================================
+
+    def _create(self) -> PooledContainer:
+        kwargs = {"memory_limit": self.memory_limit} if self.memory_limit else {}
+        created = self.client.containers.create(
+            name=f"{self.name_prefix}-{len(self._containers) + self.stats.cold + 1}",
+            expires_after={"anchor": "last_active_at", "minutes": self.idle_seconds // 60},
+            **kwargs,
+        )
+        now = time.time()
+        print(f"🧊 Cold start: created container {created.id}")
+        return PooledContainer(created.id, created_at=now, last_used_at=now)
+
+    def _is_alive(self, container: PooledContainer) -> bool:
+        """True if the container can still be used; asks the API only when expiry is near."""
+        idle = time.time() - container.last_used_at
+        if idle < self.idle_seconds - EXPIRY_MARGIN_SECONDS:
+            return True
+        try:
+            return self.client.containers.retrieve(container.id).status != "expired"
+        except NotFoundError:
+            return False
+
+    def _discard(self, container: PooledContainer, expired: bool = True):
+        with self._available:
+            if container in self._containers:
+                self._containers.remove(container)
+                if expired:
+                    self.stats.expired += 1
+                    print(f"⌛ Container {container.id} expired")
+            self._available.notify()
+
+    def _pick(self, hashes: set[str]) -> Optional[PooledContainer]:
+        """Idle container holding the most of the wanted files."""
+        idle = [c for c in self._containers if not c.busy]
+        if not idle:
+            return None
+        return max(idle, key=lambda c: (len(hashes & c.files.keys()), c.last_used_at))
+
+    @contextmanager
+    def acquire(self, files: dict[str, bytes] = None) -> Iterator[PooledContainer]:
+        """
+        Borrow a container with the given files uploaded.
+
+        Args:
+            files: File name -> content; each file is uploaded at most once per container
+
+        Yields:
+            A container reserved for the caller until the block exits
+        """
+        files = files or {}
+        hashes = {hashlib.sha256(data).hexdigest() for data in files.values()}
+        while True:
+            with self._available:
+                container = self._pick(hashes)
+                while container is None and len(self._containers) >= self.size:
+                    self._available.wait()
+                    container = self._pick(hashes)
+                cold = container is None
+                if cold:
+                    # Reserve the slot before the (slow) create call
+                    container = PooledContainer("", 0.0, 0.0)
+                    self._containers.append(container)
+                container.busy = True
+
+            if cold:
+                try:
+                    created = self._create()
+                except Exception:
+                    self._discard(container, expired=False)
+                    raise
+                container.id, container.created_at, container.last_used_at = (
+                    created.id, created.created_at, created.last_used_at
+                )
+                self.stats.cold += 1
+                break
+            if self._is_alive(container):
+                self.stats.warm += 1
+                break
+            self._discard(container)
+
+        try:
+            for name, data in files.items():
+                self._upload(container, name, data)
+            yield container
+        finally:
+            with self._available:
+                container.busy = False
+                container.uses += 1
+                container.last_used_at = time.time()
+                self._available.notify()
+
+    def _upload(self, container: PooledContainer, name: str, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        if digest in container.files:
+            self.stats.uploads_reused += 1
+            return container.files[digest]
+        uploaded = self.client.containers.files.create(container.id, file=(name, data))
+        path = getattr(uploaded, "path", None) or f"/mnt/data/{name}"
+        container.files[digest] = path
+        self.stats.uploads += 1
+        print(f"📤 Uploaded {name} to {container.id}")
+        return path
+
+    def paths(self, container: PooledContainer, files: dict[str, bytes]) -> dict[str, str]:
+        """File name -> path inside the container, for files uploaded by acquire()."""
+        return {name: container.files[hashlib.sha256(data).hexdigest()] for name, data in files.items()}
+
+    @staticmethod
+    def tool(container: PooledContainer) -> dict:
+        """code_interpreter tool definition bound to the container."""
+        return {"type": "code_interpreter", "container": container.id}
+
+    # ============================================
+    # Convenience
+    # ============================================
+
+    def run(self, input: str, files: dict[str, bytes] = None, model: str = "gpt-4o-mini", **kwargs):
+        """
+        Create a response with code_interpreter running in a pooled container.
+
+        File paths are appended to the input so the model knows where the
+        data is. A request that fails because its container expired is
+        retried once in a fresh container.
+        """
+        for attempt in range(2):
+            with self.acquire(files) as container:
+                prompt = input
+                if files:
+                    listing = "\n".join(f"- {path}" for path in self.paths(container, files).values())
+                    prompt = f"{input}\n\nFiles available in the code interpreter:\n{listing}"
+                try:
+                    return self.client.responses.create(
+                        model=model, input=prompt, tools=[self.tool(container)], **kwargs
+                    )
+                except NotFoundError:
+                    if attempt:
+                        raise
+                    expired = container
+            self._discard(expired)
+
+    def close(self):
+        """Delete every container owned by the pool."""
+        with self._available:
+            containers, self._containers = self._containers, []
+        for container in containers:
+            try:
+                self.client.containers.delete(container.id)
+            except NotFoundError:
+                pass
+
+    def __enter__(self) -> "ContainerPool":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
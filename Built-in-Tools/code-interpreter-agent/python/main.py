@@ -1,31 +1,47 @@
 """
 Code Interpreter Agent
 Sandboxed Python code execution using the code_interpreter built-in tool.
+
+Requests share warm containers from a ContainerPool instead of starting a
+fresh container each time.
 """
 import os
 from openai import OpenAI
 from dotenv import load_dotenv
+from container_pool import ContainerPool
 
 load_dotenv()
 
 client = OpenAI()
 
 
-def run_code_interpreter(query: str) -> str:
-    """Execute code using the code interpreter sandbox."""
+def run_code_interpreter(query: str, pool: ContainerPool = None,
+                         files: dict[str, bytes] = None, client: OpenAI = client) -> str:
+    """
+    Execute code using the code interpreter sandbox.
+    
+    Args:
+        query: Task for the model
+        pool: Container pool to reuse warm containers (default: a new container per call)
+        files: File name -> content to make available in the container
+        client: Client for calls without a pool, e.g. CachedClient (the pool uses its own)
+    """
     print(f"🧮 Query: {query}")
     print("🔧 Running code interpreter...")
     
-    response = client.responses.create(
-        model="gpt-4o-mini",
-        input=query,
-        tools=[
-            {
-                "type": "code_interpreter",
-                "container": {"type": "auto"}
-            }
-        ]
-    )
+    if pool is not None:
+        response = pool.run(query, files=files, model="gpt-4o-mini")
+    else:
+        response = client.responses.create(
+            model="gpt-4o-mini",
+            input=query,
+            tools=[
+                {
+                    "type": "code_interpreter",
+                    "container": {"type": "auto"}
+                }
+            ]
+        )
     
     # Check for code interpreter outputs
     for output in response.output:
@@ -44,10 +60,25 @@ def main():
         "Calculate the compound interest for $1000 at 5% for 10 years",
     ]
     
-    for task in tasks:
-        answer = run_code_interpreter(task)
-        print(f"🤖 Answer: {answer}\n")
-        print("-" * 50 + "\n")
+    # A batch of questions over the same dataset: uploaded once, container stays warm
+    sales = b"month,revenue\nJan,45000\nFeb,48000\nMar,52000\nApr,55000\n"
+    questions = [
+        "What is the average monthly revenue in sales.csv?",
+        "What is the month-over-month growth rate in sales.csv?",
+    ]
+    
+    with ContainerPool(client, size=1) as pool:
+        for task in tasks:
+            answer = run_code_interpreter(task, pool)
+            print(f"🤖 Answer: {answer}\n")
+            print("-" * 50 + "\n")
+        
+        for question in questions:
+            answer = run_code_interpreter(question, pool, files={"sales.csv": sales})
+            print(f"🤖 Answer: {answer}\n")
+            print("-" * 50 + "\n")
+        
+        print(f"📊 Containers: {pool.stats}")
 
 
 if __name__ == "__main__":
@@ -19,8 +19,8 @@ client = OpenAI()
 VECTOR_STORE_ID = os.getenv("VECTOR_STORE_ID", "vs_YOUR_VECTOR_STORE_ID")
 
 
-def search_documents(query: str) -> str:
-    """Search documents in the vector store."""
+def search_documents(query: str, client: OpenAI = client) -> str:
+    """Search documents in the vector store (any client with responses.create(), e.g. CachedClient)."""
     print(f"📚 Query: {query}")
     print(f"🔍 Searching vector store {VECTOR_STORE_ID[:20]}...")
     
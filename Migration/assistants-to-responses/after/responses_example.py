@@ -12,7 +12,30 @@ load_dotenv()
 client = OpenAI()
 
 
-def run_conversation(user_message: str) -> str:
+def create_container() -> str:
+    """
+    Create one code interpreter container for the whole conversation.
+    
+    With {"type": "auto"} every request starts a fresh container. An
+    explicit container stays warm between turns and keeps its files and
+    variables, like the sandbox of an Assistants thread. It expires on
+    its own after 20 idle minutes.
+    """
+    container = client.containers.create(
+        name="math-tutor",
+        expires_after={"anchor": "last_active_at", "minutes": 20},
+    )
+    return container.id
+
+
+def code_interpreter_tool(container_id: str = None) -> dict:
+    return {
+        "type": "code_interpreter",
+        "container": container_id or {"type": "auto"}
+    }
+
+
+def run_conversation(user_message: str, container_id: str = None) -> str:
     """
     Run a conversation using the Responses API.
     
@@ -29,12 +52,7 @@ def run_conversation(user_message: str) -> str:
         instructions="You are a helpful math tutor. Solve problems step by step.",
         input=user_message,
         # Tools are built-in
-        tools=[
-            {
-                "type": "code_interpreter",
-                "container": {"type": "auto"}
-            }
-        ],
+        tools=[code_interpreter_tool(container_id)],
         # Store for potential follow-up questions
         store=True
     )
@@ -42,7 +60,7 @@ def run_conversation(user_message: str) -> str:
     return response.output_text, response.id
 
 
-def run_follow_up(previous_id: str, follow_up_message: str) -> str:
+def run_follow_up(previous_id: str, follow_up_message: str, container_id: str = None) -> str:
     """
     Follow-up question using previous_response_id.
     This replaces thread-based conversation management.
@@ -52,12 +70,7 @@ def run_follow_up(previous_id: str, follow_up_message: str) -> str:
         model="gpt-4o-mini",
         previous_response_id=previous_id,  # Chain to previous
         input=[{"role": "user", "content": follow_up_message}],
-        tools=[
-            {
-                "type": "code_interpreter",
-                "container": {"type": "auto"}
-            }
-        ],
+        tools=[code_interpreter_tool(container_id)],
         store=True
     )
     
@@ -68,22 +81,28 @@ def main():
     print("✅ This uses the recommended Responses API")
     print("   No threads, no runs, no polling!\n")
     
-    # First question - much simpler!
-    print("👤 User: What is 25 factorial? Show your work.")
-    response_text, response_id = run_conversation(
-        "What is 25 factorial? Show your work."
-    )
-    print(f"🤖 Assistant: {response_text}\n")
-    
-    # Follow-up using previous_response_id (replaces thread)
-    print("👤 User: Now divide that by 24 factorial")
-    follow_up_text, _ = run_follow_up(
-        response_id,
-        "Now divide that by 24 factorial. What do you get?"
-    )
-    print(f"🤖 Assistant: {follow_up_text}")
+    # One warm container for the whole conversation (no cold start on the follow-up)
+    container_id = create_container()
     
-    # No cleanup needed - no persistent assistant object
+    try:
+        # First question - much simpler!
+        print("👤 User: What is 25 factorial? Show your work.")
+        response_text, response_id = run_conversation(
+            "What is 25 factorial? Show your work.", container_id
+        )
+        print(f"🤖 Assistant: {response_text}\n")
+        
+        # Follow-up using previous_response_id (replaces thread)
+        print("👤 User: Now divide that by 24 factorial")
+        follow_up_text, _ = run_follow_up(
+            response_id,
+            "Now divide that by 24 factorial. What do you get?",
+            container_id
+        )
+        print(f"🤖 Assistant: {follow_up_text}")
+    finally:
+        # No assistant object to clean up; the container would also expire on its own
+        client.containers.delete(container_id)
 
 
 if __name__ == "__main__":
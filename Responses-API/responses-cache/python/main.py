@@ -0,0 +1,51 @@
+"""
+Responses API - Cached Responses
+Avoid re-sending identical requests by caching responses locally.
+"""
+import time
+from openai import OpenAI
+from dotenv import load_dotenv
+from response_cache import CachedClient, ResponseCache, MemoryLRU, SQLiteStore
+
+load_dotenv()
+
+cache = ResponseCache(
+    tiers=[MemoryLRU(max_entries=512), SQLiteStore(".response_cache.db", max_bytes=64 * 1024 * 1024)],
+    ttl=24 * 3600,
+)
+client = CachedClient(OpenAI(), cache)
+
+
+def ask(question: str) -> str:
+    response = client.responses.create(
+        model="gpt-4o-mini",
+        instructions="Answer in one sentence.",
+        input=question,
+        temperature=0,
+    )
+    return response.output_text
+
+
+def main():
+    """Ask the same questions twice; the second pass is served from the cache."""
+    questions = [
+        "What is the capital of France?",
+        "Why is the sky blue?",
+        "What is a prime number?",
+    ]
+
+    for run in (1, 2):
+        print(f"\n🔄 Run {run}")
+        started = time.perf_counter()
+        for question in questions:
+            print(f"👤 {question}")
+            print(f"🤖 {ask(question)}")
+        print(f"⏱️  {time.perf_counter() - started:.2f}s")
+
+    stats = cache.stats
+    print(f"\n📊 Cache: {stats['hits']} hits, {stats['misses']} misses, "
+          f"hit rate {stats['hit_rate']:.0%}, evictions {stats['evictions']}")
+
+
+if __name__ == "__main__":
+    main()
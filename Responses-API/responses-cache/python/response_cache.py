@@ -0,0 +1,296 @@
+"""
+Responses API - Response Cache
+Content-addressed cache for client.responses.create() calls.
+
+Requests are keyed on a canonical SHA-256 hash of the request parameters
+(model, instructions, input, tools, temperature, ...). Lookups go through a
+stack of tiers - an in-memory LRU in front of an on-disk SQLite store - with
+TTL expiry, size-based eviction and hit/miss/eviction counters.
+
+Wrap any client to use it; the helpers in this repo accept it in place of OpenAI():
+
+    from response_cache import CachedClient
+    client = CachedClient(OpenAI())
+    client.responses.create(model="gpt-4o-mini", input="Hi")  # API call
+    client.responses.create(model="gpt-4o-mini", input="Hi")  # served from cache
+"""
+import asyncio
+import hashlib
+import inspect
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from openai.types.responses import Response
+
+
+# Parameters that don't change what the model returns
+IGNORED_PARAMS = {"store", "metadata", "user", "safety_identifier", "extra_headers", "timeout"}
+
+# Parameters whose responses can't be replayed from a cache
+UNCACHEABLE_PARAMS = {"stream", "background", "previous_response_id", "conversation"}
+
+
+def _jsonable(value: Any) -> Any:
+    """Convert pydantic models and other SDK objects to plain JSON types."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+def cache_key(**params) -> str:
+    """Canonical hash of request parameters (key order and whitespace don't matter)."""
+    relevant = {k: v for k, v in params.items() if k not in IGNORED_PARAMS and v is not None}
+    canonical = json.dumps(_jsonable(relevant), sort_keys=True, separators=(",", ":"),
+                           ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(**params) -> bool:
+    return not any(params.get(name) for name in UNCACHEABLE_PARAMS)
+
+
+# ============================================
+# Cache Tiers
+# ============================================
+
+class MemoryLRU:
+    """In-process LRU tier bounded by entry count."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[tuple[str, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: str, expires_at: float):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteStore:
+    """On-disk tier bounded by total payload size; evicts least recently used rows."""
+
+    name = "disk"
+
+    def __init__(self, path: str = ".response_cache.db", max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses(accessed_at)")
+        self.conn.commit()
+        self._size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key: str) -> Optional[tuple[str, float]]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+                )
+                self.conn.commit()
+            return row
+
+    def set(self, key: str, value: str, expires_at: float):
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            old = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, expires_at, time.time()),
+            )
+            self._size += size - (old[0] if old else 0)
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        """Drop expired rows, then least recently used rows until under max_bytes."""
+        if self._size <= self.max_bytes:
+            return
+        self.conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        self._size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        rows = self.conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        for key, size in rows:
+            if self._size <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._size -= size
+            self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            row = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if row:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.conn.commit()
+                self._size -= row[0]
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+            self._size = 0
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+# ============================================
+# Tiered Cache
+# ============================================
+
+class ResponseCache:
+    """
+    Looks up keys tier by tier and promotes hits into the faster tiers.
+
+    Any object with get/set/delete/clear and an `evictions` counter can be
+    used as a tier, e.g. a Redis-backed store shared across CI workers.
+    """
+
+    def __init__(self, tiers: list = None, ttl: float = 7 * 24 * 3600):
+        self.tiers = tiers if tiers is not None else [MemoryLRU(), SQLiteStore()]
+        self.ttl = ttl
+        self.hits = {tier.name: 0 for tier in self.tiers}
+        self.misses = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        for i, tier in enumerate(self.tiers):
+            entry = tier.get(key)
+            if entry is None:
+                continue
+            value, expires_at = entry
+            if expires_at <= now:
+                tier.delete(key)
+                self.expirations += 1
+                continue
+            self.hits[tier.name] += 1
+            for faster in self.tiers[:i]:
+                faster.set(key, value, expires_at)
+            return value
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: str, ttl: float = None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        for tier in self.tiers:
+            tier.set(key, value, expires_at)
+
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
+
+    @property
+    def stats(self) -> dict:
+        lookups = sum(self.hits.values()) + self.misses
+        return {
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "hit_rate": sum(self.hits.values()) / lookups if lookups else 0.0,
+            "expirations": self.expirations,
+            "evictions": {tier.name: tier.evictions for tier in self.tiers},
+            "entries": {tier.name: len(tier) for tier in self.tiers},
+        }
+
+
+# ============================================
+# Client Wrapper
+# ============================================
+
+class CachedResponses:
+    """Drop-in replacement for client.responses with a cached create()."""
+
+    def __init__(self, responses, cache: ResponseCache):
+        self._responses = responses
+        self._cache = cache
+        self._is_async = inspect.iscoroutinefunction(responses.create)
+
+    def __getattr__(self, name):
+        return getattr(self._responses, name)
+
+    def create(self, **params):
+        if self._is_async:
+            return self._acreate(**params)
+        if not is_cacheable(**params):
+            return self._responses.create(**params)
+
+        key = cache_key(**params)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return Response.model_validate_json(cached)
+
+        response = self._responses.create(**params)
+        self._store(key, response)
+        return response
+
+    async def _acreate(self, **params):
+        if not is_cacheable(**params):
+            return await self._responses.create(**params)
+
+        # Disk tiers block, so cache I/O runs in a worker thread instead of the event loop
+        key = cache_key(**params)
+        cached = await asyncio.to_thread(self._cache.get, key)
+        if cached is not None:
+            return Response.model_validate_json(cached)
+
+        response = await self._responses.create(**params)
+        await asyncio.to_thread(self._store, key, response)
+        return response
+
+    def _store(self, key: str, response: Response):
+        # Only completed responses are worth replaying
+        if getattr(response, "status", "completed") in (None, "completed"):
+            self._cache.set(key, response.model_dump_json())
+
+
+class CachedClient:
+    """Wraps OpenAI / AsyncOpenAI so that responses.create() goes through the cache."""
+
+    def __init__(self, client, cache: ResponseCache = None):
+        self._client = client
+        self.cache = cache if cache is not None else ResponseCache()
+        self.responses = CachedResponses(client.responses, self.cache)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
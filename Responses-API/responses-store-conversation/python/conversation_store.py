@@ -0,0 +1,226 @@
+"""
+Responses API - Client-Side Conversation Store
+Multi-turn conversations kept in a local SQLite store instead of previous_response_id.
+
+Every message is a row pointing at its parent, and a conversation is just a
+pointer to its newest message. Transcripts therefore form a tree: forking a
+conversation is a single insert that shares all earlier turns with the original.
+Each turn rebuilds the `input` list locally (newest turns first, within a token
+budget) and calls the API with store=False, so conversations are independent
+and can run concurrently.
+"""
+import asyncio
+import sqlite3
+import time
+import uuid
+from typing import Optional
+from openai import AsyncOpenAI
+from dotenv import load_dotenv
+from token_count import count_tokens
+
+load_dotenv()
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    parent_id INTEGER REFERENCES messages(id),
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS conversations (
+    id TEXT PRIMARY KEY,
+    head_id INTEGER REFERENCES messages(id),
+    instructions TEXT,
+    forked_from TEXT,
+    created_at REAL NOT NULL
+);
+"""
+
+# Walks parent pointers from a message back to the root, newest first
+ANCESTORS_SQL = """
+WITH RECURSIVE chain(id, parent_id, role, content, tokens) AS (
+    SELECT id, parent_id, role, content, tokens FROM messages WHERE id = ?
+    UNION ALL
+    SELECT m.id, m.parent_id, m.role, m.content, m.tokens
+    FROM messages m JOIN chain c ON m.id = c.parent_id
+)
+SELECT id, role, content, tokens FROM chain
+"""
+
+
+class ConversationStore:
+    """SQLite-backed conversation transcripts with cheap forking."""
+
+    def __init__(self, path: str = "conversations.db", model: str = "gpt-4o-mini"):
+        """
+        Args:
+            path: SQLite database file (":memory:" for a throwaway store)
+            model: Model whose tokenizer counts message tokens for build_input()
+        """
+        self.model = model
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def create(self, instructions: str = None, conversation_id: str = None) -> str:
+        """Start an empty conversation and return its id."""
+        conversation_id = conversation_id or f"conv_{uuid.uuid4().hex[:12]}"
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO conversations (id, head_id, instructions, created_at) VALUES (?, NULL, ?, ?)",
+                (conversation_id, instructions, time.time()),
+            )
+        return conversation_id
+
+    def _conversation(self, conversation_id: str) -> tuple:
+        row = self.conn.execute(
+            "SELECT head_id, instructions FROM conversations WHERE id = ?", (conversation_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown conversation: {conversation_id}")
+        return row
+
+    def instructions(self, conversation_id: str) -> Optional[str]:
+        return self._conversation(conversation_id)[1]
+
+    def append(self, conversation_id: str, role: str, content: str) -> int:
+        """Append a message to a conversation and return the new message id."""
+        head_id, _ = self._conversation(conversation_id)
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO messages (parent_id, role, content, tokens, created_at) VALUES (?, ?, ?, ?, ?)",
+                (head_id, role, content, max(1, count_tokens(content, self.model)), time.time()),
+            )
+            self.conn.execute(
+                "UPDATE conversations SET head_id = ? WHERE id = ?",
+                (cursor.lastrowid, conversation_id),
+            )
+        return cursor.lastrowid
+
+    def fork(self, conversation_id: str, at_message: int = None, new_id: str = None) -> str:
+        """
+        Branch a conversation without copying its history.
+
+        Args:
+            conversation_id: Conversation to fork
+            at_message: Message id to branch from (defaults to the current head);
+                must be a message of this conversation
+            new_id: Optional id for the new conversation
+
+        Returns:
+            The new conversation id
+
+        Raises:
+            ValueError: If at_message is not in the conversation's history
+        """
+        head_id, instructions = self._conversation(conversation_id)
+        if at_message is not None and (head_id is None or self.conn.execute(
+                f"SELECT 1 FROM ({ANCESTORS_SQL}) WHERE id = ?", (head_id, at_message)).fetchone() is None):
+            raise ValueError(f"Message {at_message} is not in conversation {conversation_id}")
+        new_id = new_id or f"conv_{uuid.uuid4().hex[:12]}"
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO conversations (id, head_id, instructions, forked_from, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (new_id, at_message if at_message is not None else head_id,
+                 instructions, conversation_id, time.time()),
+            )
+        return new_id
+
+    def transcript(self, conversation_id: str) -> list[dict]:
+        """Full transcript, oldest message first (for replay and export)."""
+        head_id, _ = self._conversation(conversation_id)
+        if head_id is None:
+            return []
+        rows = self.conn.execute(ANCESTORS_SQL, (head_id,)).fetchall()
+        return [{"id": row[0], "role": row[1], "content": row[2]} for row in reversed(rows)]
+
+    def build_input(self, conversation_id: str, max_tokens: int = None) -> list[dict]:
+        """
+        Rebuild the Responses API `input` list for the next turn.
+
+        Keeps the newest messages whose combined token estimate fits in
+        max_tokens. The newest message is always included.
+        """
+        head_id, _ = self._conversation(conversation_id)
+        if head_id is None:
+            return []
+
+        selected = []
+        used = 0
+        for _, role, content, tokens in self.conn.execute(ANCESTORS_SQL, (head_id,)):
+            if max_tokens is not None and selected and used + tokens > max_tokens:
+                break
+            selected.append({"role": role, "content": content})
+            used += tokens
+        selected.reverse()
+        return selected
+
+    def conversations(self) -> list[str]:
+        return [row[0] for row in self.conn.execute("SELECT id FROM conversations ORDER BY created_at")]
+
+
+# ============================================
+# Conversation Turns
+# ============================================
+
+client = AsyncOpenAI()
+
+
+async def send(store: ConversationStore, conversation_id: str, message: str,
+               model: str = "gpt-4o-mini", max_tokens: int = 4000) -> str:
+    """Append a user message, call the API with locally rebuilt context, store the reply."""
+    store.append(conversation_id, "user", message)
+
+    response = await client.responses.create(
+        model=model,
+        instructions=store.instructions(conversation_id),
+        input=store.build_input(conversation_id, max_tokens=max_tokens),
+        store=False,  # No server-side state needed
+    )
+
+    store.append(conversation_id, "assistant", response.output_text)
+    return response.output_text
+
+
+async def chat(store: ConversationStore, conversation_id: str, messages: list[str]):
+    """Run a scripted sequence of turns in one conversation."""
+    for message in messages:
+        reply = await send(store, conversation_id, message)
+        print(f"[{conversation_id}] 👤 {message}")
+        print(f"[{conversation_id}] 🤖 {reply}\n")
+
+
+async def main():
+    """Fork one conversation into two branches and continue both concurrently."""
+    store = ConversationStore(":memory:")
+
+    root = store.create(instructions="You are a witty assistant. Keep answers short.")
+    await chat(store, root, ["Tell me a joke"])
+
+    # Both branches share the first joke; nothing is copied
+    explain = store.fork(root, new_id="explain-branch")
+    another = store.fork(root, new_id="another-branch")
+
+    await asyncio.gather(
+        chat(store, explain, ["Explain why it's funny."]),
+        chat(store, another, ["Give me another joke on a similar theme.",
+                              "Now make it about programmers."]),
+    )
+
+    print("📊 Conversations:")
+    for conversation_id in store.conversations():
+        turns = store.transcript(conversation_id)
+        print(f"   {conversation_id}: {len(turns)} messages")
+
+    store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
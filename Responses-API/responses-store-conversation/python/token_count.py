@@ -0,0 +1,63 @@
+"""
+Token Count
+Local token counting for the conversation store.
+
+A copy of count_tokens() from Agents-SDK-Python/common/token_budget.py, so
+this template runs on its own. Uses tiktoken when it is installed and its
+vocabulary can be loaded; otherwise a fast regex-based approximation that
+errs on the high side, so budgets stay on the safe side.
+"""
+import math
+import re
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # Optional dependency
+    tiktoken = None
+
+
+_APPROX_PIECES = re.compile(r"\d+|[^\W\d]+|[^\w\s]", re.UNICODE)
+# CJK ideographs, kana and Hangul: about one token per character
+_WIDE_CHARS = re.compile(r"[\u1100-\u11ff\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    """Load (once per model) the tiktoken encoding, or None if unavailable."""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # Vocabulary download failed (offline) - use the approximation
+        return None
+
+
+def approximate_tokens(text: str) -> int:
+    """
+    Fast approximation, meant to over-count: ASCII words cost 1 token per 4
+    characters, digits 1 per 3, CJK/kana/Hangul characters 1 each, other
+    non-ASCII letters 1 per 2 characters, and punctuation 1 each.
+    """
+    tokens = 0
+    for piece in _APPROX_PIECES.findall(text):
+        if piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        elif piece.isascii():
+            tokens += math.ceil(len(piece) / 4)
+        else:
+            wide = len(_WIDE_CHARS.findall(piece))
+            tokens += wide + math.ceil((len(piece) - wide) / 2)
+    return tokens
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Count tokens in text for a model."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return approximate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
@@ -0,0 +1,260 @@
+"""
+Responses API - Async Streaming Engine
+Multiplex many concurrent streams with AsyncOpenAI and measure their latency.
+
+Each stream records time-to-first-token (TTFT), inter-delta gaps and
+tokens/sec. Deltas from all streams flow through one bounded queue, so a
+slow consumer applies backpressure to the producers instead of buffering
+unbounded output in memory.
+
+Usage:
+    python async_streams.py                   # 5 streams against the real API
+    python async_streams.py --replay -n 300   # 300 streams against a local replay server
+"""
+import argparse
+import asyncio
+import contextlib
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+from openai import AsyncOpenAI
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# ============================================
+# Metrics
+# ============================================
+
+def percentile(values: list[float], pct: float) -> Optional[float]:
+    """Linear-interpolated percentile (pct in 0-100) of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+@dataclass
+class StreamMetrics:
+    """Latency measurements for a single stream."""
+    stream_id: str
+    started_at: float
+    first_delta_at: Optional[float] = None
+    last_delta_at: Optional[float] = None
+    completed_at: Optional[float] = None
+    deltas: int = 0
+    output_tokens: Optional[int] = None  # From usage on response.completed
+    gaps: list[float] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def record_delta(self, now: float):
+        if self.first_delta_at is None:
+            self.first_delta_at = now
+        else:
+            self.gaps.append(now - self.last_delta_at)
+        self.last_delta_at = now
+        self.deltas += 1
+
+    @property
+    def ttft(self) -> Optional[float]:
+        """Seconds from request start to the first text delta."""
+        if self.first_delta_at is None:
+            return None
+        return self.first_delta_at - self.started_at
+
+    @property
+    def tokens_per_sec(self) -> Optional[float]:
+        """Generation throughput measured from the first to the last delta."""
+        if self.first_delta_at is None or self.last_delta_at is None:
+            return None
+        elapsed = self.last_delta_at - self.first_delta_at
+        if elapsed <= 0:
+            return None
+        # Deltas are roughly one token each; prefer exact usage when reported
+        tokens = self.output_tokens if self.output_tokens else self.deltas
+        return tokens / elapsed
+
+    def gap_percentile(self, pct: float) -> Optional[float]:
+        return percentile(self.gaps, pct)
+
+
+def summarize(metrics: dict[str, StreamMetrics]) -> dict:
+    """Aggregate per-stream metrics into fleet-wide latency numbers."""
+    done = [m for m in metrics.values() if m.error is None]
+    ttfts = [m.ttft for m in done if m.ttft is not None]
+    gaps = [g for m in done for g in m.gaps]
+    rates = [m.tokens_per_sec for m in done if m.tokens_per_sec is not None]
+
+    return {
+        "streams": len(metrics),
+        "errors": len(metrics) - len(done),
+        "ttft_p50": percentile(ttfts, 50),
+        "ttft_p95": percentile(ttfts, 95),
+        "gap_p50": percentile(gaps, 50),
+        "gap_p95": percentile(gaps, 95),
+        "gap_p99": percentile(gaps, 99),
+        "tokens_per_sec_mean": sum(rates) / len(rates) if rates else None,
+    }
+
+
+# ============================================
+# Streaming Engine
+# ============================================
+
+DeltaHandler = Callable[[str, str], Awaitable[None]]
+
+_DONE = object()  # Queue sentinel
+
+
+class StreamEngine:
+    """Runs many Responses API streams concurrently through a bounded queue."""
+
+    def __init__(self, client: AsyncOpenAI = None, max_concurrency: int = 100,
+                 queue_size: int = 1024):
+        self.client = client or AsyncOpenAI()
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+
+    async def _produce(self, stream_id: str, request: dict, queue: asyncio.Queue,
+                       semaphore: asyncio.Semaphore) -> StreamMetrics:
+        """Open one stream and push its text deltas onto the shared queue."""
+        async with semaphore:
+            metrics = StreamMetrics(stream_id=stream_id, started_at=time.perf_counter())
+            try:
+                stream = await self.client.responses.create(**request, stream=True)
+                async with stream:  # Closes the connection if the stream is cancelled
+                    async for event in stream:
+                        if event.type == "response.output_text.delta":
+                            metrics.record_delta(time.perf_counter())
+                            # Blocks while the queue is full: backpressure to the socket
+                            await queue.put((stream_id, event.delta))
+                        elif event.type == "response.completed":
+                            usage = event.response.usage
+                            if usage is not None:
+                                metrics.output_tokens = usage.output_tokens
+                        elif event.type in ("error", "response.failed"):
+                            metrics.error = getattr(event, "message", None) or event.type
+            except Exception as e:
+                metrics.error = f"{type(e).__name__}: {e}"
+            metrics.completed_at = time.perf_counter()
+            return metrics
+
+    async def run(self, requests: dict[str, dict],
+                  on_delta: DeltaHandler = None) -> dict[str, StreamMetrics]:
+        """
+        Stream every request concurrently.
+
+        Args:
+            requests: Mapping of stream id to responses.create() keyword arguments
+            on_delta: Optional async callback invoked with (stream_id, delta)
+
+        Returns:
+            Per-stream metrics keyed by stream id
+
+        Raises:
+            Whatever on_delta raised; the remaining streams are cancelled
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def consume():
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    return
+                if on_delta is not None:
+                    await on_delta(*item)
+
+        consumer = asyncio.create_task(consume())
+        producers = asyncio.gather(*(
+            self._produce(stream_id, request, queue, semaphore)
+            for stream_id, request in requests.items()
+        ))
+        try:
+            # The consumer only finishes early if on_delta raised; the producers
+            # would then block forever on the full queue, so stop them
+            await asyncio.wait({producers, consumer}, return_when=asyncio.FIRST_COMPLETED)
+            if consumer.done():
+                producers.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await producers
+                consumer.result()  # Re-raise the handler's exception
+            results = producers.result()
+            await queue.put(_DONE)
+            await consumer
+        finally:
+            consumer.cancel()
+            producers.cancel()
+
+        return {m.stream_id: m for m in results}
+
+
+# ============================================
+# Demo
+# ============================================
+
+def _ms(seconds: Optional[float]) -> str:
+    return f"{seconds * 1000:.1f} ms" if seconds is not None else "n/a"
+
+
+async def main():
+    """Stream several prompts concurrently and report latency metrics."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("-n", "--streams", type=int, default=5)
+    parser.add_argument("-c", "--concurrency", type=int, default=100)
+    parser.add_argument("--replay", action="store_true",
+                        help="Use the local SSE replay server instead of the API")
+    args = parser.parse_args()
+
+    server = None
+    if args.replay:
+        from replay_server import ReplayServer
+        server = ReplayServer()
+        client = AsyncOpenAI(base_url=await server.start(), api_key="replay", max_retries=0)
+    else:
+        client = AsyncOpenAI()
+
+    topics = ["quantum entanglement", "black holes", "photosynthesis", "blockchains", "vaccines"]
+    requests = {
+        f"stream-{i + 1}": {
+            "model": "gpt-4o-mini",
+            "input": f"Explain {topics[i % len(topics)]} in simple terms.",
+        }
+        for i in range(args.streams)
+    }
+
+    texts: dict[str, list[str]] = {stream_id: [] for stream_id in requests}
+
+    async def collect(stream_id: str, delta: str):
+        texts[stream_id].append(delta)
+
+    print(f"🔄 Streaming {len(requests)} responses (concurrency {args.concurrency})...\n")
+    engine = StreamEngine(client, max_concurrency=args.concurrency)
+    started = time.perf_counter()
+    try:
+        metrics = await engine.run(requests, on_delta=collect)
+    finally:
+        if server is not None:
+            await server.close()
+    wall = time.perf_counter() - started
+
+    if len(requests) <= 10:
+        for stream_id, m in metrics.items():
+            status = f"❌ {m.error}" if m.error else "✅"
+            print(f"{status} {stream_id}: TTFT {_ms(m.ttft)}, "
+                  f"gap p50 {_ms(m.gap_percentile(50))}, "
+                  f"{m.tokens_per_sec or 0:.1f} tok/s, {len(''.join(texts[stream_id]))} chars")
+
+    summary = summarize(metrics)
+    print(f"\n📊 {summary['streams']} streams in {wall:.2f}s ({summary['errors']} errors)")
+    print(f"   TTFT p50/p95:      {_ms(summary['ttft_p50'])} / {_ms(summary['ttft_p95'])}")
+    print(f"   Gap p50/p95/p99:   {_ms(summary['gap_p50'])} / {_ms(summary['gap_p95'])} / {_ms(summary['gap_p99'])}")
+    print(f"   Mean tokens/sec:   {summary['tokens_per_sec_mean'] or 0:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
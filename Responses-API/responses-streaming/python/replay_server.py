@@ -0,0 +1,114 @@
+"""
+Responses API - SSE Replay Server
+A local stand-in for POST /v1/responses that replays recorded streaming events.
+
+Point AsyncOpenAI(base_url=server.base_url) at it to exercise streaming code
+without network access, API keys or token costs.
+"""
+import asyncio
+import json
+from pathlib import Path
+
+DEFAULT_RECORDING = Path(__file__).parent / "recordings" / "entanglement.jsonl"
+
+
+def load_recording(path: Path = DEFAULT_RECORDING) -> list[dict]:
+    """Load recorded SSE events (one JSON event per line)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayServer:
+    """Minimal HTTP/1.1 server that streams recorded events as Server-Sent Events."""
+
+    def __init__(self, events: list[dict] = None, delay: float = 0.01,
+                 first_event_delay: float = 0.05, host: str = "127.0.0.1", port: int = 0):
+        self.events = events if events is not None else load_recording()
+        self.delay = delay  # Pause between events (simulates generation speed)
+        self.first_event_delay = first_event_delay  # Simulates time-to-first-token
+        self.host = host
+        self.port = port
+        self.requests_served = 0
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start(self) -> str:
+        """Start listening and return the base URL for the OpenAI client."""
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, backlog=1024
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.base_url
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "ReplayServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            content_length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    content_length = int(value.strip())
+            if content_length:
+                await reader.readexactly(content_length)
+
+            method, path, _ = request_line.decode("latin-1").split(" ", 2)
+            if method != "POST" or not path.rstrip("/").endswith("/responses"):
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+                return
+
+            self.requests_served += 1
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/event-stream\r\n"
+                b"Cache-Control: no-cache\r\n"
+                b"Connection: close\r\n\r\n"
+            )
+            await writer.drain()
+
+            await asyncio.sleep(self.first_event_delay)
+            for i, event in enumerate(self.events):
+                if i and self.delay:
+                    await asyncio.sleep(self.delay)
+                payload = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                writer.write(payload.encode("utf-8"))
+                # drain() blocks when the client stops reading, like a real server
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def main():
+    """Run the replay server until interrupted."""
+    async with ReplayServer(port=8765) as server:
+        print(f"🎞️  Replaying {len(server.events)} events at {server.base_url}")
+        print("   Press Ctrl+C to stop.")
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass